@@ -0,0 +1,173 @@
+import asyncio
+import json
+import os
+from collections import deque
+from typing import Any
+
+ADMISSION_ENABLED = os.getenv("NUTRITRACK_ADMISSION", "1") == "1"
+
+# Paths are matched after the /api and /async prefixes are stripped; anything
+# unlisted (SPA assets, docs, metrics, job polling) is never limited.
+ROUTE_CLASSES = {
+    "/health": "cheap",
+    "/calculate": "cheap",
+    "/contributions": "cheap",
+    "/recipes": "cheap",
+    "/substitutes": "cheap",
+    "/reports/compliance/summary": "cheap",
+    "/generate-label": "expensive",
+    "/generate-labels/sheet": "expensive",
+    "/jobs": "expensive",
+    "/internal/jobs": "expensive",
+    "/reports/compliance": "expensive",
+}
+ROUTE_CLASS_DEFAULTS = {
+    "cheap": {"limit": 64, "queue": 256, "timeout_seconds": 2.0, "retry_after_seconds": 1},
+    "expensive": {"limit": 8, "queue": 32, "timeout_seconds": 5.0, "retry_after_seconds": 5},
+}
+
+
+def _setting(route_class: str, name: str, default: float) -> float:
+    raw = os.getenv(f"NUTRITRACK_ADMISSION_{route_class.upper()}_{name.upper()}")
+    return type(default)(raw) if raw is not None else default
+
+
+class AdmissionGate:
+    """Concurrency budget with a bounded FIFO wait queue for one route class.
+
+    Runs on the event loop only, so plain counters are enough. A released slot
+    is handed straight to the oldest waiter instead of being put back, which
+    keeps queued requests in arrival order.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        limit: int,
+        queue: int,
+        timeout_seconds: float,
+        retry_after_seconds: int,
+    ) -> None:
+        self.name = name
+        self.limit = max(1, limit)
+        self.queue = max(0, queue)
+        self.timeout_seconds = timeout_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self.active = 0
+        self.admitted = 0
+        self.queued = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    async def acquire(self) -> int | None:
+        """Returns None once a slot is held, or the status code to reject with."""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return None
+        if len(self._waiters) >= self.queue:
+            self.rejected_queue_full += 1
+            return 429
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        try:
+            await asyncio.wait_for(waiter, self.timeout_seconds)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            # A slot may have been handed over just as the wait ended.
+            holds_slot = waiter.done() and not waiter.cancelled()
+            if not holds_slot and waiter in self._waiters:
+                self._waiters.remove(waiter)
+            if isinstance(exc, asyncio.CancelledError):
+                if holds_slot:
+                    self.release()
+                raise
+            if not holds_slot:
+                self.rejected_timeout += 1
+                return 503
+        self.admitted += 1
+        return None
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "queue": self.queue,
+            "timeout_seconds": self.timeout_seconds,
+            "retry_after_seconds": self.retry_after_seconds,
+            "active": self.active,
+            "waiting": len(self._waiters),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+        }
+
+
+admission_gates = {
+    route_class: AdmissionGate(
+        route_class,
+        **{name: _setting(route_class, name, value) for name, value in defaults.items()},
+    )
+    for route_class, defaults in ROUTE_CLASS_DEFAULTS.items()
+}
+
+
+def route_class_for(path: str) -> str | None:
+    for prefix in ("/api", "/async"):
+        if path.startswith(prefix + "/"):
+            path = path[len(prefix) :]
+    return ROUTE_CLASSES.get(path.rstrip("/") or "/")
+
+
+REJECTION_DETAILS = {
+    429: "Server is at capacity for this kind of request; retry later.",
+    503: "Timed out waiting for capacity; retry later.",
+}
+
+
+class AdmissionControlMiddleware:
+    def __init__(self, app, gates: dict[str, AdmissionGate]) -> None:
+        self.app = app
+        self.gates = gates
+
+    async def __call__(self, scope, receive, send) -> None:
+        route_class = route_class_for(scope["path"]) if scope["type"] == "http" else None
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        gate = self.gates[route_class]
+        status_code = await gate.acquire()
+        if status_code is not None:
+            await _reject(send, status_code, gate)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release()
+
+
+async def _reject(send, status_code: int, gate: AdmissionGate) -> None:
+    body = json.dumps({"detail": REJECTION_DETAILS[status_code]}).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(gate.retry_after_seconds).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
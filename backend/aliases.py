@@ -0,0 +1,72 @@
+import sqlite3
+import threading
+import unicodedata
+from typing import Any
+
+from database import catalog_cache_version, get_catalog_connection
+
+ALIASES_QUERY = """
+    SELECT ingredient_aliases.alias, ingredients.name
+    FROM ingredient_aliases
+    JOIN ingredients ON ingredients.id = ingredient_aliases.ingredient_id
+"""
+
+
+def normalize_alias(name: str) -> str:
+    # NFKC folds compatibility forms (full-width letters, ligatures,
+    # non-breaking spaces), casefold handles case beyond ASCII, and any run
+    # of whitespace becomes a single space.
+    return " ".join(unicodedata.normalize("NFKC", name).casefold().split())
+
+
+def aliases_from(connection: sqlite3.Connection) -> dict[str, str]:
+    """Normalized alias -> lower-cased catalog ingredient name."""
+    return {
+        alias: name.strip().lower() for alias, name in connection.execute(ALIASES_QUERY)
+    }
+
+
+def catalog_targets(lowered_names: list[str], aliases: dict[str, str]) -> dict[str, str]:
+    # Requested name -> catalog name to look up: the aliased ingredient, or
+    # the requested name itself once normalized.
+    targets: dict[str, str] = {}
+    for name in lowered_names:
+        key = normalize_alias(name)
+        targets[name] = aliases.get(key, key)
+    return targets
+
+
+class AliasIndex:
+    """The alias table as an in-memory dict, rebuilt once per catalog version.
+
+    Resolving a name is then a normalization and a dict lookup; the lookup
+    query itself is unchanged and only ever sees catalog names.
+    """
+
+    def __init__(self) -> None:
+        self.version: int | None = None
+        self.rebuilds = 0
+        self._aliases: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def current(self) -> dict[str, str]:
+        version = catalog_cache_version()
+        if version != self.version:
+            with self._lock:
+                if version != self.version:
+                    with get_catalog_connection() as connection:
+                        aliases = aliases_from(connection)
+                    self._aliases = aliases
+                    self.version = version
+                    self.rebuilds += 1
+        return self._aliases
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "version": self.version,
+            "aliases": len(self._aliases),
+            "rebuilds": self.rebuilds,
+        }
+
+
+alias_index = AliasIndex()
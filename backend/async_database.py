@@ -0,0 +1,93 @@
+import asyncio
+import contextvars
+import queue
+import sqlite3
+import threading
+from collections.abc import Callable
+from typing import Any, Sequence
+
+from database import (
+    CATALOG_SNAPSHOT_ENABLED,
+    get_catalog_connection,
+    get_connection,
+)
+
+
+class AsyncReader:
+    """Serves read-only queries from one dedicated thread to async callers.
+
+    Awaiting a query parks the coroutine on an asyncio future instead of
+    holding a threadpool slot, so lookups no longer cap request concurrency.
+    Other blocking catalog work the async path needs, such as checking the
+    catalog version or rebuilding the alias index, runs on the same thread.
+    """
+
+    def __init__(self) -> None:
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._disk_connection: sqlite3.Connection | None = None
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._serve, name="nutritrack-db-reader", daemon=True
+                )
+                self._thread.start()
+
+    def _serve(self) -> None:
+        # This is the only reader thread: if anything escaped this loop, every
+        # queued caller would wait until some later call() restarted it.
+        while True:
+            func, args, context, loop, future = self._queue.get()
+            try:
+                # Run in the caller's context so per-request instrumentation
+                # (statement counts, trace spans) attributes the work to it.
+                outcome = (context.run(func, *args), None)
+            except BaseException as exc:
+                outcome = (None, exc)
+            try:
+                loop.call_soon_threadsafe(_resolve, future, *outcome)
+            except RuntimeError:
+                # The caller's loop has closed; nobody is left to wake.
+                pass
+
+    def _fetch_rows(self, query: str, params: Sequence[Any]) -> list[dict[str, Any]]:
+        # Snapshot connections are refreshed per call; a disk connection is
+        # opened here, so a failure reaches the caller, and then reused.
+        if not CATALOG_SNAPSHOT_ENABLED and self._disk_connection is None:
+            self._disk_connection = get_connection()
+        connection = self._disk_connection or get_catalog_connection()
+        return [dict(row) for row in connection.execute(query, params).fetchall()]
+
+    async def call(self, func: Callable[..., Any], *args: Any) -> Any:
+        self._ensure_started()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.put((func, args, contextvars.copy_context(), loop, future))
+        return await future
+
+    async def fetchall(
+        self, query: str, params: Sequence[Any] = ()
+    ) -> list[dict[str, Any]]:
+        return await self.call(self._fetch_rows, query, params)
+
+
+def _resolve(future: asyncio.Future, result: Any, error: BaseException | None) -> None:
+    if future.done():
+        return
+    if isinstance(error, StopIteration):
+        # Futures reject StopIteration, which would leave this one pending.
+        wrapped = RuntimeError("reader call raised StopIteration")
+        wrapped.__cause__ = error
+        error = wrapped
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+async_reader = AsyncReader()
@@ -0,0 +1,101 @@
+import argparse
+import json
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+from loadtest import (
+    free_port,
+    parse_mix,
+    prepare_catalog,
+    run_stage,
+    start_server,
+    wait_for_ready,
+)
+
+MODES = {"threadpool": "", "async": "/async"}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Compare the threadpool endpoints (/calculate, /generate-label) with their "
+            "async-database counterparts (/async/...) on the same server."
+        )
+    )
+    parser.add_argument("--concurrency", default="8,32,128")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--mix", default="calculate=1")
+    parser.add_argument(
+        "--threadpool-size",
+        type=int,
+        default=8,
+        help="Server threadpool size; small values make slot exhaustion visible sooner.",
+    )
+    parser.add_argument("--catalog-size", type=int, default=5000)
+    parser.add_argument("--ingredients-per-recipe", type=int, default=8)
+    parser.add_argument("--report", type=Path)
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    levels = [int(value) for value in args.concurrency.split(",")]
+    results: dict[str, list[dict]] = {mode: [] for mode in MODES}
+
+    with tempfile.TemporaryDirectory(prefix="nutritrack-bench-") as temp_dir:
+        db_path = Path(temp_dir) / "nutrition.db"
+        catalog = prepare_catalog(db_path, args.catalog_size)
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = start_server(
+            port,
+            workers=1,
+            env={
+                "NUTRITRACK_DB_PATH": str(db_path),
+                "NUTRITRACK_THREADPOOL_SIZE": str(args.threadpool_size),
+            },
+        )
+        try:
+            wait_for_ready(base_url)
+            for level in levels:
+                for mode, prefix in MODES.items():
+                    stage = run_stage(
+                        base_url=base_url,
+                        mix=mix,
+                        concurrency=level,
+                        duration=args.duration,
+                        catalog=catalog,
+                        ingredients_per_recipe=args.ingredients_per_recipe,
+                        path_prefix=prefix,
+                    )
+                    results[mode].append(stage)
+                    overall = stage["overall"]
+                    print(
+                        f"{mode:>10}  concurrency={level:>4}  "
+                        f"rps={overall['throughput_rps']:>9.2f}  "
+                        f"p50={overall['latency_ms']['p50']:>8.2f}ms  "
+                        f"p99={overall['latency_ms']['p99']:>8.2f}ms  "
+                        f"errors={overall['error_rate']:.2%}"
+                    )
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    if args.report:
+        args.report.write_text(
+            json.dumps(
+                {
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                    "threadpool_size": args.threadpool_size,
+                    "catalog_size": len(catalog),
+                    "mix": dict(mix),
+                    "stage_duration_s": args.duration,
+                    "modes": results,
+                },
+                indent=2,
+            )
+        )
+        print(f"Report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
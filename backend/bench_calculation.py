@@ -0,0 +1,81 @@
+import argparse
+import json
+import time
+import tracemalloc
+from pathlib import Path
+
+from calculator import compute_nutrition
+from database import init_db
+from models import RecipeRequest
+from seed_data import SEED_INGREDIENTS, seed_ingredients
+
+
+def synthetic_recipe(ingredients: int) -> tuple[RecipeRequest, dict[str, dict]]:
+    # Distinct names over the seeded nutrient profiles, so every line is its
+    # own contributor like in a real large recipe.
+    ingredient_map = {}
+    lines = []
+    for index in range(ingredients):
+        profile = SEED_INGREDIENTS[index % len(SEED_INGREDIENTS)]
+        name = f"{profile['name']} {index}"
+        ingredient_map[name.lower()] = {**profile, "name": name}
+        lines.append({"name": name, "quantity_g": 5 + index % 40})
+    recipe = RecipeRequest(recipe_name="Allocation benchmark", servings=4, ingredients=lines)
+    return recipe, ingredient_map
+
+
+def measure(ingredients: int, contributions: bool, repeat: int) -> dict:
+    recipe, ingredient_map = synthetic_recipe(ingredients)
+    compute_nutrition(recipe, ingredient_map, include_contributions=contributions)
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        compute_nutrition(recipe, ingredient_map, include_contributions=contributions)
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    compute_nutrition(recipe, ingredient_map, include_contributions=contributions)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "ingredients": ingredients,
+        "contributions": contributions,
+        "best_ms": round(min(timings) * 1000, 3),
+        "per_ingredient_us": round(min(timings) / ingredients * 1_000_000, 2),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Time and peak traced memory of compute_nutrition for large recipes."
+    )
+    parser.add_argument("--ingredients", default="10,100,500,2000")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--report", type=Path)
+    args = parser.parse_args()
+
+    # Substitute suggestions read the seeded catalog.
+    init_db()
+    seed_ingredients()
+
+    results = []
+    for ingredients in (int(value) for value in args.ingredients.split(",")):
+        for contributions in (False, True):
+            result = measure(ingredients, contributions, args.repeat)
+            results.append(result)
+            print(
+                f"ingredients={ingredients:>5}  contributions={str(contributions):<5}  "
+                f"best={result['best_ms']:>8.3f} ms  "
+                f"per-ingredient={result['per_ingredient_us']:>6.2f} us  "
+                f"peak={result['peak_kb']:>8.1f} KiB"
+            )
+
+    if args.report:
+        args.report.write_text(json.dumps(results, indent=2))
+        print(f"Report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import argparse
+import json
+import time
+from pathlib import Path
+
+from ingestion import job_payload, validate_bulk_job
+from models import BatchJobRequest
+
+INGREDIENTS = ("Rice", "Sugar", "Milk", "Ghee", "Salt", "Onion")
+
+
+def _body(recipes: int, ingredients: int) -> bytes:
+    return json.dumps(
+        {
+            "kind": "calculations",
+            "recipes": [
+                {
+                    "recipe_name": f"Recipe {index}",
+                    "servings": 4,
+                    "ingredients": [
+                        {"name": INGREDIENTS[item % len(INGREDIENTS)], "quantity_g": 50 + item}
+                        for item in range(ingredients)
+                    ],
+                }
+                for index in range(recipes)
+            ],
+        }
+    ).encode()
+
+
+def model_path(body: bytes) -> str:
+    # What POST /jobs does: a BatchJobRequest with one model per recipe and
+    # ingredient, dumped back to JSON for the job payload.
+    request = BatchJobRequest.model_validate_json(body)
+    return json.dumps([recipe.model_dump() for recipe in request.recipes])
+
+
+def adapter_path(body: bytes) -> str:
+    rows = validate_bulk_job(body)
+    return job_payload(rows["recipes"])
+
+
+MODES = {"model": model_path, "adapter": adapter_path}
+
+
+def measure(mode: str, body: bytes, recipes: int, repeat: int) -> dict:
+    ingest = MODES[mode]
+    ingest(body)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        ingest(body)
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    return {
+        "mode": mode,
+        "recipes": recipes,
+        "best_ms": round(best * 1000, 2),
+        "per_recipe_us": round(best / recipes * 1_000_000, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare /jobs model validation with the trusted TypeAdapter ingestion path."
+    )
+    parser.add_argument("--recipes", default="1000,10000,50000")
+    parser.add_argument("--ingredients", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--report", type=Path)
+    args = parser.parse_args()
+
+    results = []
+    for recipes in (int(value) for value in args.recipes.split(",")):
+        body = _body(recipes, args.ingredients)
+        for mode in MODES:
+            result = measure(mode, body, recipes, args.repeat)
+            results.append(result)
+            print(
+                f"{mode:>7}  recipes={recipes:>6}  "
+                f"best={result['best_ms']:>9.2f} ms  "
+                f"per-recipe={result['per_recipe_us']:>7.2f} us"
+            )
+
+    if args.report:
+        args.report.write_text(json.dumps(results, indent=2))
+        print(f"Report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
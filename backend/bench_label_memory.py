@@ -0,0 +1,126 @@
+import argparse
+import asyncio
+import json
+import tracemalloc
+from io import BytesIO
+from pathlib import Path
+
+from fastapi.responses import Response, StreamingResponse
+
+from label_generator import generate_nutrition_label_pdf, write_nutrition_label_pdf
+
+SAMPLE_LABEL = {
+    "recipe_name": "Memory benchmark",
+    "servings": 4,
+    "total_weight": 830.0,
+    "per_100g": {
+        "energy_kcal": 212.4,
+        "protein_g": 6.1,
+        "carbs_g": 31.9,
+        "sugar_g": 12.2,
+        "fat_g": 7.3,
+        "saturated_fat_g": 2.8,
+        "sodium_mg": 318.0,
+    },
+    "per_serving": {
+        "energy_kcal": 440.7,
+        "protein_g": 12.66,
+        "carbs_g": 66.19,
+        "sugar_g": 25.32,
+        "fat_g": 15.15,
+        "saturated_fat_g": 5.81,
+        "sodium_mg": 659.85,
+    },
+}
+HEADERS = {"Content-Disposition": 'attachment; filename="Memory_benchmark.pdf"'}
+
+
+def legacy_response() -> StreamingResponse:
+    # The previous path: render into a BytesIO, copy it out, wrap it again.
+    buffer = BytesIO()
+    write_nutrition_label_pdf(buffer, **SAMPLE_LABEL)
+    pdf_bytes = buffer.getvalue()
+    buffer.close()
+    return StreamingResponse(BytesIO(pdf_bytes), media_type="application/pdf", headers=HEADERS)
+
+
+def direct_response() -> Response:
+    pdf_bytes = generate_nutrition_label_pdf(**SAMPLE_LABEL)
+    return Response(content=pdf_bytes, media_type="application/pdf", headers=HEADERS)
+
+
+MODES = {"legacy": legacy_response, "direct": direct_response}
+
+
+async def _download(build_response, stats: dict[str, int]) -> None:
+    response = await asyncio.to_thread(build_response)
+    scope = {"type": "http", "asgi": {"spec_version": "2.4"}, "method": "POST"}
+
+    async def receive() -> dict:
+        await asyncio.sleep(3600)
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        if message["type"] == "http.response.body":
+            stats["chunks"] += 1
+            stats["bytes"] += len(message.get("body", b""))
+        elif message["type"] == "http.response.start":
+            if any(name == b"content-length" for name, _ in message["headers"]):
+                stats["with_content_length"] += 1
+
+    await response(scope, receive, send)
+
+
+async def _run(build_response, concurrency: int) -> dict[str, int]:
+    stats = {"chunks": 0, "bytes": 0, "with_content_length": 0}
+    await asyncio.gather(*(_download(build_response, stats) for _ in range(concurrency)))
+    return stats
+
+
+def measure(mode: str, concurrency: int) -> dict:
+    build_response = MODES[mode]
+    asyncio.run(_run(build_response, 1))  # warm fonts and module caches
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    stats = asyncio.run(_run(build_response, concurrency))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "peak_kib": round((peak - baseline) / 1024, 1),
+        "peak_kib_per_download": round((peak - baseline) / 1024 / concurrency, 1),
+        "body_chunks_per_download": round(stats["chunks"] / concurrency, 1),
+        "pdf_kib": round(stats["bytes"] / 1024 / concurrency, 1),
+        "content_length_sent": stats["with_content_length"] == concurrency,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare peak traced memory of the old and new PDF label response paths."
+    )
+    parser.add_argument("--concurrency", default="1,16,64")
+    parser.add_argument("--report", type=Path)
+    args = parser.parse_args()
+
+    results = []
+    for level in (int(value) for value in args.concurrency.split(",")):
+        for mode in MODES:
+            result = measure(mode, level)
+            results.append(result)
+            print(
+                f"{mode:>7}  concurrency={level:>4}  "
+                f"peak={result['peak_kib']:>9.1f} KiB  "
+                f"per-download={result['peak_kib_per_download']:>7.1f} KiB  "
+                f"chunks={result['body_chunks_per_download']:>6.1f}  "
+                f"content-length={result['content_length_sent']}"
+            )
+
+    if args.report:
+        args.report.write_text(json.dumps(results, indent=2))
+        print(f"Report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
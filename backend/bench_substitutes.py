@@ -0,0 +1,105 @@
+import argparse
+import json
+import math
+import random
+import time
+from pathlib import Path
+
+from substitutions import NUTRIENT_COLUMNS, _IndexState
+
+# Rough per-100 g ranges of the seeded catalog, per nutrient column.
+RANGES = {
+    "energy_kcal": (10, 900),
+    "protein_g": (0, 35),
+    "carbs_g": (0, 100),
+    "sugar_g": (0, 100),
+    "fat_g": (0, 100),
+    "saturated_fat_g": (0, 85),
+    "sodium_mg": (0, 40000),
+}
+
+
+def synthetic_catalog(rows: int, seed: int) -> _IndexState:
+    rng = random.Random(seed)
+    values = [
+        tuple(rng.uniform(*RANGES[column]) for column in NUTRIENT_COLUMNS)
+        for _ in range(rows)
+    ]
+    return _IndexState(0, [f"Ingredient {index}" for index in range(rows)], values)
+
+
+def brute_force(state: _IndexState, target: tuple[float, ...], k: int, axis: int | None):
+    scaled = state.scale(target)
+    candidates = [
+        (math.dist(scaled, state.tree.points[index]), index)
+        for index in range(len(state.values))
+        if axis is None or state.values[index][axis] < target[axis]
+    ]
+    return sorted(candidates)[:k]
+
+
+def measure(rows: int, queries: int, k: int, seed: int) -> dict:
+    started = time.perf_counter()
+    state = synthetic_catalog(rows, seed)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    rng = random.Random(seed + 1)
+    targets = [state.values[rng.randrange(rows)] for _ in range(queries)]
+    reduce_axis = NUTRIENT_COLUMNS.index("sugar_g")
+    result = {"rows": rows, "k": k, "build_ms": round(build_ms, 1)}
+    for mode, axis in (("plain", None), ("reduce_sugar", reduce_axis)):
+        timings = []
+        for target in targets:
+            ceiling = None if axis is None else target[axis]
+            accept = None if axis is None else (lambda index: state.values[index][axis] < ceiling)
+            started = time.perf_counter()
+            below = None if axis is None else (axis, state.scale(target)[axis])
+            found = state.tree.nearest(state.scale(target), k, accept, below)
+            timings.append(time.perf_counter() - started)
+        # Spot-check the last query against an exhaustive scan.
+        expected = brute_force(state, target, k, axis)
+        if [index for _, index in found] != [index for _, index in expected]:
+            raise AssertionError(f"{mode}: k-d tree and brute force disagree")
+        started = time.perf_counter()
+        brute_force(state, target, k, axis)
+        brute_ms = (time.perf_counter() - started) * 1000
+        timings.sort()
+        result[mode] = {
+            "p50_ms": round(timings[len(timings) // 2] * 1000, 3),
+            "p99_ms": round(timings[int(len(timings) * 0.99)] * 1000, 3),
+            "brute_force_ms": round(brute_ms, 1),
+        }
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Time substitute lookups in the nutrient k-d tree on synthetic catalogs."
+    )
+    parser.add_argument("--rows", default="1000,10000,100000")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--report", type=Path)
+    args = parser.parse_args()
+
+    results = []
+    for rows in (int(value) for value in args.rows.split(",")):
+        result = measure(rows, args.queries, args.k, args.seed)
+        results.append(result)
+        print(
+            f"rows={rows:>7}  build={result['build_ms']:>8.1f} ms  "
+            f"p50={result['plain']['p50_ms']:>6.3f} ms  "
+            f"p99={result['plain']['p99_ms']:>6.3f} ms  "
+            f"reduce p50={result['reduce_sugar']['p50_ms']:>6.3f} ms  "
+            f"p99={result['reduce_sugar']['p99_ms']:>6.3f} ms  "
+            f"brute={result['plain']['brute_force_ms']:>7.1f} ms"
+        )
+
+    if args.report:
+        args.report.write_text(json.dumps(results, indent=2))
+        print(f"Report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
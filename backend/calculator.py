@@ -1,7 +1,23 @@
+import asyncio
+import heapq
+import operator
+import sqlite3
+from itertools import repeat
 from typing import Any
 
-from database import get_connection
+from aliases import alias_index, aliases_from, catalog_targets, normalize_alias
+from async_database import async_reader
+from composites import COMPOSITE_LINES_QUERY, composite_cache
+from database import DATA_SCOPES, get_catalog_connection, get_connection, read_catalog_version
 from models import RecipeRequest
+from substitutions import substitution_index
+from tenants import (
+    TENANT_OVERRIDES_QUERY,
+    get_tenant_overrides,
+    get_tenant_overrides_async,
+    overrides_by_name,
+)
+from tracing import span, traced
 
 
 NUTRIENT_FIELDS = (
@@ -45,6 +61,12 @@ FSSAI_REFERENCE_VALUES = {
 }
 
 PROTEIN_REFERENCE_VALUE = 50.0
+TOP_CONTRIBUTOR_LIMIT = 3
+SUBSTITUTE_LIMIT = 3
+# Neighbours fetched per lookup; the recipe's own ingredients are filtered out
+# afterwards so cached lookups stay independent of the recipe.
+SUBSTITUTE_CANDIDATES = 8
+INGREDIENT_LOOKUP_CHUNK = 500
 LIMIT_WARNING_PERCENT = 25.0
 LIMIT_FAIL_PERCENT = 35.0
 
@@ -90,6 +112,8 @@ ALLERGEN_RULES = (
     },
 )
 
+ALLERGENS = {rule["allergen"].lower(): rule for rule in ALLERGEN_RULES}
+
 VEGETABLE_INGREDIENTS = {"spinach", "tomato", "carrot", "cabbage", "onion", "green peas"}
 PROTEIN_BOOST_OPTIONS = [
     "Lentils",
@@ -109,10 +133,22 @@ class IngredientNotFoundError(Exception):
         super().__init__(message)
 
 
+class RecipeCycleError(ValueError):
+    def __init__(self, path: list[str]) -> None:
+        self.path = path
+        super().__init__("Recipe cycle detected: " + " -> ".join(path))
+
+
 def _round_nutrients(data: dict[str, float]) -> dict[str, float]:
     return {key: round(value, 2) for key, value in data.items()}
 
 
+def _nutrient_dict(values: Any, rounded: bool = False) -> dict[str, float]:
+    if rounded:
+        return {field: round(value, 2) for field, value in zip(NUTRIENT_FIELDS, values)}
+    return dict(zip(NUTRIENT_FIELDS, values))
+
+
 def _percent_of_reference(value: float, reference: float) -> float:
     if reference <= 0:
         return 0.0
@@ -149,27 +185,78 @@ def _guidance_for_metric(key: str, status: str, direction: str) -> str:
     return "Within a comfortable per-serving range."
 
 
+_nutrient_vector = operator.itemgetter(*NUTRIENT_FIELDS)
+
+
+class _RecipeAggregate:
+    """Per-ingredient contributions and totals for one recipe.
+
+    Nutrient values are tuples and lists indexed by position in
+    ``NUTRIENT_FIELDS``; dicts are only built for the API response.
+    """
+
+    __slots__ = ("names", "quantities", "contributions", "totals", "total_weight")
+
+    def __init__(
+        self, recipe: RecipeRequest, ingredient_map: dict[str, dict[str, Any]]
+    ) -> None:
+        self.names = [item.name.strip() for item in recipe.ingredients]
+        self.quantities = [item.quantity_g for item in recipe.ingredients]
+        self.contributions = [
+            tuple(
+                map(
+                    operator.mul,
+                    _nutrient_vector(ingredient_map[name.lower()]),
+                    repeat(quantity / 100.0),
+                )
+            )
+            for name, quantity in zip(self.names, self.quantities)
+        ]
+        columns = list(zip(*self.contributions))
+        self.totals = [sum(column) for column in columns]
+        self.total_weight = sum(self.quantities)
+
+    def rankings(self, limit: int, servings: int) -> dict[str, list[tuple[str, float]]]:
+        """The ``limit`` largest positive contributors per nutrient, per serving.
+
+        Earlier ingredients win ties.
+        """
+        positions = range(0, -len(self.names), -1)
+        rankings: dict[str, list[tuple[str, float]]] = {}
+        for field, column in zip(NUTRIENT_FIELDS, zip(*self.contributions)):
+            top = heapq.nlargest(limit, zip(column, positions, self.names))
+            rankings[field] = [(name, value / servings) for value, _, name in top if value > 0]
+        return rankings
+
+
 def _top_contributors(
-    ingredient_contributions: list[dict[str, Any]],
+    contributor_rankings: dict[str, list[tuple[str, float]]],
     nutrient_key: str,
-    servings: int,
-    limit: int = 3,
+    limit: int = TOP_CONTRIBUTOR_LIMIT,
 ) -> list[str]:
-    ranked: list[tuple[str, float]] = []
-    for entry in ingredient_contributions:
-        per_serving_value = entry["nutrients"][nutrient_key] / servings
-        if per_serving_value <= 0:
-            continue
-        ranked.append((entry["name"], per_serving_value))
-
-    ranked.sort(key=lambda item: item[1], reverse=True)
     unit = NUTRIENT_UNITS[nutrient_key]
     return [
         f"{name} ({round(value, 2)} {unit}/serving)"
-        for name, value in ranked[:limit]
+        for name, value in contributor_rankings[nutrient_key][:limit]
     ]
 
 
+def _nearest_substitutes(
+    per_100g: dict[str, Any],
+    lowered_recipe_ingredients: set[str],
+    exclude: frozenset[str] = frozenset(),
+    reduce: str | None = None,
+) -> list[str]:
+    return [
+        match["name"]
+        for match in substitution_index.substitutes(
+            per_100g, SUBSTITUTE_CANDIDATES, exclude=exclude, reduce=reduce
+        )
+        if match["name"].lower() not in lowered_recipe_ingredients
+    ][:SUBSTITUTE_LIMIT]
+
+
+@traced("build_health_bars")
 def _build_health_bars(per_serving: dict[str, float]) -> list[dict[str, Any]]:
     health_bars: list[dict[str, Any]] = []
     for key, reference, direction in HEALTH_BAR_CONFIG:
@@ -191,10 +278,12 @@ def _build_health_bars(per_serving: dict[str, float]) -> list[dict[str, Any]]:
     return health_bars
 
 
+@traced("build_cut_down_suggestions")
 def _build_cut_down_suggestions(
     per_serving: dict[str, float],
-    ingredient_contributions: list[dict[str, Any]],
-    servings: int,
+    contributor_rankings: dict[str, list[tuple[str, float]]],
+    ingredient_map: dict[str, dict[str, Any]],
+    ingredient_names: list[str],
 ) -> list[dict[str, Any]]:
     recommendation_map = {
         "sugar_g": "Reduce added sweeteners (for example sugar/honey/jaggery) or reduce portion size.",
@@ -205,6 +294,7 @@ def _build_cut_down_suggestions(
     }
 
     cut_down: list[dict[str, Any]] = []
+    lowered_recipe_ingredients = {name.lower() for name in ingredient_names}
     for key, reference in FSSAI_REFERENCE_VALUES.items():
         value = per_serving[key]
         percent = _percent_of_reference(value, reference)
@@ -221,16 +311,27 @@ def _build_cut_down_suggestions(
                 "percent_of_reference": round(percent, 2),
                 "recommendation": recommendation_map[key],
                 "top_contributors": _top_contributors(
-                    ingredient_contributions=ingredient_contributions,
+                    contributor_rankings=contributor_rankings,
                     nutrient_key=key,
-                    servings=servings,
                 ),
+                "substitutions": [
+                    {
+                        "ingredient": name,
+                        "substitutes": _nearest_substitutes(
+                            ingredient_map[name.lower()],
+                            lowered_recipe_ingredients,
+                            reduce=key,
+                        ),
+                    }
+                    for name, _ in contributor_rankings[key][:TOP_CONTRIBUTOR_LIMIT]
+                ],
             }
         )
 
     return cut_down
 
 
+@traced("build_add_up_suggestions")
 def _build_add_up_suggestions(
     per_serving: dict[str, float], ingredient_names: list[str]
 ) -> list[dict[str, Any]]:
@@ -275,17 +376,19 @@ def _build_add_up_suggestions(
     return add_up
 
 
+@traced("build_fssai_suggestions")
 def _build_fssai_suggestions(
     per_serving: dict[str, float],
-    ingredient_contributions: list[dict[str, Any]],
-    servings: int,
+    contributor_rankings: dict[str, list[tuple[str, float]]],
+    ingredient_map: dict[str, dict[str, Any]],
     ingredient_names: list[str],
 ) -> dict[str, Any]:
     return {
         "cut_down": _build_cut_down_suggestions(
             per_serving=per_serving,
-            ingredient_contributions=ingredient_contributions,
-            servings=servings,
+            contributor_rankings=contributor_rankings,
+            ingredient_map=ingredient_map,
+            ingredient_names=ingredient_names,
         ),
         "add_up": _build_add_up_suggestions(
             per_serving=per_serving,
@@ -298,7 +401,10 @@ def _build_fssai_suggestions(
     }
 
 
-def _build_allergy_alerts(ingredient_names: list[str]) -> list[dict[str, Any]]:
+@traced("build_allergy_alerts")
+def _build_allergy_alerts(
+    ingredient_names: list[str], ingredient_map: dict[str, dict[str, Any]]
+) -> list[dict[str, Any]]:
     lowered_to_original = {name.lower(): name for name in ingredient_names}
     lowered_recipe_ingredients = set(lowered_to_original.keys())
     allergy_alerts: list[dict[str, Any]] = []
@@ -314,6 +420,24 @@ def _build_allergy_alerts(ingredient_names: list[str]) -> list[dict[str, Any]]:
             if option.lower() not in lowered_recipe_ingredients
         ][:3]
 
+        # Components of a saved recipe are not in the map; their base
+        # catalog profile stands in.
+        substitutions = []
+        for ingredient in detected:
+            profile = ingredient_map.get(ingredient) or substitution_index.profile(ingredient)
+            if profile is None:
+                continue
+            substitutions.append(
+                {
+                    "ingredient": lowered_to_original[ingredient],
+                    "substitutes": _nearest_substitutes(
+                        profile,
+                        lowered_recipe_ingredients,
+                        exclude=frozenset(rule["ingredients"]),
+                    ),
+                }
+            )
+
         allergy_alerts.append(
             {
                 "allergen": rule["allergen"],
@@ -321,6 +445,7 @@ def _build_allergy_alerts(ingredient_names: list[str]) -> list[dict[str, Any]]:
                     lowered_to_original[ingredient] for ingredient in detected
                 ],
                 "alternatives": alternatives,
+                "substitutions": substitutions,
                 "advice": rule["advice"],
             }
         )
@@ -344,6 +469,7 @@ def _protein_status(percent_of_reference: float) -> str:
     return "pass"
 
 
+@traced("build_fssai_compliance")
 def _build_fssai_compliance(
     per_serving: dict[str, float],
     total_weight: float,
@@ -503,9 +629,9 @@ def _build_fssai_compliance(
     }
 
 
-def _fetch_ingredient_map(ingredient_names: list[str]) -> dict[str, dict[str, Any]]:
-    placeholders = ",".join(["?"] * len(ingredient_names))
-    query = f"""
+def _ingredient_lookup_query(count: int) -> str:
+    placeholders = ",".join(["?"] * count)
+    return f"""
         SELECT
             name,
             energy_kcal,
@@ -519,68 +645,431 @@ def _fetch_ingredient_map(ingredient_names: list[str]) -> dict[str, dict[str, An
         WHERE LOWER(name) IN ({placeholders})
     """
 
-    lowered_names = [name.lower() for name in ingredient_names]
-    with get_connection() as connection:
-        rows = connection.execute(query, lowered_names).fetchall()
-
-    return {row["name"].strip().lower(): dict(row) for row in rows}
-
 
-def calculate_nutrition(recipe: RecipeRequest) -> dict[str, Any]:
-    ingredient_names = [item.name.strip() for item in recipe.ingredients]
-    ingredient_map = _fetch_ingredient_map(ingredient_names)
+def _apply_tenant_overrides(
+    targets: dict[str, str], overrides: dict[str, dict[str, Any]]
+) -> tuple[dict[str, dict[str, Any]], list[str]]:
+    # A tenant row matches the name as written first, then the catalog name
+    # it is an alias of.
+    ingredient_map: dict[str, dict[str, Any]] = {}
+    remaining: list[str] = []
+    for name, target in targets.items():
+        row = overrides.get(name) or overrides.get(target)
+        if row is not None:
+            ingredient_map[name] = row
+        else:
+            remaining.append(name)
+    return ingredient_map, remaining
+
+
+def _catalog_name(name: str, entry: dict[str, Any]) -> str:
+    catalog_name = entry.get("name")
+    if (
+        catalog_name
+        and catalog_name.lower() != name.lower()
+        and catalog_name.strip().lower() != normalize_alias(name)
+    ):
+        return catalog_name
+    return name
+
+
+def _add_catalog_rows(
+    ingredient_map: dict[str, dict[str, Any]],
+    targets: dict[str, str],
+    names: list[str],
+    rows: list[Any],
+) -> None:
+    by_target = {row["name"].strip().lower(): row for row in rows}
+    for name in names:
+        row = by_target.get(targets[name])
+        if row is not None:
+            ingredient_map[name] = dict(row)
+
+
+@traced("fetch_ingredient_map")
+def _fetch_ingredient_map(
+    ingredient_names: list[str], tenant_id: str | None = None
+) -> dict[str, dict[str, Any]]:
+    lowered_names = list(dict.fromkeys(name.lower() for name in ingredient_names))
+    targets = catalog_targets(lowered_names, alias_index.current())
+    ingredient_map: dict[str, dict[str, Any]] = {}
+    if tenant_id:
+        ingredient_map, lowered_names = _apply_tenant_overrides(
+            targets, get_tenant_overrides(tenant_id)
+        )
+        if not lowered_names:
+            return ingredient_map
+
+    lookup_names = list(dict.fromkeys(targets[name] for name in lowered_names))
+    with get_catalog_connection() as connection:
+        rows = connection.execute(
+            _ingredient_lookup_query(len(lookup_names)), lookup_names
+        ).fetchall()
+
+    _add_catalog_rows(ingredient_map, targets, lowered_names, rows)
+    unresolved = [name for name in lowered_names if name not in ingredient_map]
+    if unresolved:
+        ingredient_map.update(_fetch_composites(unresolved, tenant_id))
+    return ingredient_map
+
+
+@traced("fetch_ingredient_map")
+async def _fetch_ingredient_map_async(
+    ingredient_names: list[str], tenant_id: str | None = None
+) -> dict[str, dict[str, Any]]:
+    lowered_names = list(dict.fromkeys(name.lower() for name in ingredient_names))
+    # The version check, and the rebuild after a catalog change, read SQLite;
+    # they run on the reader thread, never on the event loop.
+    aliases = await async_reader.call(alias_index.current)
+    targets = catalog_targets(lowered_names, aliases)
+    ingredient_map: dict[str, dict[str, Any]] = {}
+    if tenant_id:
+        ingredient_map, lowered_names = _apply_tenant_overrides(
+            targets, await get_tenant_overrides_async(tenant_id)
+        )
+        if not lowered_names:
+            return ingredient_map
 
-    missing = [name for name in ingredient_names if name.lower() not in ingredient_map]
-    if missing:
-        raise IngredientNotFoundError(sorted(set(missing)))
+    lookup_names = list(dict.fromkeys(targets[name] for name in lowered_names))
+    rows = await async_reader.fetchall(
+        _ingredient_lookup_query(len(lookup_names)), lookup_names
+    )
+    _add_catalog_rows(ingredient_map, targets, lowered_names, rows)
+    unresolved = [name for name in lowered_names if name not in ingredient_map]
+    if unresolved:
+        ingredient_map.update(
+            await asyncio.to_thread(_fetch_composites, unresolved, tenant_id)
+        )
+    return ingredient_map
 
-    totals = {field: 0.0 for field in NUTRIENT_FIELDS}
-    total_weight = 0.0
-    ingredient_contributions: list[dict[str, Any]] = []
 
-    for item in recipe.ingredients:
-        key = item.name.strip().lower()
-        per_100g_values = ingredient_map[key]
-        quantity_factor = item.quantity_g / 100.0
-        total_weight += item.quantity_g
+@traced("build_contribution_breakdown")
+def _build_contribution_breakdown(
+    aggregate: _RecipeAggregate,
+    contributor_rankings: dict[str, list[tuple[str, float]]],
+    servings: int,
+    limit: int,
+) -> dict[str, Any]:
+    totals = aggregate.totals
 
-        nutrient_contribution = {}
-        for field in NUTRIENT_FIELDS:
-            contribution_value = per_100g_values[field] * quantity_factor
-            totals[field] += contribution_value
-            nutrient_contribution[field] = contribution_value
+    def share(value: float, total: float) -> float:
+        if total <= 0:
+            return 0.0
+        return round((value / total) * 100.0, 2)
 
-        ingredient_contributions.append(
+    ingredients = [
+        {
+            "name": name,
+            "quantity_g": quantity_g,
+            "per_serving": {
+                field: round(value / servings, 2)
+                for field, value in zip(NUTRIENT_FIELDS, contribution)
+            },
+            "share_percent": {
+                field: share(value, total)
+                for field, value, total in zip(NUTRIENT_FIELDS, contribution, totals)
+            },
+        }
+        for name, quantity_g, contribution in zip(
+            aggregate.names, aggregate.quantities, aggregate.contributions
+        )
+    ]
+    top_contributors = {
+        field: [
             {
-                "name": item.name.strip(),
-                "quantity_g": item.quantity_g,
-                "nutrients": nutrient_contribution,
+                "name": name,
+                "value": round(value, 2),
+                "unit": NUTRIENT_UNITS[field],
+                "share_percent": share(value * servings, total),
             }
+            for name, value in contributor_rankings[field][:limit]
+        ]
+        for field, total in zip(NUTRIENT_FIELDS, totals)
+    }
+    return {"ingredients": ingredients, "top_contributors": top_contributors}
+
+
+def _composite_profile(
+    recipe_name: str,
+    lines: list[tuple[str, float]],
+    ingredient_map: dict[str, dict[str, Any]],
+) -> dict[str, Any]:
+    total_weight = sum(quantity_g for _, quantity_g in lines)
+    profile: dict[str, Any] = {"name": recipe_name}
+    for field in NUTRIENT_FIELDS:
+        profile[field] = (
+            sum(ingredient_map[name.lower()][field] * quantity_g for name, quantity_g in lines)
+            / total_weight
+        )
+    # Leaf ingredient names, so allergen checks still see what a base contains.
+    components: list[str] = []
+    for name, _ in lines:
+        row = ingredient_map[name.lower()]
+        components.extend(row.get("components") or [row["name"]])
+    profile["components"] = list(dict.fromkeys(components))
+    return profile
+
+
+def _evaluate_composite(
+    connection: sqlite3.Connection,
+    name: str,
+    tenant_id: str | None,
+    memo: dict[tuple[str, str], Any],
+    stack: tuple[str, ...],
+) -> dict[str, Any] | Exception | None:
+    # Depth-first walk of the recipe DAG. A node is memoized only once it is
+    # fully evaluated, so meeting a name that is still on the stack is a cycle
+    # (and every node that reaches one is itself on a cycle).
+    name_key = normalize_alias(name)
+    key = (tenant_id or "", name_key)
+    if key in memo:
+        return memo[key]
+    if name_key in stack:
+        return RecipeCycleError([*stack, name_key])
+    rows = connection.execute(COMPOSITE_LINES_QUERY, (name_key, tenant_id or "")).fetchall()
+    if not rows:
+        memo[key] = None
+        return None
+
+    recipe_name = rows[0]["recipe_name"]
+    lines = [(row["name"], row["quantity_g"]) for row in rows]
+    child_map, child_errors = _read_ingredient_map(
+        connection, [line_name for line_name, _ in lines], tenant_id, memo, (*stack, name_key)
+    )
+    missing = [line_name for line_name, _ in lines if line_name.lower() not in child_map]
+    if child_errors:
+        outcome = next(iter(child_errors.values()))
+    elif missing:
+        outcome = IngredientNotFoundError(
+            sorted({f"{line_name} (in {recipe_name})" for line_name in missing})
+        )
+    else:
+        outcome = _composite_profile(recipe_name, lines, child_map)
+    memo[key] = outcome
+    return outcome
+
+
+def _resolve_composites(
+    connection: sqlite3.Connection,
+    lowered_names: list[str],
+    tenant_id: str | None,
+    memo: dict[tuple[str, str], Any],
+    stack: tuple[str, ...] = (),
+) -> tuple[dict[str, dict[str, Any]], dict[str, Exception]]:
+    resolved: dict[str, dict[str, Any]] = {}
+    errors: dict[str, Exception] = {}
+    for name in lowered_names:
+        outcome = _evaluate_composite(connection, name, tenant_id, memo, stack)
+        if isinstance(outcome, Exception):
+            errors[name] = outcome
+        elif outcome is not None:
+            resolved[name] = outcome
+    return resolved, errors
+
+
+def _fetch_composites(lowered_names: list[str], tenant_id: str | None) -> dict[str, dict[str, Any]]:
+    with get_connection() as connection:
+        # One read transaction, so the version and the rows it covers agree.
+        connection.execute("BEGIN")
+        memo = composite_cache.view(
+            tuple(read_catalog_version(connection, scope) for scope in DATA_SCOPES)
+        )
+        resolved, errors = _resolve_composites(connection, lowered_names, tenant_id, memo)
+    if errors:
+        raise next(iter(errors.values()))
+    return resolved
+
+
+def read_ingredient_map(
+    connection: sqlite3.Connection,
+    ingredient_names: list[str],
+    tenant_id: str | None = None,
+    memo: dict[tuple[str, str], Any] | None = None,
+    recipe_name: str | None = None,
+) -> tuple[dict[str, dict[str, Any]], dict[str, Exception]]:
+    # Bypasses the tenant cache, the snapshot and the shared composite cache so
+    # a caller holding an open write transaction sees its own uncommitted rows.
+    # Composites that cannot be evaluated are returned as errors by name;
+    # ``recipe_name`` seeds cycle detection when saving that recipe.
+    stack = (normalize_alias(recipe_name),) if recipe_name else ()
+    return _read_ingredient_map(
+        connection, ingredient_names, tenant_id, {} if memo is None else memo, stack
+    )
+
+
+def _read_ingredient_map(
+    connection: sqlite3.Connection,
+    ingredient_names: list[str],
+    tenant_id: str | None,
+    memo: dict[tuple[str, str], Any],
+    stack: tuple[str, ...],
+) -> tuple[dict[str, dict[str, Any]], dict[str, Exception]]:
+    lowered_names = list(dict.fromkeys(name.lower() for name in ingredient_names))
+    targets = catalog_targets(lowered_names, aliases_from(connection))
+    ingredient_map: dict[str, dict[str, Any]] = {}
+    if tenant_id:
+        rows = connection.execute(TENANT_OVERRIDES_QUERY, (tenant_id,)).fetchall()
+        ingredient_map, lowered_names = _apply_tenant_overrides(
+            targets, overrides_by_name([dict(row) for row in rows])
+        )
+    for start in range(0, len(lowered_names), INGREDIENT_LOOKUP_CHUNK):
+        chunk = lowered_names[start : start + INGREDIENT_LOOKUP_CHUNK]
+        lookup_names = list(dict.fromkeys(targets[name] for name in chunk))
+        rows = connection.execute(
+            _ingredient_lookup_query(len(lookup_names)), lookup_names
+        ).fetchall()
+        _add_catalog_rows(ingredient_map, targets, chunk, rows)
+    unresolved = [name for name in lowered_names if name not in ingredient_map]
+    if not unresolved:
+        return ingredient_map, {}
+    resolved, errors = _resolve_composites(connection, unresolved, tenant_id, memo, stack)
+    ingredient_map.update(resolved)
+    return ingredient_map, errors
+
+
+def fetch_recipes_ingredient_map(
+    recipes: list[RecipeRequest], tenant_id: str | None = None
+) -> dict[str, dict[str, Any]]:
+    # One lookup per chunk of distinct names instead of one per recipe; the
+    # chunk size stays well under SQLite's bound-parameter limit.
+    names = list(
+        dict.fromkeys(
+            item.name.strip().lower() for recipe in recipes for item in recipe.ingredients
+        )
+    )
+    ingredient_map: dict[str, dict[str, Any]] = {}
+    for start in range(0, len(names), INGREDIENT_LOOKUP_CHUNK):
+        ingredient_map.update(
+            _fetch_ingredient_map(
+                names[start : start + INGREDIENT_LOOKUP_CHUNK], tenant_id=tenant_id
+            )
         )
+    missing = sorted(
+        {
+            item.name.strip()
+            for recipe in recipes
+            for item in recipe.ingredients
+            if item.name.strip().lower() not in ingredient_map
+        }
+    )
+    if missing:
+        raise IngredientNotFoundError(missing)
+    return ingredient_map
 
-    if total_weight <= 0:
-        raise ValueError("Total recipe weight must be greater than zero.")
 
-    per_100g = {
-        field: (totals[field] / total_weight) * 100.0 for field in NUTRIENT_FIELDS
+@traced("find_substitutes")
+def find_substitutes(
+    ingredient: str,
+    k: int,
+    avoid_allergen: str | None = None,
+    reduce: str | None = None,
+    tenant_id: str | None = None,
+) -> dict[str, Any]:
+    name = ingredient.strip()
+    lowered = name.lower()
+    per_100g = _fetch_ingredient_map([name], tenant_id=tenant_id).get(lowered)
+    if per_100g is None:
+        raise IngredientNotFoundError([name])
+    exclude = {lowered}
+    rule = ALLERGENS[avoid_allergen.strip().lower()] if avoid_allergen else None
+    if rule is not None:
+        exclude |= rule["ingredients"]
+    return {
+        "ingredient": name,
+        "avoid_allergen": rule["allergen"] if rule is not None else None,
+        "reduce": reduce,
+        "substitutes": substitution_index.substitutes(
+            per_100g, k, exclude=frozenset(exclude), reduce=reduce
+        ),
     }
-    per_serving = {field: totals[field] / recipe.servings for field in NUTRIENT_FIELDS}
+
+
+def calculate_nutrition(
+    recipe: RecipeRequest,
+    include_contributions: bool = False,
+    contribution_limit: int = TOP_CONTRIBUTOR_LIMIT,
+    tenant_id: str | None = None,
+) -> dict[str, Any]:
+    ingredient_map = _fetch_ingredient_map(
+        [item.name.strip() for item in recipe.ingredients], tenant_id=tenant_id
+    )
+    return compute_nutrition(
+        recipe,
+        ingredient_map,
+        include_contributions=include_contributions,
+        contribution_limit=contribution_limit,
+    )
+
+
+async def calculate_nutrition_async(
+    recipe: RecipeRequest,
+    include_contributions: bool = False,
+    contribution_limit: int = TOP_CONTRIBUTOR_LIMIT,
+    tenant_id: str | None = None,
+) -> dict[str, Any]:
+    ingredient_map = await _fetch_ingredient_map_async(
+        [item.name.strip() for item in recipe.ingredients], tenant_id=tenant_id
+    )
+    return compute_nutrition(
+        recipe,
+        ingredient_map,
+        include_contributions=include_contributions,
+        contribution_limit=contribution_limit,
+    )
+
+
+def compute_nutrition(
+    recipe: RecipeRequest,
+    ingredient_map: dict[str, dict[str, Any]],
+    include_contributions: bool = False,
+    contribution_limit: int = TOP_CONTRIBUTOR_LIMIT,
+) -> dict[str, Any]:
+    ingredient_names = [item.name.strip() for item in recipe.ingredients]
+    missing = [name for name in ingredient_names if name.lower() not in ingredient_map]
+    if missing:
+        raise IngredientNotFoundError(sorted(set(missing)))
+
+    with span("aggregate_nutrients", ingredients=len(recipe.ingredients)):
+        aggregate = _RecipeAggregate(recipe, ingredient_map)
+        total_weight = aggregate.total_weight
+        if total_weight <= 0:
+            raise ValueError("Total recipe weight must be greater than zero.")
+
+        contributor_rankings = aggregate.rankings(
+            max(TOP_CONTRIBUTOR_LIMIT, contribution_limit), recipe.servings
+        )
+        per_100g = [(total / total_weight) * 100.0 for total in aggregate.totals]
+        per_serving = _nutrient_dict(total / recipe.servings for total in aggregate.totals)
+
     health_bars = _build_health_bars(per_serving=per_serving)
+    # Rule checks match catalog names, so an alias counts as the ingredient
+    # it stands for; other names keep the spelling the recipe used.
+    catalog_names = [
+        _catalog_name(name, ingredient_map[name.lower()]) for name in ingredient_names
+    ]
     fssai_suggestions = _build_fssai_suggestions(
         per_serving=per_serving,
-        ingredient_contributions=ingredient_contributions,
-        servings=recipe.servings,
-        ingredient_names=ingredient_names,
+        contributor_rankings=contributor_rankings,
+        ingredient_map=ingredient_map,
+        ingredient_names=catalog_names,
+    )
+    allergy_alerts = _build_allergy_alerts(
+        ingredient_names=[
+            component
+            for name, catalog_name in zip(ingredient_names, catalog_names)
+            for component in ingredient_map[name.lower()].get("components")
+            or [catalog_name]
+        ],
+        ingredient_map=ingredient_map,
     )
-    allergy_alerts = _build_allergy_alerts(ingredient_names=ingredient_names)
     fssai_compliance = _build_fssai_compliance(
         per_serving=per_serving,
         total_weight=total_weight,
         allergy_alerts=allergy_alerts,
     )
 
-    return {
-        "per_100g": _round_nutrients(per_100g),
+    result = {
+        "per_100g": _nutrient_dict(per_100g, rounded=True),
         "per_serving": _round_nutrients(per_serving),
         "total_weight": round(total_weight, 2),
         "health_bars": health_bars,
@@ -588,3 +1077,11 @@ def calculate_nutrition(recipe: RecipeRequest) -> dict[str, Any]:
         "allergy_alerts": allergy_alerts,
         "fssai_compliance": fssai_compliance,
     }
+    if include_contributions:
+        result["contributions"] = _build_contribution_breakdown(
+            aggregate=aggregate,
+            contributor_rankings=contributor_rankings,
+            servings=recipe.servings,
+            limit=contribution_limit,
+        )
+    return result
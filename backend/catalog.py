@@ -0,0 +1,229 @@
+import os
+import secrets
+import sqlite3
+from typing import Any
+
+from aliases import ALIASES_QUERY, normalize_alias
+from calculator import IngredientNotFoundError
+from database import catalog_cache_version, catalog_write, get_connection
+from recipes import recompute_recipes_for_ingredients
+from tenants import INGREDIENT_COLUMNS
+
+ADMIN_TOKEN = os.getenv("NUTRITRACK_ADMIN_TOKEN", "")
+
+INGREDIENT_UPSERT = """
+    INSERT INTO ingredients (
+        name,
+        energy_kcal,
+        protein_g,
+        carbs_g,
+        sugar_g,
+        fat_g,
+        saturated_fat_g,
+        sodium_mg
+    ) VALUES (
+        :name,
+        :energy_kcal,
+        :protein_g,
+        :carbs_g,
+        :sugar_g,
+        :fat_g,
+        :saturated_fat_g,
+        :sodium_mg
+    )
+    ON CONFLICT(name) DO UPDATE SET
+        energy_kcal = excluded.energy_kcal,
+        protein_g = excluded.protein_g,
+        carbs_g = excluded.carbs_g,
+        sugar_g = excluded.sugar_g,
+        fat_g = excluded.fat_g,
+        saturated_fat_g = excluded.saturated_fat_g,
+        sodium_mg = excluded.sodium_mg
+"""
+
+ALIAS_UPSERT = """
+    INSERT INTO ingredient_aliases (alias, ingredient_id) VALUES (?, ?)
+    ON CONFLICT(alias) DO UPDATE SET ingredient_id = excluded.ingredient_id
+"""
+
+
+def admin_enabled() -> bool:
+    return bool(ADMIN_TOKEN)
+
+
+def is_admin_token(token: str | None) -> bool:
+    return token is not None and secrets.compare_digest(
+        token.encode(), ADMIN_TOKEN.encode()
+    )
+
+
+def write_ingredients(
+    connection: sqlite3.Connection,
+    ingredients: list[dict[str, Any]],
+    replace: bool = False,
+) -> dict[str, int]:
+    """Upserts base catalog rows inside an open catalog write.
+
+    With ``replace``, base ingredients missing from ``ingredients`` are
+    deleted in the same transaction. Only rows whose values actually change,
+    and deleted rows, trigger recomputation of the saved recipes using them.
+    """
+    current = {
+        row[0].lower(): (row[0], tuple(row[1:]))
+        for row in connection.execute(
+            f"SELECT {', '.join(INGREDIENT_COLUMNS)} FROM ingredients"
+        )
+    }
+    changed_rows = [
+        item
+        for item in ingredients
+        if current.get(item["name"].lower(), (None, None))[1]
+        != tuple(item[column] for column in INGREDIENT_COLUMNS[1:])
+    ]
+    changed = [item["name"] for item in changed_rows]
+    removed: list[str] = []
+    if replace:
+        kept = {item["name"].lower() for item in ingredients}
+        removed = [name for lowered, (name, _) in current.items() if lowered not in kept]
+        connection.executemany(
+            "DELETE FROM ingredients WHERE name = ?", [(name,) for name in removed]
+        )
+    # Unchanged rows are not rewritten, so a write that repeats the current
+    # values changes nothing and keeps the catalog version.
+    connection.executemany(INGREDIENT_UPSERT, changed_rows)
+    # A catalog name always wins over an alias spelled the same way.
+    shadowed = _delete_aliases(
+        connection, [normalize_alias(item["name"]) for item in ingredients]
+    )
+    dropped = _drop_dangling_aliases(connection) if removed else []
+    stale = changed + removed + shadowed + dropped
+    recomputed = recompute_recipes_for_ingredients(connection, stale) if stale else 0
+    return {
+        "upserted": len(ingredients),
+        "changed": len(changed),
+        "deleted": len(removed),
+        "recomputed_recipes": recomputed,
+    }
+
+
+def upsert_ingredients(
+    ingredients: list[dict[str, Any]], replace: bool = False
+) -> dict[str, int]:
+    with catalog_write() as connection:
+        # Take the write lock before reading current values, so a concurrent
+        # write cannot land between the comparison and the upsert.
+        connection.execute("BEGIN IMMEDIATE")
+        result = write_ingredients(connection, ingredients, replace=replace)
+    # catalog_write has swapped this process's snapshot and expired its
+    # version, so this is the version the write produced.
+    return {**result, "version": catalog_cache_version()}
+
+
+def delete_ingredient(name: str) -> dict[str, int] | None:
+    with catalog_write() as connection:
+        cursor = connection.execute("DELETE FROM ingredients WHERE name = ?", (name.strip(),))
+        if not cursor.rowcount:
+            return None
+        dropped = _drop_dangling_aliases(connection)
+        recomputed = recompute_recipes_for_ingredients(connection, [name, *dropped])
+    return {
+        "recomputed_recipes": recomputed,
+        "deleted_aliases": len(dropped),
+        "version": catalog_cache_version(),
+    }
+
+
+def list_ingredients() -> list[dict[str, Any]]:
+    with get_connection() as connection:
+        rows = connection.execute(
+            f"SELECT {', '.join(INGREDIENT_COLUMNS)} FROM ingredients ORDER BY name"
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def _delete_aliases(connection: sqlite3.Connection, aliases: list[str]) -> list[str]:
+    deleted: list[str] = []
+    for alias in aliases:
+        deleted += [
+            row[0]
+            for row in connection.execute(
+                "DELETE FROM ingredient_aliases WHERE alias = ? RETURNING alias", (alias,)
+            )
+        ]
+    return deleted
+
+
+def _drop_dangling_aliases(connection: sqlite3.Connection) -> list[str]:
+    return [
+        row[0]
+        for row in connection.execute(
+            """
+            DELETE FROM ingredient_aliases
+            WHERE ingredient_id NOT IN (SELECT id FROM ingredients)
+            RETURNING alias
+            """
+        )
+    ]
+
+
+def write_aliases(
+    connection: sqlite3.Connection, aliases: dict[str, str]
+) -> dict[str, int]:
+    """Points each alias at a base ingredient inside an open catalog write.
+
+    Aliases are stored normalized. An alias spelled like a catalog ingredient
+    is rejected with ``ValueError``; an unknown target raises
+    ``IngredientNotFoundError``. Only new or re-pointed aliases are written,
+    and saved recipes that use them are recomputed.
+    """
+    ids = {
+        normalize_alias(name): ingredient_id
+        for ingredient_id, name in connection.execute("SELECT id, name FROM ingredients")
+    }
+    rows: dict[str, int] = {}
+    missing: list[str] = []
+    for alias, ingredient in aliases.items():
+        key = normalize_alias(alias)
+        if not key:
+            raise ValueError("Aliases must not be blank.")
+        if key in ids:
+            raise ValueError(f"Alias {alias.strip()!r} is already a catalog ingredient.")
+        target = ids.get(normalize_alias(ingredient))
+        if target is None:
+            missing.append(ingredient.strip())
+            continue
+        rows[key] = target
+    if missing:
+        raise IngredientNotFoundError(list(dict.fromkeys(missing)))
+
+    current = dict(connection.execute("SELECT alias, ingredient_id FROM ingredient_aliases"))
+    changed = [alias for alias, target in rows.items() if current.get(alias) != target]
+    connection.executemany(ALIAS_UPSERT, [(alias, rows[alias]) for alias in changed])
+    recomputed = recompute_recipes_for_ingredients(connection, changed) if changed else 0
+    return {
+        "upserted": len(rows),
+        "changed": len(changed),
+        "recomputed_recipes": recomputed,
+    }
+
+
+def upsert_aliases(aliases: dict[str, str]) -> dict[str, int]:
+    with catalog_write() as connection:
+        connection.execute("BEGIN IMMEDIATE")
+        result = write_aliases(connection, aliases)
+    return {**result, "version": catalog_cache_version()}
+
+
+def delete_alias(alias: str) -> dict[str, int] | None:
+    with catalog_write() as connection:
+        deleted = _delete_aliases(connection, [normalize_alias(alias)])
+        if not deleted:
+            return None
+        recomputed = recompute_recipes_for_ingredients(connection, deleted)
+    return {"recomputed_recipes": recomputed, "version": catalog_cache_version()}
+
+
+def list_aliases() -> list[dict[str, str]]:
+    with get_connection() as connection:
+        rows = connection.execute(f"{ALIASES_QUERY} ORDER BY ingredient_aliases.alias").fetchall()
+    return [{"alias": alias, "ingredient": name} for alias, name in rows]
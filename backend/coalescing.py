@@ -0,0 +1,125 @@
+import threading
+from collections.abc import Callable, Hashable
+from typing import Any
+
+from calculator import TOP_CONTRIBUTOR_LIMIT, calculate_nutrition
+from label_generator import generate_nutrition_label_pdf
+from models import RecipeRequest
+
+
+class _InFlightCall:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Runs one computation per key at a time; concurrent callers share its outcome.
+
+    Nothing is cached after the leader finishes, so a later identical request
+    recomputes against the current catalog.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._calls: dict[Hashable, _InFlightCall] = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+        self.max_waiters = 0
+
+    def do(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _InFlightCall()
+                self._calls[key] = call
+                self.executed += 1
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+                self.max_waiters = max(self.max_waiters, call.waiters)
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = compute()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            requests = self.executed + self.coalesced
+            return {
+                "requests": requests,
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "coalesced_ratio": round(self.coalesced / requests, 4) if requests else 0.0,
+                "in_flight": len(self._calls),
+                "max_waiters": self.max_waiters,
+            }
+
+
+def recipe_lines(recipe: RecipeRequest) -> tuple[tuple[str, float], ...]:
+    # Responses echo ingredient names as sent (suggestions, allergy alerts,
+    # substitutions) and break ties by line order, so only identical lines in
+    # the same order can share a result. Names arrive already stripped.
+    return tuple((item.name, item.quantity_g) for item in recipe.ingredients)
+
+
+calculation_flight = SingleFlight("calculate")
+label_flight = SingleFlight("generate-label")
+
+
+def coalesced_calculation(
+    recipe: RecipeRequest,
+    tenant_id: str | None = None,
+    include_contributions: bool = False,
+    contribution_limit: int = TOP_CONTRIBUTOR_LIMIT,
+) -> dict[str, Any]:
+    return calculation_flight.do(
+        (
+            tenant_id,
+            recipe.servings,
+            include_contributions,
+            contribution_limit,
+            recipe_lines(recipe),
+        ),
+        lambda: calculate_nutrition(
+            recipe,
+            include_contributions=include_contributions,
+            contribution_limit=contribution_limit,
+            tenant_id=tenant_id,
+        ),
+    )
+
+
+def coalesced_label_pdf(
+    recipe: RecipeRequest, result: dict[str, Any], tenant_id: str | None = None
+) -> bytes:
+    # The label prints the recipe name, so it is part of the key.
+    return label_flight.do(
+        (tenant_id, recipe.recipe_name, recipe.servings, recipe_lines(recipe)),
+        lambda: generate_nutrition_label_pdf(
+            recipe_name=recipe.recipe_name,
+            servings=recipe.servings,
+            total_weight=result["total_weight"],
+            per_100g=result["per_100g"],
+            per_serving=result["per_serving"],
+        ),
+    )
@@ -0,0 +1,58 @@
+import os
+import threading
+from typing import Any
+
+
+COMPOSITE_CACHE_SIZE = int(os.getenv("NUTRITRACK_COMPOSITE_CACHE_SIZE", "4096"))
+
+# A tenant's own saved recipe shadows a global one with the same name. Names
+# are matched on the normalize_alias key, like the reverse index.
+COMPOSITE_LINES_QUERY = """
+    SELECT recipes.name AS recipe_name, recipe_ingredients.name, recipe_ingredients.quantity_g
+    FROM recipes
+    JOIN recipe_ingredients ON recipe_ingredients.recipe_id = recipes.id
+    WHERE recipes.id = (
+        SELECT id FROM recipes
+        WHERE name_key = ? AND tenant_id IN (?, '')
+        ORDER BY tenant_id = ''
+        LIMIT 1
+    )
+    ORDER BY recipe_ingredients.position
+"""
+
+
+class CompositeCache:
+    """Per-100g profiles of saved recipes used as ingredients, for one data version.
+
+    A composite depends on saved recipes, tenant libraries and the base
+    catalog, so the cache is keyed on the versions of all three and any write
+    to them drops every entry at once. Within a version each composite is
+    evaluated once however many products use it.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max(1, max_size)
+        self.version: tuple[int, ...] | None = None
+        self.resets = 0
+        self._entries: dict[tuple[str, str], dict[str, Any] | None] = {}
+        self._lock = threading.Lock()
+
+    def view(self, version: tuple[int, ...]) -> dict[tuple[str, str], dict[str, Any] | None]:
+        with self._lock:
+            if version != self.version or len(self._entries) >= self.max_size:
+                self.version = version
+                self._entries = {}
+                self.resets += 1
+            return self._entries
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "version": self.version,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "resets": self.resets,
+            }
+
+
+composite_cache = CompositeCache(max_size=COMPOSITE_CACHE_SIZE)
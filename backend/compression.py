@@ -0,0 +1,356 @@
+import hashlib
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any
+
+from anyio.to_thread import run_sync
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSION_ENABLED = os.getenv("NUTRITRACK_COMPRESSION", "1") == "1"
+COMPRESSION_MIN_BYTES = int(os.getenv("NUTRITRACK_COMPRESSION_MIN_BYTES", "1024"))
+COMPRESSION_CACHE_BYTES = int(
+    os.getenv("NUTRITRACK_COMPRESSION_CACHE_BYTES", str(32 * 1024 * 1024))
+)
+# Bodies up to this size with a known length are compressed whole (and
+# cached); larger or unsized ones are compressed chunk by chunk as they stream.
+COMPRESSION_BUFFER_BYTES = 1024 * 1024
+# Cache misses this large are compressed off the event loop.
+COMPRESSION_OFFLOAD_BYTES = 64 * 1024
+
+# Text formats only: PDF, PNG and job archives are already compressed.
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/x-ndjson",
+    "application/xml",
+    "image/svg+xml",
+)
+STATIC_SUFFIXES = (".js", ".css", ".html", ".svg", ".json", ".map", ".txt", ".webmanifest")
+
+# Levels per route profile. API responses are compressed per request, so they
+# use fast levels; SPA assets are the same bytes every time and are served
+# from the cache, so they pay for the best ratio once. Streamed bodies are
+# never cached, so they always use the dynamic levels.
+COMPRESSION_LEVELS = {
+    "dynamic": {"zstd": 3, "br": 4, "gzip": 5},
+    "static": {"zstd": 19, "br": 11, "gzip": 9},
+}
+
+
+def available_encodings() -> tuple[str, ...]:
+    """Supported codings in server preference order."""
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.append("gzip")
+    return tuple(encodings)
+
+
+ENCODINGS = available_encodings()
+
+
+def negotiate_encoding(accept_encoding: str) -> str | None:
+    """The best coding the client accepts, by q-value, then server preference."""
+    weights: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        weights[coding] = quality
+    best: str | None = None
+    best_quality = 0.0
+    for coding in ENCODINGS:
+        quality = weights.get(coding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def route_profile(path: str) -> str:
+    return "static" if path.endswith(STATIC_SUFFIXES) else "dynamic"
+
+
+def compress(body: bytes, encoding: str, level: int) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress(body)
+    if encoding == "br":
+        return brotli.compress(body, quality=level)
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(body) + compressor.flush()
+
+
+class StreamCompressor:
+    """Incremental compressor that flushes after every chunk, so a streamed
+    response reaches the client as it is produced."""
+
+    def __init__(self, encoding: str, level: int) -> None:
+        self.encoding = encoding
+        if encoding == "zstd":
+            self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        elif encoding == "br":
+            self._compressor = brotli.Compressor(quality=level)
+        else:
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == "zstd":
+            return self._compressor.compress(data) + self._compressor.flush(
+                zstandard.COMPRESSOBJ_FLUSH_BLOCK
+            )
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+class CompressedBodyCache:
+    """LRU of compressed bodies keyed by coding, level and a digest of the
+    uncompressed bytes, bounded by total compressed size.
+
+    Responses that repeat byte for byte (coalesced or cached calculations,
+    rendered labels, the SPA bundle) are compressed once per coding.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max(0, max_bytes)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple[str, int, bytes], bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def compress(self, body: bytes, encoding: str, level: int) -> bytes:
+        key = (encoding, level, hashlib.blake2b(body, digest_size=16).digest())
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+        if len(body) >= COMPRESSION_OFFLOAD_BYTES:
+            compressed = await run_sync(compress, body, encoding, level)
+        else:
+            compressed = compress(body, encoding, level)
+        if len(compressed) <= self.max_bytes:
+            with self._lock:
+                if key not in self._entries:
+                    self._entries[key] = compressed
+                    self.bytes += len(compressed)
+                while self.bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self.bytes -= len(evicted)
+        return compressed
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+compressed_body_cache = CompressedBodyCache(COMPRESSION_CACHE_BYTES)
+
+
+def _is_compressible(headers: list[tuple[bytes, bytes]]) -> bool:
+    content_type = b""
+    for name, value in headers:
+        if name == b"content-encoding":
+            return False
+        if name == b"content-type":
+            content_type = value
+    return content_type.decode("latin-1").lower().startswith(COMPRESSIBLE_TYPES)
+
+
+def _weak_etag(headers: list[tuple[bytes, bytes]]) -> list[tuple[bytes, bytes]]:
+    return [
+        (name, b"W/" + value if name == b"etag" and not value.startswith(b"W/") else value)
+        for name, value in headers
+    ]
+
+
+def _compressed_headers(
+    headers: list[tuple[bytes, bytes]], encoding: str, length: int | None
+) -> list[tuple[bytes, bytes]]:
+    result: list[tuple[bytes, bytes]] = []
+    vary = b"Accept-Encoding"
+    # The compressed bytes differ, so the validator becomes weak.
+    for name, value in _weak_etag(headers):
+        if name in (b"content-length", b"accept-ranges"):
+            continue
+        if name == b"vary":
+            vary = value + b", Accept-Encoding"
+            continue
+        result.append((name, value))
+    result.append((b"vary", vary))
+    result.append((b"content-encoding", encoding.encode()))
+    if length is not None:
+        result.append((b"content-length", str(length).encode()))
+    return result
+
+
+def _content_length(headers: list[tuple[bytes, bytes]]) -> int | None:
+    for name, value in headers:
+        if name == b"content-length":
+            return int(value)
+    return None
+
+
+def _strip_weak_validators(scope: dict) -> dict:
+    # If-None-Match compares weakly, so the W/ this middleware adds to ETags
+    # is dropped again before the routes compare them with their own.
+    headers = scope["headers"]
+    if not any(name == b"if-none-match" and b"W/" in value for name, value in headers):
+        return scope
+    return {
+        **scope,
+        "headers": [
+            (name, value.replace(b"W/", b"") if name == b"if-none-match" else value)
+            for name, value in headers
+        ],
+    }
+
+
+class CompressionMiddleware:
+    """Negotiated zstd/brotli/gzip response compression.
+
+    Only text responses of at least ``min_bytes`` are compressed; range
+    requests, partial and empty responses pass through untouched.
+    """
+
+    def __init__(self, app, cache: CompressedBodyCache, min_bytes: int) -> None:
+        self.app = app
+        self.cache = cache
+        self.min_bytes = min_bytes
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = range_request = None
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+            elif name == b"range":
+                range_request = value
+        encoding = negotiate_encoding(accept_encoding) if accept_encoding else None
+        if encoding is None or range_request is not None or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        level = COMPRESSION_LEVELS[route_profile(scope["path"])][encoding]
+        responder = _CompressingSend(send, self.cache, self.min_bytes, encoding, level)
+        await self.app(_strip_weak_validators(scope), receive, responder)
+
+
+class _CompressingSend:
+    def __init__(
+        self, send, cache: CompressedBodyCache, min_bytes: int, encoding: str, level: int
+    ) -> None:
+        self.send = send
+        self.cache = cache
+        self.min_bytes = min_bytes
+        self.encoding = encoding
+        self.level = level
+        self.start: dict | None = None
+        self.mode = "pending"
+        self.buffer: list[bytes] = []
+        self.stream: StreamCompressor | None = None
+
+    async def __call__(self, message: dict) -> None:
+        if message["type"] == "http.response.start":
+            await self._on_start(message)
+            return
+        if message["type"] != "http.response.body" or self.mode == "passthrough":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.mode == "pending":
+            if not more_body and len(body) < self.min_bytes:
+                await self._passthrough(message)
+                return
+            self.mode = "stream"
+        if self.mode == "buffer":
+            self.buffer.append(body)
+            if not more_body:
+                compressed = await self.cache.compress(
+                    b"".join(self.buffer), self.encoding, self.level
+                )
+                await self._start(len(compressed))
+                await self.send({"type": "http.response.body", "body": compressed})
+            return
+
+        if self.stream is None:
+            # Recompressed on every request and on the event loop, so even a
+            # large static asset gets the fast level here.
+            self.stream = StreamCompressor(
+                self.encoding, COMPRESSION_LEVELS["dynamic"][self.encoding]
+            )
+            await self._start(None)
+        data = self.stream.chunk(body) if body else b""
+        if not more_body:
+            data += self.stream.finish()
+        if data or not more_body:
+            await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+    async def _on_start(self, message: dict) -> None:
+        self.start = message
+        headers = list(message.get("headers", []))
+        length = _content_length(headers)
+        if message["status"] == 304:
+            # Matches the weak validator the client revalidated with.
+            message = {**message, "headers": _weak_etag(headers)}
+        if (
+            not 200 <= message["status"] < 300
+            or message["status"] in (204, 206)
+            or not _is_compressible(headers)
+            or (length is not None and length < self.min_bytes)
+        ):
+            self.mode = "passthrough"
+            await self.send(message)
+        elif length is not None and length <= COMPRESSION_BUFFER_BYTES:
+            self.mode = "buffer"
+        # Unsized responses wait for their first chunk: a small complete body
+        # is sent as is, anything else is compressed as a stream.
+
+    async def _start(self, length: int | None) -> None:
+        headers = _compressed_headers(
+            list(self.start.get("headers", [])), self.encoding, length
+        )
+        await self.send({**self.start, "headers": headers})
+
+    async def _passthrough(self, message: dict) -> None:
+        self.mode = "passthrough"
+        await self.send(self.start)
+        await self.send(message)
@@ -1,17 +1,270 @@
+import itertools
+import os
 import sqlite3
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
 from pathlib import Path
 
+from query_log import connection_factory
+
 
 BASE_DIR = Path(__file__).resolve().parent
-DB_PATH = BASE_DIR / "nutrition.db"
+DB_PATH = Path(os.getenv("NUTRITRACK_DB_PATH", BASE_DIR / "nutrition.db"))
+CATALOG_SNAPSHOT_ENABLED = os.getenv("NUTRITRACK_CATALOG_SNAPSHOT", "0") == "1"
+SNAPSHOT_CHECK_SECONDS = float(os.getenv("NUTRITRACK_SNAPSHOT_CHECK_SECONDS", "1"))
+CATALOG_TABLES = ("ingredients", "tenant_ingredients", "ingredient_aliases")
+
+# Every write scope has its own version, so a cache is only dropped by writes
+# to the tables it was built from. The base catalog (ingredients and aliases)
+# keeps its version in ``user_version``; the others live in ``data_versions``.
+CATALOG_SCOPE = "catalog"
+TENANTS_SCOPE = "tenants"
+RECIPES_SCOPE = "recipes"
+DATA_SCOPES = (CATALOG_SCOPE, TENANTS_SCOPE, RECIPES_SCOPE)
+
+_catalog_write_listeners: list[Callable[[], None]] = []
+# Shared-cache memory databases are named per process, so every snapshot
+# build in it, from any CatalogSnapshot, needs its own number.
+_snapshot_names = itertools.count()
 
 
 def get_connection() -> sqlite3.Connection:
-    connection = sqlite3.connect(DB_PATH)
+    connection = sqlite3.connect(DB_PATH, factory=connection_factory)
     connection.row_factory = sqlite3.Row
     return connection
 
 
+def read_catalog_version(connection: sqlite3.Connection, scope: str = CATALOG_SCOPE) -> int:
+    if scope == CATALOG_SCOPE:
+        return connection.execute("PRAGMA user_version").fetchone()[0]
+    row = connection.execute(
+        "SELECT version FROM data_versions WHERE scope = ?", (scope,)
+    ).fetchone()
+    return row[0] if row else 0
+
+
+def bump_catalog_version(connection: sqlite3.Connection, scope: str = CATALOG_SCOPE) -> int:
+    # Call after the catalog write and before commit: the pending write holds
+    # the database lock, so concurrent writers cannot read the same version.
+    version = read_catalog_version(connection, scope) + 1
+    if scope == CATALOG_SCOPE:
+        connection.execute(f"PRAGMA user_version = {version}")
+    else:
+        connection.execute(
+            """
+            INSERT INTO data_versions (scope, version) VALUES (?, ?)
+            ON CONFLICT(scope) DO UPDATE SET version = excluded.version
+            """,
+            (scope, version),
+        )
+    return version
+
+
+class CatalogVersion:
+    """The on-disk version of one write scope, re-read at most every ``check_seconds``.
+
+    Caches derived from that scope's tables key on it, so a write from any
+    process invalidates them within ``check_seconds``; a write from this
+    process expires it immediately.
+    """
+
+    def __init__(self, check_seconds: float, scope: str = CATALOG_SCOPE) -> None:
+        self.check_seconds = check_seconds
+        self.scope = scope
+        self.version: int | None = None
+        self._checked_at = 0.0
+
+    def current(self) -> int:
+        now = time.monotonic()
+        if self.version is None or now - self._checked_at >= self.check_seconds:
+            with get_connection() as connection:
+                self.version = read_catalog_version(connection, self.scope)
+            self._checked_at = now
+        return self.version
+
+    def expire(self) -> None:
+        self._checked_at = 0.0
+
+
+class CatalogSnapshot:
+    """Process-local in-memory copy of the catalog tables for read-only lookups.
+
+    Each rebuild goes into a new shared-cache memory database, which is never
+    written again; every thread keeps its own query-only connection to the
+    current one and reconnects after a swap. The on-disk catalog and tenant
+    versions are checked at most every ``check_seconds``. Only the very first build makes
+    readers wait: afterwards one thread rebuilds while the others keep
+    reading the previous snapshot, and the swap is a single reference change.
+    """
+
+    def __init__(self, check_seconds: float) -> None:
+        self.check_seconds = check_seconds
+        self.version: int | None = None
+        self.tenants_version: int | None = None
+        self.refreshes = 0
+        self._uri: str | None = None
+        self._holder: sqlite3.Connection | None = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def connection(self) -> sqlite3.Connection:
+        self._refresh_if_stale()
+        uri = self._uri
+        local = self._local
+        if getattr(local, "uri", None) != uri:
+            if getattr(local, "connection", None) is not None:
+                local.connection.close()
+            local.connection = sqlite3.connect(uri, uri=True, factory=connection_factory)
+            local.connection.row_factory = sqlite3.Row
+            local.connection.execute("PRAGMA query_only = ON")
+            local.uri = uri
+        return local.connection
+
+    def current_version(self, scope: str = CATALOG_SCOPE) -> int | None:
+        self._refresh_if_stale()
+        return self.tenants_version if scope == TENANTS_SCOPE else self.version
+
+    def refresh(self) -> None:
+        # Called by a writer after commit, so its own process serves the new
+        # catalog before the write returns.
+        with self._lock:
+            self._check_disk()
+
+    def reset(self) -> None:
+        # Used after fork: SQLite handles must not be shared across processes.
+        self._uri = None
+        self._holder = None
+        self.version = None
+        self.tenants_version = None
+        self._local = threading.local()
+
+    def _refresh_if_stale(self) -> None:
+        if self._uri is not None and time.monotonic() - self._checked_at < self.check_seconds:
+            return
+        if not self._lock.acquire(blocking=self._uri is None):
+            return
+        try:
+            if self._uri is None or time.monotonic() - self._checked_at >= self.check_seconds:
+                self._check_disk()
+        finally:
+            self._lock.release()
+
+    def _check_disk(self) -> None:
+        with get_connection() as disk:
+            disk_versions = (
+                read_catalog_version(disk),
+                read_catalog_version(disk, TENANTS_SCOPE),
+            )
+        if self._uri is None or disk_versions != (self.version, self.tenants_version):
+            self._build()
+        self._checked_at = time.monotonic()
+
+    def _build(self) -> None:
+        uri = f"file:nutritrack-catalog-{os.getpid()}-{next(_snapshot_names)}?mode=memory&cache=shared"
+        holder = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        holder.execute("ATTACH DATABASE ? AS disk", (str(DB_PATH),))
+        holder.execute("BEGIN")
+        version = holder.execute("PRAGMA disk.user_version").fetchone()[0]
+        tenants_version = holder.execute(
+            "SELECT coalesce(max(version), 0) FROM disk.data_versions WHERE scope = ?",
+            (TENANTS_SCOPE,),
+        ).fetchone()[0]
+        placeholders = ",".join(["?"] * len(CATALOG_TABLES))
+        schema = holder.execute(
+            f"""
+            SELECT type, tbl_name, sql FROM disk.sqlite_master
+            WHERE tbl_name IN ({placeholders}) AND sql IS NOT NULL
+            ORDER BY type = 'index'
+            """,
+            CATALOG_TABLES,
+        ).fetchall()
+        for _, _, sql in schema:
+            holder.execute(sql)
+        for table in CATALOG_TABLES:
+            holder.execute(f"INSERT INTO main.{table} SELECT * FROM disk.{table}")
+        holder.execute("COMMIT")
+        holder.execute("DETACH DATABASE disk")
+
+        # The URI is published before the version: a reader that sees the new
+        # version is already reading the new snapshot, so nothing cached under
+        # a version can come from an older catalog.
+        previous = self._holder
+        self._holder = holder
+        self._uri = uri
+        self.version = version
+        self.tenants_version = tenants_version
+        self.refreshes += 1
+        if previous is not None:
+            previous.close()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": True,
+            "version": self.version,
+            "tenants_version": self.tenants_version,
+            "refreshes": self.refreshes,
+            "check_seconds": self.check_seconds,
+        }
+
+
+catalog_snapshot = CatalogSnapshot(check_seconds=SNAPSHOT_CHECK_SECONDS)
+catalog_version = CatalogVersion(check_seconds=SNAPSHOT_CHECK_SECONDS)
+tenants_version = CatalogVersion(check_seconds=SNAPSHOT_CHECK_SECONDS, scope=TENANTS_SCOPE)
+_cache_versions = {CATALOG_SCOPE: catalog_version, TENANTS_SCOPE: tenants_version}
+
+
+def get_catalog_connection() -> sqlite3.Connection:
+    if CATALOG_SNAPSHOT_ENABLED:
+        return catalog_snapshot.connection()
+    return get_connection()
+
+
+def catalog_cache_version(scope: str = CATALOG_SCOPE) -> int:
+    # Version that caches derived from catalog (or tenant library) reads
+    # should be keyed on.
+    if CATALOG_SNAPSHOT_ENABLED:
+        return catalog_snapshot.current_version(scope)
+    return _cache_versions[scope].current()
+
+
+def on_catalog_write(listener: Callable[[], None]) -> Callable[[], None]:
+    # Run after every committed base catalog write in this process, for caches
+    # that otherwise only notice a new version on their next periodic check.
+    _catalog_write_listeners.append(listener)
+    return listener
+
+
+@contextmanager
+def catalog_write(scope: str = CATALOG_SCOPE) -> Iterator[sqlite3.Connection]:
+    connection = get_connection()
+    try:
+        yield connection
+        # A write that changed no rows keeps the version, so every cache
+        # keyed on it stays valid.
+        changed = connection.total_changes > 0
+        if changed:
+            bump_catalog_version(connection, scope)
+        connection.commit()
+    except BaseException:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+    if not changed or scope == RECIPES_SCOPE:
+        # Saved recipes are not in the snapshot; the sub-recipe cache reads
+        # the recipes version inside its own read transaction.
+        return
+    _cache_versions[scope].expire()
+    if CATALOG_SNAPSHOT_ENABLED:
+        catalog_snapshot.refresh()
+    if scope == CATALOG_SCOPE:
+        for listener in _catalog_write_listeners:
+            listener()
+
+
 def init_db() -> None:
     with get_connection() as connection:
         connection.execute(
@@ -29,4 +282,99 @@ def init_db() -> None:
             )
             """
         )
+        connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS tenant_ingredients (
+                id INTEGER PRIMARY KEY,
+                tenant_id TEXT NOT NULL,
+                name TEXT NOT NULL COLLATE NOCASE,
+                energy_kcal REAL NOT NULL,
+                protein_g REAL NOT NULL,
+                carbs_g REAL NOT NULL,
+                sugar_g REAL NOT NULL,
+                fat_g REAL NOT NULL,
+                saturated_fat_g REAL NOT NULL,
+                sodium_mg REAL NOT NULL,
+                UNIQUE (tenant_id, name)
+            )
+            """
+        )
+        connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS data_versions (
+                scope TEXT PRIMARY KEY,
+                version INTEGER NOT NULL
+            )
+            """
+        )
+        # Alternate names (regional, transliterated, common misspellings) for
+        # base ingredients, stored normalized.
+        connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ingredient_aliases (
+                alias TEXT PRIMARY KEY,
+                ingredient_id INTEGER NOT NULL REFERENCES ingredients (id)
+            )
+            """
+        )
+        connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL,
+                tenant_id TEXT,
+                payload TEXT NOT NULL,
+                total INTEGER NOT NULL,
+                completed INTEGER NOT NULL DEFAULT 0,
+                failed INTEGER NOT NULL DEFAULT 0,
+                artifact_path TEXT,
+                error TEXT,
+                lease_owner TEXT,
+                lease_expires_at REAL,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+            """
+        )
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)"
+        )
+        connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS recipes (
+                id INTEGER PRIMARY KEY,
+                tenant_id TEXT NOT NULL DEFAULT '',
+                name TEXT NOT NULL COLLATE NOCASE,
+                name_key TEXT NOT NULL,
+                servings INTEGER NOT NULL,
+                nutrition TEXT,
+                status TEXT NOT NULL,
+                error TEXT,
+                computed_at TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                UNIQUE (tenant_id, name_key)
+            )
+            """
+        )
+        connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS recipe_ingredients (
+                recipe_id INTEGER NOT NULL REFERENCES recipes (id),
+                position INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                name_key TEXT NOT NULL,
+                quantity_g REAL NOT NULL,
+                PRIMARY KEY (recipe_id, position)
+            )
+            """
+        )
+        # Reverse index: ingredient -> recipes that use it.
+        connection.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_recipe_ingredients_name_key
+            ON recipe_ingredients (name_key, recipe_id)
+            """
+        )
         connection.commit()
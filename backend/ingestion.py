@@ -0,0 +1,44 @@
+import os
+import secrets
+
+from fastapi.exceptions import RequestValidationError
+from pydantic import TypeAdapter, ValidationError
+
+from models import BulkJobRows, RecipeRow
+from tracing import traced
+
+INTERNAL_TOKEN = os.getenv("NUTRITRACK_INTERNAL_TOKEN", "")
+
+# Built once at import: each batch is parsed and validated in a single call
+# into pydantic-core, straight from the request bytes.
+bulk_job_adapter = TypeAdapter(BulkJobRows)
+recipe_rows_adapter = TypeAdapter(list[RecipeRow])
+
+
+def internal_ingestion_enabled() -> bool:
+    return bool(INTERNAL_TOKEN)
+
+
+def is_internal_token(token: str | None) -> bool:
+    return token is not None and secrets.compare_digest(
+        token.encode(), INTERNAL_TOKEN.encode()
+    )
+
+
+@traced("validate_bulk_job")
+def validate_bulk_job(body: bytes) -> BulkJobRows:
+    try:
+        return bulk_job_adapter.validate_json(body)
+    except ValidationError as exc:
+        # Same shape FastAPI gives for an invalid BatchJobRequest body.
+        raise RequestValidationError(
+            [
+                {**error, "loc": ("body", *error["loc"])}
+                for error in exc.errors(include_url=False)
+            ],
+            body=body,
+        ) from exc
+
+
+def job_payload(rows: list[RecipeRow]) -> str:
+    return recipe_rows_adapter.dump_json(rows).decode()
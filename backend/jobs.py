@@ -0,0 +1,251 @@
+import json
+import os
+import threading
+import time
+import uuid
+import zipfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from calculator import IngredientNotFoundError, RecipeCycleError
+from coalescing import coalesced_calculation, coalesced_label_pdf
+from database import BASE_DIR, get_connection
+from label_generator import label_filename
+from models import RecipeRequest
+
+
+JOB_WORKERS = int(os.getenv("NUTRITRACK_JOB_WORKERS", "2"))
+JOB_ARTIFACT_DIR = Path(
+    os.getenv("NUTRITRACK_JOB_ARTIFACT_DIR", BASE_DIR / "job_artifacts")
+)
+JOB_LEASE_SECONDS = 30.0
+JOB_POLL_SECONDS = 1.0
+PROGRESS_FLUSH_SECONDS = 0.5
+
+JOB_KINDS = {
+    "labels": ("application/zip", "zip"),
+    "calculations": ("application/json", "json"),
+}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def submit_job(kind: str, recipes: list[RecipeRequest], tenant_id: str | None) -> str:
+    payload = json.dumps([recipe.model_dump() for recipe in recipes])
+    return submit_job_payload(kind, payload, len(recipes), tenant_id)
+
+
+def submit_job_payload(kind: str, payload: str, total: int, tenant_id: str | None) -> str:
+    # ``payload`` is a JSON list of already validated recipes.
+    job_id = uuid.uuid4().hex
+    timestamp = _now()
+    with get_connection() as connection:
+        connection.execute(
+            """
+            INSERT INTO jobs (
+                id, kind, status, tenant_id, payload, total, created_at, updated_at
+            ) VALUES (?, ?, 'queued', ?, ?, ?, ?, ?)
+            """,
+            (job_id, kind, tenant_id, payload, total, timestamp, timestamp),
+        )
+        connection.commit()
+    job_runner.wake()
+    return job_id
+
+
+def get_job(job_id: str) -> dict[str, Any] | None:
+    with get_connection() as connection:
+        row = connection.execute(
+            """
+            SELECT id, kind, status, tenant_id, total, completed, failed,
+                   artifact_path, error, created_at, updated_at
+            FROM jobs
+            WHERE id = ?
+            """,
+            (job_id,),
+        ).fetchone()
+    return dict(row) if row else None
+
+
+def _claim_next_job(owner: str) -> dict[str, Any] | None:
+    # Queued jobs, and running jobs whose worker stopped renewing its lease
+    # (process restarted or crashed), are claimed atomically so several
+    # uvicorn workers can share one jobs table.
+    now = time.time()
+    with get_connection() as connection:
+        cursor = connection.execute(
+            """
+            UPDATE jobs
+            SET status = 'running',
+                lease_owner = ?,
+                lease_expires_at = ?,
+                completed = 0,
+                failed = 0,
+                error = NULL,
+                updated_at = ?
+            WHERE id = (
+                SELECT id FROM jobs
+                WHERE status = 'queued'
+                   OR (status = 'running' AND lease_expires_at < ?)
+                ORDER BY created_at
+                LIMIT 1
+            )
+            """,
+            (owner, now + JOB_LEASE_SECONDS, _now(), now),
+        )
+        connection.commit()
+        if cursor.rowcount == 0:
+            return None
+        row = connection.execute(
+            """
+            SELECT id, kind, tenant_id, payload, total
+            FROM jobs
+            WHERE lease_owner = ? AND status = 'running'
+            ORDER BY updated_at DESC
+            LIMIT 1
+            """,
+            (owner,),
+        ).fetchone()
+    return dict(row) if row else None
+
+
+def _update_job(job_id: str, owner: str, **fields: Any) -> None:
+    fields["updated_at"] = _now()
+    fields["lease_expires_at"] = time.time() + JOB_LEASE_SECONDS
+    assignments = ", ".join(f"{column} = ?" for column in fields)
+    with get_connection() as connection:
+        connection.execute(
+            f"UPDATE jobs SET {assignments} WHERE id = ? AND lease_owner = ?",
+            (*fields.values(), job_id, owner),
+        )
+        connection.commit()
+
+
+def _run_job(job: dict[str, Any], owner: str) -> None:
+    kind = job["kind"]
+    tenant_id = job["tenant_id"]
+    recipes = [RecipeRequest.model_validate(item) for item in json.loads(job["payload"])]
+    _, extension = JOB_KINDS[kind]
+    JOB_ARTIFACT_DIR.mkdir(parents=True, exist_ok=True)
+    artifact_path = JOB_ARTIFACT_DIR / f"{job['id']}.{extension}"
+    partial_path = artifact_path.with_name(f"{artifact_path.name}.{owner}.partial")
+
+    completed = 0
+    failed = 0
+    item_errors: list[dict[str, Any]] = []
+    last_flush = time.monotonic()
+
+    def record_error(index: int, recipe: RecipeRequest, exc: Exception) -> None:
+        if isinstance(exc, IngredientNotFoundError):
+            detail = "Ingredient(s) not found: " + ", ".join(exc.missing_ingredients)
+        elif isinstance(exc, RecipeCycleError):
+            detail = str(exc)
+        else:
+            detail = "Unable to process this recipe."
+        item_errors.append(
+            {"index": index, "recipe_name": recipe.recipe_name, "detail": detail}
+        )
+
+    def progress() -> None:
+        nonlocal last_flush
+        if time.monotonic() - last_flush >= PROGRESS_FLUSH_SECONDS:
+            _update_job(job["id"], owner, completed=completed, failed=failed)
+            last_flush = time.monotonic()
+
+    if kind == "labels":
+        with zipfile.ZipFile(partial_path, "w", compression=zipfile.ZIP_STORED) as archive:
+            for index, recipe in enumerate(recipes):
+                try:
+                    result = coalesced_calculation(recipe, tenant_id=tenant_id)
+                    pdf_bytes = coalesced_label_pdf(recipe, result, tenant_id=tenant_id)
+                    archive.writestr(
+                        f"{index + 1:05d}_{label_filename(recipe.recipe_name)}", pdf_bytes
+                    )
+                except Exception as exc:
+                    failed += 1
+                    record_error(index, recipe, exc)
+                completed += 1
+                progress()
+            archive.writestr("errors.json", json.dumps(item_errors, indent=2))
+    else:
+        with partial_path.open("w", encoding="utf-8") as handle:
+            handle.write("[\n")
+            for index, recipe in enumerate(recipes):
+                entry: dict[str, Any] = {"index": index, "recipe_name": recipe.recipe_name}
+                try:
+                    entry["result"] = coalesced_calculation(recipe, tenant_id=tenant_id)
+                except Exception as exc:
+                    failed += 1
+                    record_error(index, recipe, exc)
+                    entry["error"] = item_errors[-1]["detail"]
+                handle.write(("," if index else "") + json.dumps(entry) + "\n")
+                completed += 1
+                progress()
+            handle.write("]\n")
+
+    os.replace(partial_path, artifact_path)
+    _update_job(
+        job["id"],
+        owner,
+        status="succeeded",
+        completed=completed,
+        failed=failed,
+        artifact_path=str(artifact_path),
+        lease_owner=None,
+    )
+
+
+class JobRunner:
+    def __init__(self, workers: int) -> None:
+        self.workers = max(1, workers)
+        self.owner = ""
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stopping.clear()
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=self._worker_loop,
+                args=(f"{self.owner}-{index}",),
+                name=f"nutritrack-job-worker-{index}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._wakeup.set()
+        self._threads = []
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    def _worker_loop(self, owner: str) -> None:
+        while not self._stopping.is_set():
+            job = _claim_next_job(owner)
+            if job is None:
+                self._wakeup.wait(JOB_POLL_SECONDS)
+                self._wakeup.clear()
+                continue
+            try:
+                _run_job(job, owner)
+            except Exception as exc:
+                _update_job(
+                    job["id"],
+                    owner,
+                    status="failed",
+                    error=f"Job failed: {exc.__class__.__name__}",
+                    lease_owner=None,
+                )
+
+
+job_runner = JobRunner(workers=JOB_WORKERS)
@@ -1,26 +1,106 @@
+import os
+import re
+import zlib
+from collections.abc import Iterable, Iterator
+from functools import lru_cache
+from itertools import islice
+from html import escape
 from io import BytesIO
+from pathlib import Path
+from string import Template
 
+import reportlab
+from PIL import Image, ImageDraw, ImageFont
 from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
+from reportlab.lib.pagesizes import A4, letter
+from reportlab.pdfbase.pdfmetrics import stringWidth
 from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
 from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
 
+from tracing import span, traced
+
+LABEL_CACHE_SIZE = int(os.getenv("NUTRITRACK_LABEL_CACHE_SIZE", "1024"))
+REPORTLAB_FONT_DIR = Path(reportlab.__file__).resolve().parent / "fonts"
+
+LABEL_ROWS = (
+    ("Energy (kcal)", "energy_kcal"),
+    ("Protein (g)", "protein_g"),
+    ("Carbohydrates (g)", "carbs_g"),
+    ("  of which Sugars (g)", "sugar_g"),
+    ("Fat (g)", "fat_g"),
+    ("  Saturated Fat (g)", "saturated_fat_g"),
+    ("Sodium (mg)", "sodium_mg"),
+)
+LABEL_HEADER = ("Nutrient", "Per 100g", "Per Serving")
+LABEL_SHEET_PAGE_SIZES = {"A4": A4, "letter": letter}
+MM_TO_POINTS = 72 / 25.4
+
+# Shared geometry for the SVG and PNG renderers (SVG user units / PNG pixels).
+_WIDTH = 480
+_PADDING = 16
+_ROW_HEIGHT = 28
+_TABLE_TOP = 114
+_COLUMN_EDGES = (16, 256, 368, 464)
+_HEIGHT = _TABLE_TOP + _ROW_HEIGHT * (len(LABEL_ROWS) + 1) + _PADDING
+_PNG_LEVELS = [value // 17 for value in range(256)]
+_PNG_PALETTE = [channel for level in range(16) for channel in (level * 17,) * 3]
+
 
 def _fmt(value: float) -> str:
     return f"{value:.2f}"
 
 
-def generate_nutrition_label_pdf(
+def _label_table(
+    per_100g: dict[str, float], per_serving: dict[str, float]
+) -> list[tuple[str, str, str]]:
+    return [LABEL_HEADER] + [
+        (label, _fmt(per_100g[key]), _fmt(per_serving[key])) for label, key in LABEL_ROWS
+    ]
+
+
+def _label_meta(recipe_name: str, servings: int, total_weight: float) -> tuple[str, ...]:
+    return (
+        f"Recipe: {recipe_name}",
+        f"Servings: {servings}",
+        f"Total batch weight: {total_weight:.2f} g",
+    )
+
+
+def label_filename(recipe_name: str, extension: str = "pdf") -> str:
+    safe_name = re.sub(r"[^A-Za-z0-9_-]+", "_", recipe_name).strip("_")
+    return f"{safe_name or 'nutrition_label'}.{extension}"
+
+
+class _PdfSink:
+    """Write target that keeps ReportLab's output bytes instead of copying them.
+
+    ReportLab assembles the whole document and hands it to ``write`` once, so
+    the same bytes object can go straight into the HTTP response.
+    """
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(data)
+        return len(data)
+
+    def getvalue(self) -> bytes:
+        if len(self._chunks) == 1:
+            return self._chunks[0]
+        return b"".join(self._chunks)
+
+
+def write_nutrition_label_pdf(
+    output,
     recipe_name: str,
     servings: int,
     total_weight: float,
     per_100g: dict[str, float],
     per_serving: dict[str, float],
-) -> bytes:
-    buffer = BytesIO()
-
+) -> None:
     document = SimpleDocTemplate(
-        buffer,
+        output,
         pagesize=A4,
         leftMargin=36,
         rightMargin=36,
@@ -48,20 +128,7 @@ def generate_nutrition_label_pdf(
         textColor=colors.black,
     )
 
-    table_data = [
-        ["Nutrient", "Per 100g", "Per Serving"],
-        ["Energy (kcal)", _fmt(per_100g["energy_kcal"]), _fmt(per_serving["energy_kcal"])],
-        ["Protein (g)", _fmt(per_100g["protein_g"]), _fmt(per_serving["protein_g"])],
-        ["Carbohydrates (g)", _fmt(per_100g["carbs_g"]), _fmt(per_serving["carbs_g"])],
-        ["  of which Sugars (g)", _fmt(per_100g["sugar_g"]), _fmt(per_serving["sugar_g"])],
-        ["Fat (g)", _fmt(per_100g["fat_g"]), _fmt(per_serving["fat_g"])],
-        [
-            "  Saturated Fat (g)",
-            _fmt(per_100g["saturated_fat_g"]),
-            _fmt(per_serving["saturated_fat_g"]),
-        ],
-        ["Sodium (mg)", _fmt(per_100g["sodium_mg"]), _fmt(per_serving["sodium_mg"])],
-    ]
+    table_data = [list(row) for row in _label_table(per_100g, per_serving)]
 
     table = Table(table_data, colWidths=[260, 110, 110])
     table.setStyle(
@@ -83,14 +150,546 @@ def generate_nutrition_label_pdf(
 
     content = [
         Paragraph("NUTRITION INFORMATION", title_style),
-        Paragraph(f"Recipe: {recipe_name}", meta_style),
-        Paragraph(f"Servings: {servings}", meta_style),
-        Paragraph(f"Total batch weight: {total_weight:.2f} g", meta_style),
+        *[
+            Paragraph(line, meta_style)
+            for line in _label_meta(recipe_name, servings, total_weight)
+        ],
         Spacer(1, 12),
         table,
     ]
 
     document.build(content)
-    pdf_bytes = buffer.getvalue()
-    buffer.close()
-    return pdf_bytes
+
+
+@traced("render_label_pdf")
+def generate_nutrition_label_pdf(
+    recipe_name: str,
+    servings: int,
+    total_weight: float,
+    per_100g: dict[str, float],
+    per_serving: dict[str, float],
+) -> bytes:
+    sink = _PdfSink()
+    write_nutrition_label_pdf(
+        sink,
+        recipe_name=recipe_name,
+        servings=servings,
+        total_weight=total_weight,
+        per_100g=per_100g,
+        per_serving=per_serving,
+    )
+    return sink.getvalue()
+
+
+_SVG_DOCUMENT = Template(
+    '<svg xmlns="http://www.w3.org/2000/svg" width="$width" height="$height" '
+    'viewBox="0 0 $width $height" font-family="Helvetica, Arial, sans-serif">'
+    '<rect width="100%" height="100%" fill="#ffffff"/>'
+    '<text x="$center" y="36" font-size="18" font-weight="bold" text-anchor="middle">'
+    "NUTRITION INFORMATION</text>"
+    "$meta$rows</svg>"
+)
+_SVG_META_LINE = Template('<text x="$x" y="$y" font-size="12">$text</text>')
+_SVG_ROW = Template(
+    '<rect x="$left" y="$top" width="$table_width" height="$row_height" '
+    'fill="none" stroke="#000000"/>'
+    '<line x1="$split_1" y1="$top" x2="$split_1" y2="$bottom" stroke="#000000"/>'
+    '<line x1="$split_2" y1="$top" x2="$split_2" y2="$bottom" stroke="#000000"/>'
+    '<text x="$label_x" y="$baseline" font-size="12" font-weight="$weight" '
+    'xml:space="preserve">$label</text>'
+    '<text x="$value_1_x" y="$baseline" font-size="12" font-weight="$weight" '
+    'text-anchor="end">$value_1</text>'
+    '<text x="$value_2_x" y="$baseline" font-size="12" font-weight="$weight" '
+    'text-anchor="end">$value_2</text>'
+)
+
+_HTML_DOCUMENT = Template(
+    '<section class="nutrition-label">'
+    "<style>"
+    ".nutrition-label{font-family:Helvetica,Arial,sans-serif;color:#000;max-width:480px}"
+    ".nutrition-label h2{font-size:18px;text-align:center;margin:0 0 8px}"
+    ".nutrition-label p{font-size:12px;margin:2px 0}"
+    ".nutrition-label table{border-collapse:collapse;width:100%;margin-top:12px;font-size:12px}"
+    ".nutrition-label th,.nutrition-label td{border:1px solid #000;padding:6px}"
+    ".nutrition-label td+td,.nutrition-label th+th{text-align:right}"
+    ".nutrition-label .sub{padding-left:18px}"
+    "</style>"
+    "<h2>NUTRITION INFORMATION</h2>$meta"
+    "<table><thead><tr><th>$header_1</th><th>$header_2</th><th>$header_3</th></tr></thead>"
+    "<tbody>$rows</tbody></table></section>"
+)
+_HTML_META_LINE = Template("<p>$text</p>")
+_HTML_ROW = Template(
+    '<tr><td class="$css_class">$label</td><td>$value_1</td><td>$value_2</td></tr>'
+)
+
+
+def generate_nutrition_label_svg(
+    recipe_name: str,
+    servings: int,
+    total_weight: float,
+    per_100g: dict[str, float],
+    per_serving: dict[str, float],
+) -> bytes:
+    meta = "".join(
+        _SVG_META_LINE.substitute(x=_PADDING, y=62 + index * 18, text=escape(line))
+        for index, line in enumerate(_label_meta(recipe_name, servings, total_weight))
+    )
+    left, split_1, split_2, right = _COLUMN_EDGES
+    rows = []
+    for index, (label, value_1, value_2) in enumerate(_label_table(per_100g, per_serving)):
+        top = _TABLE_TOP + index * _ROW_HEIGHT
+        rows.append(
+            _SVG_ROW.substitute(
+                left=left,
+                top=top,
+                bottom=top + _ROW_HEIGHT,
+                table_width=right - left,
+                row_height=_ROW_HEIGHT,
+                split_1=split_1,
+                split_2=split_2,
+                label_x=left + 6,
+                value_1_x=split_2 - 6,
+                value_2_x=right - 6,
+                baseline=top + 18,
+                weight="bold" if index == 0 else "normal",
+                label=escape(label),
+                value_1=escape(value_1),
+                value_2=escape(value_2),
+            )
+        )
+    return _SVG_DOCUMENT.substitute(
+        width=_WIDTH,
+        height=_HEIGHT,
+        center=_WIDTH // 2,
+        meta=meta,
+        rows="".join(rows),
+    ).encode("utf-8")
+
+
+def generate_nutrition_label_html(
+    recipe_name: str,
+    servings: int,
+    total_weight: float,
+    per_100g: dict[str, float],
+    per_serving: dict[str, float],
+) -> bytes:
+    meta = "".join(
+        _HTML_META_LINE.substitute(text=escape(line))
+        for line in _label_meta(recipe_name, servings, total_weight)
+    )
+    header, *body = _label_table(per_100g, per_serving)
+    rows = "".join(
+        _HTML_ROW.substitute(
+            css_class="sub" if label.startswith(" ") else "",
+            label=escape(label.strip()),
+            value_1=escape(value_1),
+            value_2=escape(value_2),
+        )
+        for label, value_1, value_2 in body
+    )
+    return _HTML_DOCUMENT.substitute(
+        meta=meta,
+        header_1=escape(header[0]),
+        header_2=escape(header[1]),
+        header_3=escape(header[2]),
+        rows=rows,
+    ).encode("utf-8")
+
+
+@lru_cache(maxsize=None)
+def _png_font(bold: bool, size: int) -> ImageFont.FreeTypeFont:
+    font_file = "VeraBd.ttf" if bold else "Vera.ttf"
+    return ImageFont.truetype(str(REPORTLAB_FONT_DIR / font_file), size)
+
+
+@lru_cache(maxsize=1)
+def _png_base() -> Image.Image:
+    # Everything that is identical on every label (title, grid, header row and
+    # row labels) is drawn once; each render copies this image and adds values.
+    image = Image.new("L", (_WIDTH, _HEIGHT), 255)
+    draw = ImageDraw.Draw(image)
+    draw.text(
+        (_WIDTH // 2, 36),
+        "NUTRITION INFORMATION",
+        font=_png_font(True, 18),
+        fill=0,
+        anchor="ms",
+    )
+    left, split_1, split_2, right = _COLUMN_EDGES
+    rows = [LABEL_HEADER] + [(label, "", "") for label, _ in LABEL_ROWS]
+    for index, (label, value_1, value_2) in enumerate(rows):
+        top = _TABLE_TOP + index * _ROW_HEIGHT
+        bottom = top + _ROW_HEIGHT
+        baseline = top + 18
+        font = _png_font(index == 0, 12)
+        draw.rectangle((left, top, right, bottom), outline=0)
+        draw.line((split_1, top, split_1, bottom), fill=0)
+        draw.line((split_2, top, split_2, bottom), fill=0)
+        draw.text((left + 6, baseline), label, font=font, fill=0, anchor="ls")
+        draw.text((split_2 - 6, baseline), value_1, font=font, fill=0, anchor="rs")
+        draw.text((right - 6, baseline), value_2, font=font, fill=0, anchor="rs")
+    return image
+
+
+@lru_cache(maxsize=None)
+def _png_glyphs() -> tuple[dict[str, tuple[Image.Image, float]], int]:
+    # Pasting prerendered ASCII glyph masks is far cheaper than shaping every
+    # string with FreeType; anything outside the atlas falls back to draw.text.
+    font = _png_font(False, 12)
+    ascent, descent = font.getmetrics()
+    glyphs = {}
+    for char in map(chr, range(32, 127)):
+        advance = font.getlength(char)
+        mask = Image.new("L", (int(advance) + 2, ascent + descent), 0)
+        ImageDraw.Draw(mask).text((0, ascent), char, font=font, fill=255, anchor="ls")
+        glyphs[char] = (mask, advance)
+    return glyphs, ascent
+
+
+def _draw_text(
+    image: Image.Image,
+    draw: ImageDraw.ImageDraw,
+    text: str,
+    x: float,
+    baseline: int,
+    align_right: bool = False,
+) -> None:
+    glyphs, ascent = _png_glyphs()
+    if any(char not in glyphs for char in text):
+        anchor = "rs" if align_right else "ls"
+        draw.text((x, baseline), text, font=_png_font(False, 12), fill=0, anchor=anchor)
+        return
+    if align_right:
+        x -= sum(glyphs[char][1] for char in text)
+    for char in text:
+        mask, advance = glyphs[char]
+        image.paste(0, (round(x), baseline - ascent), mask)
+        x += advance
+
+
+def generate_nutrition_label_png(
+    recipe_name: str,
+    servings: int,
+    total_weight: float,
+    per_100g: dict[str, float],
+    per_serving: dict[str, float],
+) -> bytes:
+    image = _png_base().copy()
+    draw = ImageDraw.Draw(image)
+    for index, line in enumerate(_label_meta(recipe_name, servings, total_weight)):
+        _draw_text(image, draw, line, _PADDING, 62 + index * 18)
+
+    _, _, split_2, right = _COLUMN_EDGES
+    for index, (_, key) in enumerate(LABEL_ROWS, start=1):
+        baseline = _TABLE_TOP + index * _ROW_HEIGHT + 18
+        _draw_text(image, draw, _fmt(per_100g[key]), split_2 - 6, baseline, True)
+        _draw_text(image, draw, _fmt(per_serving[key]), right - 6, baseline, True)
+
+    # 16 grey levels are plenty for antialiased black-on-white text and keep
+    # the encoder's work (and the file) small.
+    indexed = Image.frombytes("P", image.size, image.point(_PNG_LEVELS).tobytes())
+    indexed.putpalette(_PNG_PALETTE)
+    buffer = BytesIO()
+    indexed.save(buffer, format="PNG", compress_level=1, bits=4)
+    return buffer.getvalue()
+
+
+LABEL_FORMATS = {
+    "pdf": ("application/pdf", generate_nutrition_label_pdf),
+    "svg": ("image/svg+xml", generate_nutrition_label_svg),
+    "png": ("image/png", generate_nutrition_label_png),
+    "html": ("text/html; charset=utf-8", generate_nutrition_label_html),
+}
+
+
+@lru_cache(maxsize=LABEL_CACHE_SIZE)
+def _render_label_cached(
+    label_format: str,
+    recipe_name: str,
+    servings: int,
+    total_weight: float,
+    per_100g: tuple[tuple[str, float], ...],
+    per_serving: tuple[tuple[str, float], ...],
+) -> bytes:
+    _, renderer = LABEL_FORMATS[label_format]
+    return renderer(
+        recipe_name=recipe_name,
+        servings=servings,
+        total_weight=total_weight,
+        per_100g=dict(per_100g),
+        per_serving=dict(per_serving),
+    )
+
+
+def render_label(
+    label_format: str,
+    recipe_name: str,
+    servings: int,
+    total_weight: float,
+    per_100g: dict[str, float],
+    per_serving: dict[str, float],
+) -> bytes:
+    # Keyed on the rounded label data, so any recipe that prints the same
+    # label reuses the rendered body.
+    with span("render_label", format=label_format):
+        return _render_label_cached(
+            label_format,
+            recipe_name,
+            servings,
+            total_weight,
+            tuple(per_100g.items()),
+            tuple(per_serving.items()),
+        )
+
+
+def label_cache_stats() -> dict:
+    info = _render_label_cached.cache_info()
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "max_size": info.maxsize,
+    }
+
+
+# Multi-up sheets: every label is drawn in a 240 x 150 pt design box that is
+# scaled into its grid slot. The static parts live in one form XObject.
+_SHEET_DESIGN_WIDTH = 240.0
+_SHEET_DESIGN_HEIGHT = 150.0
+_SHEET_TABLE_TOP = 112.0
+_SHEET_ROW_HEIGHT = 13.0
+_SHEET_COLUMN_EDGES = (6.0, 126.0, 183.0, 234.0)
+_SHEET_FONT_SIZE = 6.5
+_SHEET_NAME_FONT_SIZE = 7.5
+_SHEET_FONTS = {"F1": "Helvetica", "F2": "Helvetica-Bold"}
+_SHEET_CATALOG, _SHEET_PAGES, _SHEET_FONT_REGULAR, _SHEET_FONT_BOLD, _SHEET_FORM = range(1, 6)
+
+
+def label_sheet_geometry(
+    page_size: str,
+    columns: int,
+    rows: int,
+    label_width_mm: float,
+    label_height_mm: float,
+    column_gap_mm: float,
+    row_gap_mm: float,
+) -> dict:
+    page_width, page_height = LABEL_SHEET_PAGE_SIZES[page_size]
+    label_width = label_width_mm * MM_TO_POINTS
+    label_height = label_height_mm * MM_TO_POINTS
+    column_gap = column_gap_mm * MM_TO_POINTS
+    row_gap = row_gap_mm * MM_TO_POINTS
+    grid_width = columns * label_width + (columns - 1) * column_gap
+    grid_height = rows * label_height + (rows - 1) * row_gap
+    if grid_width > page_width or grid_height > page_height:
+        raise ValueError(
+            f"A {columns} x {rows} grid of {label_width_mm:g} x {label_height_mm:g} mm "
+            f"labels does not fit on one {page_size} page."
+        )
+
+    scale = min(label_width / _SHEET_DESIGN_WIDTH, label_height / _SHEET_DESIGN_HEIGHT)
+    inset_x = (label_width - _SHEET_DESIGN_WIDTH * scale) / 2
+    inset_y = (label_height - _SHEET_DESIGN_HEIGHT * scale) / 2
+    left = (page_width - grid_width) / 2
+    top = page_height - (page_height - grid_height) / 2
+    slots = [
+        (
+            left + column * (label_width + column_gap) + inset_x,
+            top - row * (label_height + row_gap) - label_height + inset_y,
+        )
+        for row in range(rows)
+        for column in range(columns)
+    ]
+    return {"page_size": (page_width, page_height), "scale": scale, "slots": slots}
+
+
+def _pdf_number(value: float) -> str:
+    return f"{value:.3f}".rstrip("0").rstrip(".")
+
+
+def _pdf_string(text: str) -> str:
+    encoded = text.encode("cp1252", "replace").decode("latin-1")
+    return "(" + encoded.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ")"
+
+
+def _pdf_text(font: str, size: float, x: float, y: float, text: str) -> str:
+    return f"/{font} {_pdf_number(size)} Tf 1 0 0 1 {_pdf_number(x)} {_pdf_number(y)} Tm {_pdf_string(text)} Tj"
+
+
+def _fit_text(text: str, font_name: str, size: float, width: float) -> str:
+    if stringWidth(text, font_name, size) <= width:
+        return text
+    while text and stringWidth(text + "...", font_name, size) > width:
+        text = text[:-1]
+    return text + "..."
+
+
+def _pdf_object(number: int, body: bytes) -> bytes:
+    return f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+
+
+def _pdf_stream(dictionary: str, content: str) -> bytes:
+    data = zlib.compress(content.encode("latin-1"))
+    return (
+        f"<< {dictionary} /Filter /FlateDecode /Length {len(data)} >>\nstream\n".encode()
+        + data
+        + b"\nendstream"
+    )
+
+
+def _sheet_baseline(row_index: int) -> float:
+    return _SHEET_TABLE_TOP - (row_index + 1) * _SHEET_ROW_HEIGHT + 4
+
+
+@lru_cache(maxsize=1)
+def _sheet_form() -> bytes:
+    left, split_1, split_2, right = _SHEET_COLUMN_EDGES
+    bottom = _SHEET_TABLE_TOP - _SHEET_ROW_HEIGHT * (len(LABEL_ROWS) + 1)
+    title = "NUTRITION INFORMATION"
+    title_x = (_SHEET_DESIGN_WIDTH - stringWidth(title, "Helvetica-Bold", 9)) / 2
+    commands = [
+        "0 G 0.75 w",
+        f"0.5 0.5 {_SHEET_DESIGN_WIDTH - 1:g} {_SHEET_DESIGN_HEIGHT - 1:g} re S",
+        "0.5 w",
+        f"{left:g} {bottom:g} {right - left:g} {_SHEET_TABLE_TOP - bottom:g} re S",
+        f"{split_1:g} {bottom:g} m {split_1:g} {_SHEET_TABLE_TOP:g} l S",
+        f"{split_2:g} {bottom:g} m {split_2:g} {_SHEET_TABLE_TOP:g} l S",
+    ]
+    for index in range(1, len(LABEL_ROWS) + 1):
+        y = _SHEET_TABLE_TOP - index * _SHEET_ROW_HEIGHT
+        commands.append(f"{left:g} {_pdf_number(y)} m {right:g} {_pdf_number(y)} l S")
+
+    commands.append("BT")
+    commands.append(_pdf_text("F2", 9, title_x, 138, title))
+    header_label, *header_values = LABEL_HEADER
+    commands.append(_pdf_text("F2", _SHEET_FONT_SIZE, left + 3, _sheet_baseline(0), header_label))
+    for text, edge in zip(header_values, (split_2, right)):
+        x = edge - 3 - stringWidth(text, "Helvetica-Bold", _SHEET_FONT_SIZE)
+        commands.append(_pdf_text("F2", _SHEET_FONT_SIZE, x, _sheet_baseline(0), text))
+    for index, (label, _) in enumerate(LABEL_ROWS, start=1):
+        commands.append(
+            _pdf_text("F1", _SHEET_FONT_SIZE, left + 3, _sheet_baseline(index), label)
+        )
+    commands.append("ET")
+    return _pdf_stream(
+        f"/Type /XObject /Subtype /Form /BBox [0 0 {_SHEET_DESIGN_WIDTH:g} "
+        f"{_SHEET_DESIGN_HEIGHT:g}] /Resources << /Font << /F1 {_SHEET_FONT_REGULAR} 0 R "
+        f"/F2 {_SHEET_FONT_BOLD} 0 R >> >>",
+        "\n".join(commands),
+    )
+
+
+def _sheet_label_commands(label: dict, scale: float, x: float, y: float) -> str:
+    left, _, split_2, right = _SHEET_COLUMN_EDGES
+    name_line, servings_line, weight_line = _label_meta(
+        label["recipe_name"], label["servings"], label["total_weight"]
+    )
+    text_width = right - left
+    commands = [
+        f"q {_pdf_number(scale)} 0 0 {_pdf_number(scale)} {_pdf_number(x)} {_pdf_number(y)} cm",
+        "/Label Do BT",
+        _pdf_text(
+            "F2",
+            _SHEET_NAME_FONT_SIZE,
+            left,
+            126,
+            _fit_text(name_line, "Helvetica-Bold", _SHEET_NAME_FONT_SIZE, text_width),
+        ),
+        _pdf_text(
+            "F1",
+            _SHEET_FONT_SIZE,
+            left,
+            117,
+            _fit_text(
+                f"{servings_line}  |  {weight_line}", "Helvetica", _SHEET_FONT_SIZE, text_width
+            ),
+        ),
+    ]
+    for index, (_, key) in enumerate(LABEL_ROWS, start=1):
+        baseline = _sheet_baseline(index)
+        for values, edge in ((label["per_100g"], split_2), (label["per_serving"], right)):
+            text = _fmt(values[key])
+            x_text = edge - 3 - stringWidth(text, "Helvetica", _SHEET_FONT_SIZE)
+            commands.append(_pdf_text("F1", _SHEET_FONT_SIZE, x_text, baseline, text))
+    commands.append("ET Q")
+    return "\n".join(commands)
+
+
+def generate_label_sheet_pdf(labels: Iterable[dict], geometry: dict) -> Iterator[bytes]:
+    """Yields a multi-up PDF one page at a time.
+
+    Objects are written as soon as a page is full and only their byte offsets
+    are kept, so memory does not grow with the number of labels.
+    """
+    page_width, page_height = geometry["page_size"]
+    slots = geometry["slots"]
+    scale = geometry["scale"]
+    offsets: dict[int, int] = {}
+    position = 0
+    page_numbers: list[int] = []
+
+    def emit(*objects: tuple[int, bytes]) -> bytes:
+        nonlocal position
+        chunks = []
+        for number, body in objects:
+            chunk = _pdf_object(number, body)
+            offsets[number] = position
+            position += len(chunk)
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    header = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+    position = len(header)
+    yield header + emit(
+        (_SHEET_CATALOG, f"<< /Type /Catalog /Pages {_SHEET_PAGES} 0 R >>".encode()),
+        *(
+            (
+                number,
+                f"<< /Type /Font /Subtype /Type1 /BaseFont /{_SHEET_FONTS[alias]} "
+                "/Encoding /WinAnsiEncoding >>".encode(),
+            )
+            for number, alias in ((_SHEET_FONT_REGULAR, "F1"), (_SHEET_FONT_BOLD, "F2"))
+        ),
+        (_SHEET_FORM, _sheet_form()),
+    )
+
+    resources = (
+        f"/Resources << /Font << /F1 {_SHEET_FONT_REGULAR} 0 R /F2 {_SHEET_FONT_BOLD} 0 R >> "
+        f"/XObject << /Label {_SHEET_FORM} 0 R >> >>"
+    )
+    next_number = _SHEET_FORM + 1
+    labels = iter(labels)
+    while page_labels := list(islice(labels, len(slots))):
+        with span("render_label_sheet_page", labels=len(page_labels)):
+            content = "\n".join(
+                _sheet_label_commands(label, scale, x, y)
+                for label, (x, y) in zip(page_labels, slots)
+            )
+            content_number, page_number = next_number, next_number + 1
+            next_number += 2
+            page_numbers.append(page_number)
+            page = emit(
+                (content_number, _pdf_stream("", content)),
+                (
+                    page_number,
+                    f"<< /Type /Page /Parent {_SHEET_PAGES} 0 R /MediaBox [0 0 "
+                    f"{_pdf_number(page_width)} {_pdf_number(page_height)}] {resources} "
+                    f"/Contents {content_number} 0 R >>".encode(),
+                ),
+            )
+        yield page
+
+    kids = " ".join(f"{number} 0 R" for number in page_numbers)
+    pages = emit(
+        (
+            _SHEET_PAGES,
+            f"<< /Type /Pages /Kids [{kids}] /Count {len(page_numbers)} >>".encode(),
+        )
+    )
+    xref = [f"xref\n0 {next_number}\n", "0000000000 65535 f \n"]
+    xref.extend(f"{offsets[number]:010d} 00000 n \n" for number in range(1, next_number))
+    yield pages + "".join(xref).encode() + (
+        f"trailer\n<< /Size {next_number} /Root {_SHEET_CATALOG} 0 R >>\n"
+        f"startxref\n{position}\n%%EOF\n"
+    ).encode()
@@ -0,0 +1,229 @@
+import asyncio
+import os
+from typing import Any
+
+from fastapi import WebSocket, WebSocketDisconnect
+from pydantic import TypeAdapter, ValidationError
+
+from calculator import IngredientNotFoundError, RecipeCycleError, calculate_nutrition_async
+from models import (
+    CalculationResponse,
+    LiveIngredient,
+    LiveIngredientEdit,
+    LiveIngredientRemove,
+    LiveMessage,
+    LiveOpen,
+    LiveRecipeEdit,
+    RecipeRequest,
+)
+
+LIVE_DEBOUNCE_SECONDS = float(os.getenv("NUTRITRACK_LIVE_DEBOUNCE_MS", "150")) / 1000
+LIVE_MAX_DELAY_SECONDS = float(os.getenv("NUTRITRACK_LIVE_MAX_DELAY_MS", "600")) / 1000
+LIVE_MAX_SESSIONS = int(os.getenv("NUTRITRACK_LIVE_MAX_SESSIONS", "512"))
+LIVE_MAX_INGREDIENTS = 500
+
+live_message_adapter = TypeAdapter(LiveMessage)
+
+
+class LiveCalculationStats:
+    def __init__(self) -> None:
+        self.active = 0
+        self.opened = 0
+        self.rejected = 0
+        self.edits = 0
+        self.calculations = 0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "active_sessions": self.active,
+            "opened_sessions": self.opened,
+            "rejected_sessions": self.rejected,
+            "edits": self.edits,
+            "calculations": self.calculations,
+            # Edits that never needed their own calculation.
+            "coalesced_edits": max(0, self.edits - self.calculations),
+            "debounce_ms": round(LIVE_DEBOUNCE_SECONDS * 1000),
+            "max_delay_ms": round(LIVE_MAX_DELAY_SECONDS * 1000),
+        }
+
+
+live_stats = LiveCalculationStats()
+
+
+class LiveSession:
+    """One editor's draft recipe, recalculated after each burst of edits.
+
+    Edits are applied to the draft as they arrive. A calculation starts once
+    no edit has arrived for the debounce window, or once the first pending
+    edit is ``max_delay`` old, and always uses the latest draft; edits that
+    land during a calculation are picked up by the next one. Results carry
+    the ``seq`` of the last edit they include and only the top-level
+    sections that changed since the previous result.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        tenant_id: str | None,
+        debounce: float = LIVE_DEBOUNCE_SECONDS,
+        max_delay: float = LIVE_MAX_DELAY_SECONDS,
+    ) -> None:
+        self.websocket = websocket
+        self.tenant_id = tenant_id
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.draft: dict[str, Any] | None = None
+        self.include_contributions = False
+        self.seq = 0
+        self.last_edit = 0.0
+        self.last_result: dict[str, Any] = {}
+        self._pending = asyncio.Event()
+        self._send_lock = asyncio.Lock()
+
+    async def run(self) -> None:
+        calculator = asyncio.create_task(self._calculate_loop())
+        try:
+            while True:
+                await self._receive(await self.websocket.receive_text())
+        except WebSocketDisconnect:
+            pass
+        finally:
+            calculator.cancel()
+            try:
+                await calculator
+            except (asyncio.CancelledError, WebSocketDisconnect, RuntimeError):
+                pass
+
+    async def _receive(self, text: str) -> None:
+        try:
+            message = live_message_adapter.validate_json(text)
+        except ValidationError as exc:
+            await self._send(
+                {
+                    "type": "error",
+                    "status": 422,
+                    "detail": exc.errors(include_url=False, include_context=False),
+                }
+            )
+            return
+        try:
+            self._apply(message)
+        except ValueError as exc:
+            await self._send(
+                {"type": "error", "seq": message.seq, "status": 422, "detail": str(exc)}
+            )
+            return
+        live_stats.edits += 1
+        self.seq = max(self.seq, message.seq)
+        # Opening a recipe is answered right away; edits wait for the burst.
+        self.last_edit = 0.0 if isinstance(message, LiveOpen) else self._now()
+        self._pending.set()
+
+    def _apply(self, message: Any) -> None:
+        if isinstance(message, LiveOpen):
+            self.draft = {
+                "recipe_name": message.recipe_name,
+                "servings": message.servings,
+                "ingredients": [item.model_dump() for item in message.ingredients],
+            }
+            self.include_contributions = message.include_contributions
+            self.last_result = {}
+            return
+        if self.draft is None:
+            raise ValueError("Send an 'open' message before editing.")
+        if isinstance(message, LiveRecipeEdit):
+            if message.recipe_name is not None:
+                self.draft["recipe_name"] = message.recipe_name
+            if message.servings is not None:
+                self.draft["servings"] = message.servings
+        elif isinstance(message, LiveIngredientEdit):
+            ingredients = self.draft["ingredients"]
+            if message.index > len(ingredients) or message.index >= LIVE_MAX_INGREDIENTS:
+                raise ValueError(f"No ingredient at index {message.index}.")
+            if message.index == len(ingredients):
+                ingredients.append(LiveIngredient().model_dump())
+            if message.name is not None:
+                ingredients[message.index]["name"] = message.name
+            if message.quantity_g is not None:
+                ingredients[message.index]["quantity_g"] = message.quantity_g
+        elif isinstance(message, LiveIngredientRemove):
+            if message.index >= len(self.draft["ingredients"]):
+                raise ValueError(f"No ingredient at index {message.index}.")
+            del self.draft["ingredients"][message.index]
+
+    def _now(self) -> float:
+        return asyncio.get_running_loop().time()
+
+    async def _calculate_loop(self) -> None:
+        while True:
+            await self._pending.wait()
+            deadline = self._now() + self.max_delay
+            while True:
+                wake = min(self.last_edit + self.debounce, deadline)
+                if self._now() >= wake:
+                    break
+                await asyncio.sleep(wake - self._now())
+            self._pending.clear()
+            await self._send(await self._calculate(self.seq))
+
+    async def _calculate(self, seq: int) -> dict[str, Any]:
+        try:
+            recipe = RecipeRequest(**self.draft)
+        except ValidationError as exc:
+            return {
+                "type": "error",
+                "seq": seq,
+                "status": 422,
+                "detail": exc.errors(include_url=False, include_context=False),
+            }
+        live_stats.calculations += 1
+        try:
+            result = await calculate_nutrition_async(
+                recipe,
+                include_contributions=self.include_contributions,
+                tenant_id=self.tenant_id,
+            )
+            payload = CalculationResponse(**result).model_dump(mode="json")
+        except IngredientNotFoundError as exc:
+            missing = ", ".join(exc.missing_ingredients)
+            return {
+                "type": "error",
+                "seq": seq,
+                "status": 404,
+                "detail": f"Ingredient(s) not found: {missing}",
+            }
+        except RecipeCycleError as exc:
+            return {"type": "error", "seq": seq, "status": 422, "detail": str(exc)}
+        except Exception:
+            return {
+                "type": "error",
+                "seq": seq,
+                "status": 500,
+                "detail": "Unable to calculate nutrition for this recipe.",
+            }
+        changed = {
+            key: value
+            for key, value in payload.items()
+            if key not in self.last_result or self.last_result[key] != value
+        }
+        self.last_result = payload
+        return {"type": "result", "seq": seq, "changed": changed}
+
+    async def _send(self, message: dict[str, Any]) -> None:
+        async with self._send_lock:
+            await self.websocket.send_json(message)
+
+
+async def serve_live_session(websocket: WebSocket, tenant_id: str | None) -> None:
+    if live_stats.active >= LIVE_MAX_SESSIONS:
+        live_stats.rejected += 1
+        # 1013: try again later.
+        await websocket.close(code=1013)
+        return
+    await websocket.accept()
+    live_stats.active += 1
+    live_stats.opened += 1
+    try:
+        await LiveSession(websocket, tenant_id).run()
+    finally:
+        live_stats.active -= 1
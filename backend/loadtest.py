@@ -0,0 +1,331 @@
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlsplit
+
+BACKEND_DIR = Path(__file__).resolve().parent
+DEFAULT_MIX = "calculate=70,generate-label=20,spa=10"
+ROUTE_TARGETS = {
+    "calculate": ("POST", "/calculate"),
+    "generate-label": ("POST", "/generate-label"),
+    "spa": ("GET", "/"),
+}
+PERCENTILES = (50, 90, 95, 99)
+
+
+def parse_mix(raw: str) -> list[tuple[str, float]]:
+    mix: list[tuple[str, float]] = []
+    for part in raw.split(","):
+        route, _, weight = part.partition("=")
+        route = route.strip()
+        if route not in ROUTE_TARGETS:
+            raise SystemExit(
+                f"Unknown route '{route}' in --mix; choose from {', '.join(ROUTE_TARGETS)}."
+            )
+        mix.append((route, float(weight or 1)))
+    return mix
+
+
+def _percentile(sorted_values: list[float], percent: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(percent / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def _summarize(samples: list[tuple[float, bool]], elapsed: float) -> dict[str, Any]:
+    latencies = sorted(latency for latency, _ in samples)
+    errors = sum(1 for _, ok in samples if not ok)
+    count = len(samples)
+    summary = {
+        "requests": count,
+        "errors": errors,
+        "error_rate": round(errors / count, 4) if count else 0.0,
+        "throughput_rps": round(count / elapsed, 2) if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "mean": round(sum(latencies) / count * 1000, 2) if count else 0.0,
+            "max": round(latencies[-1] * 1000, 2) if count else 0.0,
+        },
+    }
+    for percent in PERCENTILES:
+        summary["latency_ms"][f"p{percent}"] = round(
+            _percentile(latencies, percent) * 1000, 2
+        )
+    return summary
+
+
+def _make_recipe(rng: random.Random, catalog: list[str], size: int) -> bytes:
+    ingredients = [
+        {"name": rng.choice(catalog), "quantity_g": round(rng.uniform(5, 400), 1)}
+        for _ in range(size)
+    ]
+    return json.dumps(
+        {
+            "recipe_name": f"Load test {rng.randint(1, 10_000)}",
+            "servings": rng.randint(1, 8),
+            "ingredients": ingredients,
+        }
+    ).encode()
+
+
+def run_stage(
+    base_url: str,
+    mix: list[tuple[str, float]],
+    concurrency: int,
+    duration: float,
+    catalog: list[str],
+    ingredients_per_recipe: int,
+    headers: dict[str, str] | None = None,
+    path_prefix: str = "",
+    seed: int = 0,
+) -> dict[str, Any]:
+    parsed = urlsplit(base_url)
+    routes = [route for route, _ in mix]
+    weights = [weight for _, weight in mix]
+    samples: dict[str, list[tuple[float, bool]]] = {route: [] for route in routes}
+    samples_lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(worker_index: int) -> None:
+        rng = random.Random(seed * 1000 + worker_index)
+        connection = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=60)
+        local: dict[str, list[tuple[float, bool]]] = {route: [] for route in routes}
+        while time.perf_counter() < deadline:
+            route = rng.choices(routes, weights)[0]
+            method, path = ROUTE_TARGETS[route]
+            body = None
+            request_headers = dict(headers or {})
+            if method == "POST":
+                body = _make_recipe(rng, catalog, ingredients_per_recipe)
+                request_headers["Content-Type"] = "application/json"
+                path = path_prefix + path
+            started = time.perf_counter()
+            try:
+                connection.request(method, path, body=body, headers=request_headers)
+                response = connection.getresponse()
+                response.read()
+                ok = response.status < 400
+            except (OSError, http.client.HTTPException):
+                ok = False
+                connection.close()
+                connection = http.client.HTTPConnection(
+                    parsed.hostname, parsed.port, timeout=60
+                )
+            local[route].append((time.perf_counter() - started, ok))
+        connection.close()
+        with samples_lock:
+            for route, values in local.items():
+                samples[route].extend(values)
+
+    started = time.perf_counter()
+    threads = [
+        threading.Thread(target=worker, args=(index,), daemon=True)
+        for index in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    all_samples = [sample for values in samples.values() for sample in values]
+    return {
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 2),
+        "overall": _summarize(all_samples, elapsed),
+        "routes": {route: _summarize(values, elapsed) for route, values in samples.items()},
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def wait_for_ready(base_url: str, timeout: float = 60.0) -> None:
+    # /health answers before warm-up finishes; /ready only once it has, so the
+    # first stage does not measure cold-start latency.
+    parsed = urlsplit(base_url)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=2)
+            connection.request("GET", "/ready")
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"Server at {base_url} did not become ready in {timeout:.0f}s.")
+
+
+def prepare_catalog(db_path: Path, catalog_size: int) -> list[str]:
+    os.environ["NUTRITRACK_DB_PATH"] = str(db_path)
+    import database
+    from seed_data import SEED_INGREDIENTS, seed_ingredients
+
+    database.DB_PATH = db_path
+    database.init_db()
+    seed_ingredients()
+    rng = random.Random(7)
+    synthetic = [
+        {
+            "name": f"Synthetic ingredient {index:06d}",
+            "energy_kcal": round(rng.uniform(0, 900), 2),
+            "protein_g": round(rng.uniform(0, 30), 2),
+            "carbs_g": round(rng.uniform(0, 90), 2),
+            "sugar_g": round(rng.uniform(0, 40), 2),
+            "fat_g": round(rng.uniform(0, 90), 2),
+            "saturated_fat_g": round(rng.uniform(0, 40), 2),
+            "sodium_mg": round(rng.uniform(0, 2000), 2),
+        }
+        for index in range(max(0, catalog_size - len(SEED_INGREDIENTS)))
+    ]
+    with database.get_connection() as connection:
+        connection.executemany(
+            """
+            INSERT OR IGNORE INTO ingredients (
+                name, energy_kcal, protein_g, carbs_g, sugar_g, fat_g, saturated_fat_g, sodium_mg
+            ) VALUES (
+                :name, :energy_kcal, :protein_g, :carbs_g, :sugar_g, :fat_g,
+                :saturated_fat_g, :sodium_mg
+            )
+            """,
+            synthetic,
+        )
+        connection.commit()
+        rows = connection.execute("SELECT name FROM ingredients").fetchall()
+    return [row["name"] for row in rows]
+
+
+def start_server(
+    port: int, workers: int, env: dict[str, str] | None = None
+) -> subprocess.Popen:
+    command = [
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "main:app",
+        "--host",
+        "127.0.0.1",
+        "--port",
+        str(port),
+        "--workers",
+        str(workers),
+        "--log-level",
+        "warning",
+    ]
+    return subprocess.Popen(
+        command,
+        cwd=BACKEND_DIR,
+        env={**os.environ, **(env or {})},
+    )
+
+
+def _print_stage(stage: dict[str, Any]) -> None:
+    overall = stage["overall"]
+    latency = overall["latency_ms"]
+    print(
+        f"concurrency={stage['concurrency']:>4}  rps={overall['throughput_rps']:>9.2f}  "
+        f"p50={latency['p50']:>8.2f}ms  p95={latency['p95']:>8.2f}ms  "
+        f"p99={latency['p99']:>8.2f}ms  errors={overall['error_rate']:.2%}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Drive the NutriTrack API at fixed concurrency levels and report latency/throughput."
+    )
+    parser.add_argument(
+        "--base-url",
+        help="Target an already running server instead of starting one locally.",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers to start.")
+    parser.add_argument(
+        "--concurrency",
+        default="1,4,16,64",
+        help="Comma-separated client concurrency levels; one stage is run per level.",
+    )
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per stage.")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Route weights (default: {DEFAULT_MIX}).")
+    parser.add_argument(
+        "--catalog-size",
+        type=int,
+        default=0,
+        help="Pad the catalog with synthetic ingredients up to this many rows (local server only).",
+    )
+    parser.add_argument("--ingredients-per-recipe", type=int, default=8)
+    parser.add_argument("--report", type=Path, help="Write the JSON report to this path.")
+    parser.add_argument("--label", default="", help="Free-text tag stored in the report.")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    server = None
+    temp_dir = None
+    try:
+        if args.base_url:
+            base_url = args.base_url.rstrip("/")
+            from seed_data import SEED_INGREDIENTS
+
+            catalog = [item["name"] for item in SEED_INGREDIENTS]
+        else:
+            temp_dir = tempfile.TemporaryDirectory(prefix="nutritrack-loadtest-")
+            db_path = Path(temp_dir.name) / "nutrition.db"
+            catalog = prepare_catalog(db_path, args.catalog_size)
+            port = free_port()
+            base_url = f"http://127.0.0.1:{port}"
+            server = start_server(
+                port, args.workers, env={"NUTRITRACK_DB_PATH": str(db_path)}
+            )
+        wait_for_ready(base_url)
+
+        stages = []
+        for index, level in enumerate(int(value) for value in args.concurrency.split(",")):
+            stage = run_stage(
+                base_url=base_url,
+                mix=mix,
+                concurrency=level,
+                duration=args.duration,
+                catalog=catalog,
+                ingredients_per_recipe=args.ingredients_per_recipe,
+                seed=index,
+            )
+            _print_stage(stage)
+            stages.append(stage)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        if temp_dir is not None:
+            temp_dir.cleanup()
+
+    report = {
+        "label": args.label,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "target": args.base_url or "local",
+        "workers": None if args.base_url else args.workers,
+        "catalog_size": len(catalog),
+        "ingredients_per_recipe": args.ingredients_per_recipe,
+        "mix": dict(mix),
+        "stage_duration_s": args.duration,
+        "stages": stages,
+    }
+    if args.report:
+        args.report.write_text(json.dumps(report, indent=2))
+        print(f"Report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
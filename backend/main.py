@@ -1,25 +1,182 @@
-import re
-from io import BytesIO
+import hashlib
+import os
+from collections.abc import Iterator
 from pathlib import Path
 
-from fastapi import FastAPI, HTTPException
+from anyio.to_thread import current_default_thread_limiter
+from fastapi import FastAPI, Header, HTTPException, Query, Request, WebSocket
+from fastapi import Path as PathParam
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 
-from calculator import IngredientNotFoundError, calculate_nutrition
-from database import init_db
-from label_generator import generate_nutrition_label_pdf
-from models import CalculationResponse, RecipeRequest
+from admission import ADMISSION_ENABLED, AdmissionControlMiddleware, admission_gates
+from aliases import alias_index
+from calculator import (
+    ALLERGENS,
+    NUTRIENT_FIELDS,
+    IngredientNotFoundError,
+    RecipeCycleError,
+    calculate_nutrition_async,
+    compute_nutrition,
+    fetch_recipes_ingredient_map,
+    find_substitutes,
+)
+from catalog import (
+    admin_enabled,
+    delete_alias,
+    delete_ingredient,
+    is_admin_token,
+    list_aliases,
+    list_ingredients,
+    upsert_aliases,
+    upsert_ingredients,
+)
+from coalescing import (
+    calculation_flight,
+    coalesced_calculation,
+    coalesced_label_pdf,
+    label_flight,
+)
+from composites import composite_cache
+from compression import (
+    COMPRESSION_ENABLED,
+    COMPRESSION_MIN_BYTES,
+    CompressionMiddleware,
+    compressed_body_cache,
+)
+from database import (
+    CATALOG_SNAPSHOT_ENABLED,
+    TENANTS_SCOPE,
+    catalog_cache_version,
+    catalog_snapshot,
+    get_catalog_connection,
+    init_db,
+)
+from ingestion import (
+    internal_ingestion_enabled,
+    is_internal_token,
+    job_payload,
+    validate_bulk_job,
+)
+from jobs import JOB_KINDS, get_job, job_runner, submit_job, submit_job_payload
+from live import live_stats, serve_live_session
+from label_generator import (
+    LABEL_FORMATS,
+    generate_label_sheet_pdf,
+    label_cache_stats,
+    label_filename,
+    label_sheet_geometry,
+    render_label,
+)
+from models import (
+    BatchJobRequest,
+    CalculationResponse,
+    ComplianceSummary,
+    ContributionBreakdown,
+    IngredientDefinition,
+    JobStatus,
+    LabelSheetRequest,
+    RecipeRequest,
+    SavedRecipe,
+    SavedRecipeSummary,
+    SubstitutesResponse,
+)
+from query_log import QUERY_LOG_ENABLED, QueryCountMiddleware, query_log
+from recipes import (
+    compliance_summary,
+    delete_recipe,
+    get_recipe,
+    iter_compliance_csv,
+    list_recipes,
+    recipe_stats,
+    save_recipe,
+)
 from seed_data import seed_ingredients
+from substitutions import substitution_index
+from tenants import (
+    TENANT_ID_PATTERN,
+    delete_tenant_ingredient,
+    is_tenant_token,
+    list_tenant_ingredients,
+    tenant_catalog_cache,
+    upsert_tenant_ingredients,
+)
+from tracing import (
+    TRACE_ID_HEADER,
+    TRACING_ENABLED,
+    TracedRoute,
+    TracingMiddleware,
+    trace_exporter,
+)
+from warmup import warmup
 
+THREADPOOL_SIZE = int(os.getenv("NUTRITRACK_THREADPOOL_SIZE", "0"))
+LABEL_FORMAT_PATTERN = "^(" + "|".join(LABEL_FORMATS) + ")$"
+LABEL_MEDIA_TYPES = {
+    media_type.split(";")[0]: label_format
+    for label_format, (media_type, _) in LABEL_FORMATS.items()
+}
+LABEL_CACHE_CONTROL = "private, max-age=300"
+NUTRIENT_FIELD_PATTERN = "^(" + "|".join(NUTRIENT_FIELDS) + ")$"
+RULE_ID_PATTERN = r"^FSSAI-R\d+$"
+RULE_STATUS_PATTERN = "^(pass|warn|fail)$"
 BACKEND_DIR = Path(__file__).resolve().parent
 FRONTEND_DIST_DIR = BACKEND_DIR.parent / "frontend" / "dist"
+SPA_RESERVED_PATHS = {
+    "admin",
+    "api",
+    "async",
+    "calculate",
+    "contributions",
+    "debug",
+    "generate-label",
+    "generate-labels",
+    "health",
+    "internal",
+    "jobs",
+    "metrics",
+    "ready",
+    "recipes",
+    "reports",
+    "substitutes",
+    "tenants",
+    "ws",
+}
+SPA_RESERVED_PREFIXES = (
+    "admin",
+    "api/",
+    "async/",
+    "calculate",
+    "contributions",
+    "debug",
+    "generate-label",
+    "health",
+    "internal",
+    "jobs",
+    "metrics",
+    "ready",
+    "recipes",
+    "reports",
+    "substitutes",
+    "tenants",
+    "ws/",
+    "docs",
+    "redoc",
+    "openapi.json",
+)
 
 app = FastAPI(
     title="Automated Nutrition Label Generator API",
     version="1.0.0",
     description="FastAPI backend for calculating recipe nutrition and generating FSSAI-style labels.",
 )
+if TRACING_ENABLED:
+    app.router.route_class = TracedRoute
+
+if ADMISSION_ENABLED:
+    # Added before CORS so rejections still carry CORS headers.
+    app.add_middleware(AdmissionControlMiddleware, gates=admission_gates)
 
 app.add_middleware(
     CORSMiddleware,
@@ -27,13 +184,41 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[TRACE_ID_HEADER],
 )
 
+if COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware, cache=compressed_body_cache, min_bytes=COMPRESSION_MIN_BYTES
+    )
+
+if QUERY_LOG_ENABLED:
+    app.add_middleware(QueryCountMiddleware, log=query_log)
+
+if TRACING_ENABLED:
+    # Outermost, so the root span also covers admission queueing and rejections.
+    app.add_middleware(TracingMiddleware, exporter=trace_exporter)
+
 
 @app.on_event("startup")
 def startup_event() -> None:
-    init_db()
-    seed_ingredients()
+    if THREADPOOL_SIZE > 0:
+        current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    # Workers forked from a preloaded master inherit a finished warm-up; the
+    # master already created and seeded the database, so a recycled worker
+    # writes nothing to it.
+    if not warmup.ready:
+        init_db()
+        seed_ingredients()
+    if CATALOG_SNAPSHOT_ENABLED:
+        get_catalog_connection()
+    job_runner.start()
+    warmup.start()
+
+
+@app.on_event("shutdown")
+def shutdown_event() -> None:
+    job_runner.stop()
 
 
 @app.get("/health")
@@ -42,63 +227,762 @@ def health_check() -> dict:
     return {"status": "ok"}
 
 
+@app.get("/ready")
+@app.get("/api/ready", include_in_schema=False)
+def readiness_check() -> JSONResponse:
+    # Liveness stays on /health; this only succeeds once warm-up has run.
+    ready = warmup.ready
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content=warmup.stats(),
+        headers=None if ready else {"Retry-After": "1"},
+    )
+
+
+@app.get("/metrics")
+@app.get("/api/metrics", include_in_schema=False)
+def metrics() -> dict:
+    return {
+        "admission": {
+            route_class: gate.stats() for route_class, gate in admission_gates.items()
+        },
+        "coalescing": {
+            "calculate": calculation_flight.stats(),
+            "generate_label": label_flight.stats(),
+        },
+        "tenant_cache": tenant_catalog_cache.stats(),
+        "label_cache": label_cache_stats(),
+        "recipes": recipe_stats(),
+        "composite_cache": composite_cache.stats(),
+        "substitution_index": substitution_index.stats(),
+        "alias_index": alias_index.stats(),
+        "live_calculation": live_stats.stats(),
+        "compression": (
+            compressed_body_cache.stats() if COMPRESSION_ENABLED else {"enabled": False}
+        ),
+        "tracing": trace_exporter.stats(),
+        "warmup": warmup.stats(),
+        "catalog_version": catalog_cache_version(),
+        "tenants_version": catalog_cache_version(TENANTS_SCOPE),
+        "catalog_snapshot": (
+            catalog_snapshot.stats() if CATALOG_SNAPSHOT_ENABLED else {"enabled": False}
+        ),
+    }
+
+
+@app.get("/debug/queries")
+@app.get("/api/debug/queries", include_in_schema=False)
+def debug_queries(top: int = Query(default=20, ge=1, le=500)) -> dict:
+    return query_log.stats(top=top)
+
+
+def _require_tenant_token(
+    tenant_id: str, tenant_token: str | None, admin_token: str | None
+) -> None:
+    # The tenant's own token or the admin token may read or change its
+    # library and anything computed from it.
+    if tenant_token is None and admin_token is None:
+        raise HTTPException(status_code=401, detail="Missing tenant token.")
+    if is_tenant_token(tenant_id, tenant_token):
+        return
+    if admin_token is not None and admin_enabled() and is_admin_token(admin_token):
+        return
+    raise HTTPException(status_code=403, detail="Invalid tenant token.")
+
+
+def _require_tenant_scope(
+    tenant_id: str | None, tenant_token: str | None, admin_token: str | None
+) -> None:
+    # A tenant's proprietary values come back as per_100g and in labels, so
+    # selecting a tenant needs the same credential as editing its library.
+    if tenant_id is not None:
+        _require_tenant_token(tenant_id, tenant_token, admin_token)
+
+
 @app.post("/calculate", response_model=CalculationResponse)
 @app.post(
     "/api/calculate", response_model=CalculationResponse, include_in_schema=False
 )
-def calculate(recipe: RecipeRequest) -> CalculationResponse:
+def calculate(
+    recipe: RecipeRequest,
+    include_contributions: bool = False,
+    contribution_limit: int = Query(default=3, ge=1, le=50),
+    x_tenant_id: str | None = Header(default=None, pattern=TENANT_ID_PATTERN),
+    x_tenant_token: str | None = Header(default=None),
+    x_admin_token: str | None = Header(default=None),
+) -> CalculationResponse:
+    _require_tenant_scope(x_tenant_id, x_tenant_token, x_admin_token)
     try:
-        result = calculate_nutrition(recipe)
+        result = coalesced_calculation(
+            recipe,
+            tenant_id=x_tenant_id,
+            include_contributions=include_contributions,
+            contribution_limit=contribution_limit,
+        )
         return CalculationResponse(**result)
     except IngredientNotFoundError as exc:
         missing = ", ".join(exc.missing_ingredients)
         raise HTTPException(
             status_code=404, detail=f"Ingredient(s) not found: {missing}"
         ) from exc
+    except RecipeCycleError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
     except Exception as exc:
         raise HTTPException(
             status_code=500, detail="Unable to calculate nutrition for this recipe."
         ) from exc
 
 
-@app.post("/generate-label")
-@app.post("/api/generate-label", include_in_schema=False)
-def generate_label(recipe: RecipeRequest) -> StreamingResponse:
+@app.post("/contributions", response_model=ContributionBreakdown)
+@app.post(
+    "/api/contributions", response_model=ContributionBreakdown, include_in_schema=False
+)
+def contributions(
+    recipe: RecipeRequest,
+    limit: int = Query(default=5, ge=1, le=50),
+    x_tenant_id: str | None = Header(default=None, pattern=TENANT_ID_PATTERN),
+    x_tenant_token: str | None = Header(default=None),
+    x_admin_token: str | None = Header(default=None),
+) -> ContributionBreakdown:
+    _require_tenant_scope(x_tenant_id, x_tenant_token, x_admin_token)
     try:
-        result = calculate_nutrition(recipe)
+        result = coalesced_calculation(
+            recipe,
+            tenant_id=x_tenant_id,
+            include_contributions=True,
+            contribution_limit=limit,
+        )
+        return ContributionBreakdown(**result["contributions"])
     except IngredientNotFoundError as exc:
         missing = ", ".join(exc.missing_ingredients)
         raise HTTPException(
             status_code=404, detail=f"Ingredient(s) not found: {missing}"
         ) from exc
+    except RecipeCycleError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
     except Exception as exc:
         raise HTTPException(
             status_code=500, detail="Unable to calculate nutrition for this recipe."
         ) from exc
 
+
+@app.get("/substitutes", response_model=SubstitutesResponse)
+@app.get("/api/substitutes", response_model=SubstitutesResponse, include_in_schema=False)
+def substitutes(
+    ingredient: str = Query(..., min_length=1, max_length=100),
+    k: int = Query(default=5, ge=1, le=50),
+    avoid_allergen: str | None = Query(default=None),
+    reduce: str | None = Query(default=None, pattern=NUTRIENT_FIELD_PATTERN),
+    x_tenant_id: str | None = Header(default=None, pattern=TENANT_ID_PATTERN),
+    x_tenant_token: str | None = Header(default=None),
+    x_admin_token: str | None = Header(default=None),
+) -> SubstitutesResponse:
+    _require_tenant_scope(x_tenant_id, x_tenant_token, x_admin_token)
+    if avoid_allergen and avoid_allergen.strip().lower() not in ALLERGENS:
+        known = ", ".join(rule["allergen"] for rule in ALLERGENS.values())
+        raise HTTPException(
+            status_code=422, detail=f"Unknown allergen: {avoid_allergen}. Known: {known}"
+        )
+    try:
+        result = find_substitutes(
+            ingredient,
+            k,
+            avoid_allergen=avoid_allergen,
+            reduce=reduce,
+            tenant_id=x_tenant_id,
+        )
+        return SubstitutesResponse(**result)
+    except IngredientNotFoundError as exc:
+        missing = ", ".join(exc.missing_ingredients)
+        raise HTTPException(
+            status_code=404, detail=f"Ingredient(s) not found: {missing}"
+        ) from exc
+    except RecipeCycleError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    except Exception as exc:
+        raise HTTPException(
+            status_code=500, detail="Unable to find substitutes for this ingredient."
+        ) from exc
+
+
+def _negotiate_label_format(accept: str | None) -> str:
+    # Highest q-value wins; ties keep the client's order. Anything else,
+    # including */*, keeps the historical PDF default.
+    best_format, best_quality = "pdf", 0.0
+    for part in (accept or "").split(","):
+        media_type, *params = [token.strip() for token in part.split(";")]
+        label_format = LABEL_MEDIA_TYPES.get(media_type.lower())
+        if label_format is None:
+            continue
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if quality > best_quality:
+            best_format, best_quality = label_format, quality
+    return best_format
+
+
+def _rendered_label_response(
+    recipe: RecipeRequest, result: dict, label_format: str, request: Request
+) -> Response:
     try:
-        pdf_bytes = generate_nutrition_label_pdf(
+        body = render_label(
+            label_format,
             recipe_name=recipe.recipe_name,
             servings=recipe.servings,
             total_weight=result["total_weight"],
             per_100g=result["per_100g"],
             per_serving=result["per_serving"],
         )
+    except Exception as exc:
+        raise HTTPException(
+            status_code=500, detail="Unable to generate nutrition label."
+        ) from exc
+
+    media_type, _ = LABEL_FORMATS[label_format]
+    etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": LABEL_CACHE_CONTROL,
+        "Vary": "Accept",
+        "Content-Disposition": (
+            f'inline; filename="{label_filename(recipe.recipe_name, label_format)}"'
+        ),
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+@app.post("/generate-label")
+@app.post("/api/generate-label", include_in_schema=False)
+def generate_label(
+    recipe: RecipeRequest,
+    request: Request,
+    label_format: str | None = Query(
+        default=None, alias="format", pattern=LABEL_FORMAT_PATTERN
+    ),
+    x_tenant_id: str | None = Header(default=None, pattern=TENANT_ID_PATTERN),
+    x_tenant_token: str | None = Header(default=None),
+    x_admin_token: str | None = Header(default=None),
+) -> Response:
+    _require_tenant_scope(x_tenant_id, x_tenant_token, x_admin_token)
+    try:
+        result = coalesced_calculation(recipe, tenant_id=x_tenant_id)
+    except IngredientNotFoundError as exc:
+        missing = ", ".join(exc.missing_ingredients)
+        raise HTTPException(
+            status_code=404, detail=f"Ingredient(s) not found: {missing}"
+        ) from exc
+    except RecipeCycleError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    except Exception as exc:
+        raise HTTPException(
+            status_code=500, detail="Unable to calculate nutrition for this recipe."
+        ) from exc
+
+    label_format = label_format or _negotiate_label_format(request.headers.get("accept"))
+    if label_format != "pdf":
+        return _rendered_label_response(recipe, result, label_format, request)
+
+    try:
+        pdf_bytes = coalesced_label_pdf(recipe, result, tenant_id=x_tenant_id)
     except Exception as exc:
         raise HTTPException(
             status_code=500, detail="Unable to generate nutrition label PDF."
         ) from exc
 
-    safe_name = re.sub(r"[^A-Za-z0-9_-]+", "_", recipe.recipe_name).strip("_")
-    filename = f"{safe_name or 'nutrition_label'}.pdf"
+    filename = label_filename(recipe.recipe_name)
+
+    return Response(
+        content=pdf_bytes,
+        media_type="application/pdf",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+def _sheet_labels(recipes: list[RecipeRequest], ingredient_map: dict) -> Iterator[dict]:
+    for recipe in recipes:
+        result = compute_nutrition(recipe, ingredient_map)
+        yield {
+            "recipe_name": recipe.recipe_name,
+            "servings": recipe.servings,
+            "total_weight": result["total_weight"],
+            "per_100g": result["per_100g"],
+            "per_serving": result["per_serving"],
+        }
+
+
+@app.post("/generate-labels/sheet")
+@app.post("/api/generate-labels/sheet", include_in_schema=False)
+def generate_label_sheet(
+    payload: LabelSheetRequest,
+    x_tenant_id: str | None = Header(default=None, pattern=TENANT_ID_PATTERN),
+    x_tenant_token: str | None = Header(default=None),
+    x_admin_token: str | None = Header(default=None),
+) -> StreamingResponse:
+    _require_tenant_scope(x_tenant_id, x_tenant_token, x_admin_token)
+    try:
+        geometry = label_sheet_geometry(**payload.layout.model_dump())
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+    # Every ingredient is resolved before the first byte is sent, so a bad
+    # recipe still gets a 404 instead of a truncated PDF.
+    try:
+        ingredient_map = fetch_recipes_ingredient_map(payload.recipes, tenant_id=x_tenant_id)
+    except IngredientNotFoundError as exc:
+        missing = ", ".join(exc.missing_ingredients)
+        raise HTTPException(
+            status_code=404, detail=f"Ingredient(s) not found: {missing}"
+        ) from exc
+    except RecipeCycleError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    except Exception as exc:
+        raise HTTPException(
+            status_code=500, detail="Unable to calculate nutrition for these recipes."
+        ) from exc
 
     return StreamingResponse(
-        BytesIO(pdf_bytes),
+        generate_label_sheet_pdf(_sheet_labels(payload.recipes, ingredient_map), geometry),
+        media_type="application/pdf",
+        headers={"Content-Disposition": 'attachment; filename="nutrition_labels.pdf"'},
+    )
+
+
+@app.post("/async/calculate", response_model=CalculationResponse)
+@app.post(
+    "/api/async/calculate", response_model=CalculationResponse, include_in_schema=False
+)
+async def calculate_async(
+    recipe: RecipeRequest,
+    include_contributions: bool = False,
+    contribution_limit: int = Query(default=3, ge=1, le=50),
+    x_tenant_id: str | None = Header(default=None, pattern=TENANT_ID_PATTERN),
+    x_tenant_token: str | None = Header(default=None),
+    x_admin_token: str | None = Header(default=None),
+) -> CalculationResponse:
+    _require_tenant_scope(x_tenant_id, x_tenant_token, x_admin_token)
+    try:
+        result = await calculate_nutrition_async(
+            recipe,
+            include_contributions=include_contributions,
+            contribution_limit=contribution_limit,
+            tenant_id=x_tenant_id,
+        )
+        return CalculationResponse(**result)
+    except IngredientNotFoundError as exc:
+        missing = ", ".join(exc.missing_ingredients)
+        raise HTTPException(
+            status_code=404, detail=f"Ingredient(s) not found: {missing}"
+        ) from exc
+    except RecipeCycleError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    except Exception as exc:
+        raise HTTPException(
+            status_code=500, detail="Unable to calculate nutrition for this recipe."
+        ) from exc
+
+
+@app.websocket("/ws/calculate")
+@app.websocket("/api/ws/calculate")
+async def live_calculate(
+    websocket: WebSocket,
+    x_tenant_id: str | None = Header(default=None, pattern=TENANT_ID_PATTERN),
+    x_tenant_token: str | None = Header(default=None),
+    x_admin_token: str | None = Header(default=None),
+    tenant_id: str | None = Query(default=None, pattern=TENANT_ID_PATTERN),
+    tenant_token: str | None = Query(default=None),
+) -> None:
+    # Browsers cannot set headers on a WebSocket, so the tenant and its token
+    # may also come as query parameters.
+    tenant_id = x_tenant_id or tenant_id
+    try:
+        _require_tenant_scope(tenant_id, x_tenant_token or tenant_token, x_admin_token)
+    except HTTPException:
+        # 1008: policy violation; sent before accept, so the handshake fails.
+        await websocket.close(code=1008)
+        return
+    await serve_live_session(websocket, tenant_id)
+
+
+@app.post("/async/generate-label")
+@app.post("/api/async/generate-label", include_in_schema=False)
+async def generate_label_async(
+    recipe: RecipeRequest,
+    x_tenant_id: str | None = Header(default=None, pattern=TENANT_ID_PATTERN),
+    x_tenant_token: str | None = Header(default=None),
+    x_admin_token: str | None = Header(default=None),
+) -> Response:
+    _require_tenant_scope(x_tenant_id, x_tenant_token, x_admin_token)
+    try:
+        result = await calculate_nutrition_async(recipe, tenant_id=x_tenant_id)
+    except IngredientNotFoundError as exc:
+        missing = ", ".join(exc.missing_ingredients)
+        raise HTTPException(
+            status_code=404, detail=f"Ingredient(s) not found: {missing}"
+        ) from exc
+    except RecipeCycleError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    except Exception as exc:
+        raise HTTPException(
+            status_code=500, detail="Unable to calculate nutrition for this recipe."
+        ) from exc
+
+    try:
+        # Rendering is CPU-bound, so it still runs in the threadpool.
+        pdf_bytes = await run_in_threadpool(
+            coalesced_label_pdf, recipe, result, x_tenant_id
+        )
+    except Exception as exc:
+        raise HTTPException(
+            status_code=500, detail="Unable to generate nutrition label PDF."
+        ) from exc
+
+    filename = label_filename(recipe.recipe_name)
+
+    return Response(
+        content=pdf_bytes,
         media_type="application/pdf",
         headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
 
 
+def _job_status(job: dict) -> JobStatus:
+    total = job["total"]
+    return JobStatus(
+        id=job["id"],
+        kind=job["kind"],
+        status=job["status"],
+        total=total,
+        completed=job["completed"],
+        failed=job["failed"],
+        progress_percent=round(job["completed"] / total * 100.0, 2) if total else 0.0,
+        error=job["error"],
+        created_at=job["created_at"],
+        updated_at=job["updated_at"],
+        result_url=f"/jobs/{job['id']}/result" if job["status"] == "succeeded" else None,
+    )
+
+
+@app.post("/jobs", response_model=JobStatus, status_code=202)
+@app.post("/api/jobs", response_model=JobStatus, status_code=202, include_in_schema=False)
+def create_job(
+    request: BatchJobRequest,
+    x_tenant_id: str | None = Header(default=None, pattern=TENANT_ID_PATTERN),
+    x_tenant_token: str | None = Header(default=None),
+    x_admin_token: str | None = Header(default=None),
+) -> JobStatus:
+    _require_tenant_scope(x_tenant_id, x_tenant_token, x_admin_token)
+    job_id = submit_job(request.kind, request.recipes, tenant_id=x_tenant_id)
+    return _job_status(get_job(job_id))
+
+
+def _submit_bulk_job(body: bytes, tenant_id: str | None) -> dict:
+    rows = validate_bulk_job(body)
+    job_id = submit_job_payload(
+        rows["kind"], job_payload(rows["recipes"]), len(rows["recipes"]), tenant_id
+    )
+    return get_job(job_id)
+
+
+@app.post(
+    "/internal/jobs", response_model=JobStatus, status_code=202, include_in_schema=False
+)
+@app.post(
+    "/api/internal/jobs", response_model=JobStatus, status_code=202, include_in_schema=False
+)
+async def create_bulk_job(
+    request: Request,
+    x_internal_token: str | None = Header(default=None),
+    x_tenant_id: str | None = Header(default=None, pattern=TENANT_ID_PATTERN),
+) -> JobStatus:
+    # Trusted batch callers only: the body is validated in one TypeAdapter
+    # pass over plain dicts instead of building a model per recipe.
+    if not internal_ingestion_enabled():
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not is_internal_token(x_internal_token):
+        raise HTTPException(status_code=403, detail="Invalid internal token.")
+    body = await request.body()
+    job = await run_in_threadpool(_submit_bulk_job, body, x_tenant_id)
+    return _job_status(job)
+
+
+@app.get("/jobs/{job_id}", response_model=JobStatus)
+@app.get("/api/jobs/{job_id}", response_model=JobStatus, include_in_schema=False)
+def job_status(job_id: str) -> JobStatus:
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return _job_status(job)
+
+
+@app.get("/jobs/{job_id}/result")
+@app.get("/api/jobs/{job_id}/result", include_in_schema=False)
+def job_result(job_id: str) -> FileResponse:
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    if job["status"] != "succeeded":
+        raise HTTPException(
+            status_code=409, detail=f"Job {job_id} is {job['status']}; no result yet."
+        )
+    media_type, extension = JOB_KINDS[job["kind"]]
+    return FileResponse(
+        job["artifact_path"],
+        media_type=media_type,
+        filename=f"{job['kind']}_{job_id}.{extension}",
+    )
+
+
+@app.get("/tenants/{tenant_id}/ingredients", response_model=list[IngredientDefinition])
+@app.get(
+    "/api/tenants/{tenant_id}/ingredients",
+    response_model=list[IngredientDefinition],
+    include_in_schema=False,
+)
+def get_tenant_ingredients(
+    tenant_id: str = PathParam(..., pattern=TENANT_ID_PATTERN),
+    x_tenant_token: str | None = Header(default=None),
+    x_admin_token: str | None = Header(default=None),
+) -> list[IngredientDefinition]:
+    _require_tenant_token(tenant_id, x_tenant_token, x_admin_token)
+    return [IngredientDefinition(**row) for row in list_tenant_ingredients(tenant_id)]
+
+
+@app.put("/tenants/{tenant_id}/ingredients")
+@app.put("/api/tenants/{tenant_id}/ingredients", include_in_schema=False)
+def put_tenant_ingredients(
+    ingredients: list[IngredientDefinition],
+    tenant_id: str = PathParam(..., pattern=TENANT_ID_PATTERN),
+    x_tenant_token: str | None = Header(default=None),
+    x_admin_token: str | None = Header(default=None),
+) -> dict:
+    _require_tenant_token(tenant_id, x_tenant_token, x_admin_token)
+    upserted = upsert_tenant_ingredients(
+        tenant_id, [ingredient.model_dump() for ingredient in ingredients]
+    )
+    return {"tenant_id": tenant_id, "upserted": upserted}
+
+
+@app.delete("/tenants/{tenant_id}/ingredients/{name}")
+@app.delete("/api/tenants/{tenant_id}/ingredients/{name}", include_in_schema=False)
+def remove_tenant_ingredient(
+    name: str,
+    tenant_id: str = PathParam(..., pattern=TENANT_ID_PATTERN),
+    x_tenant_token: str | None = Header(default=None),
+    x_admin_token: str | None = Header(default=None),
+) -> dict:
+    _require_tenant_token(tenant_id, x_tenant_token, x_admin_token)
+    if not delete_tenant_ingredient(tenant_id, name):
+        raise HTTPException(
+            status_code=404, detail=f"Ingredient(s) not found: {name.strip()}"
+        )
+    return {"tenant_id": tenant_id, "deleted": name.strip()}
+
+
+def _require_admin(token: str | None) -> None:
+    if not admin_enabled():
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not is_admin_token(token):
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+
+
+@app.get(
+    "/admin/ingredients", response_model=list[IngredientDefinition], include_in_schema=False
+)
+@app.get(
+    "/api/admin/ingredients",
+    response_model=list[IngredientDefinition],
+    include_in_schema=False,
+)
+def get_catalog_ingredients(
+    x_admin_token: str | None = Header(default=None),
+) -> list[IngredientDefinition]:
+    _require_admin(x_admin_token)
+    return [IngredientDefinition(**row) for row in list_ingredients()]
+
+
+@app.put("/admin/ingredients", include_in_schema=False)
+@app.put("/api/admin/ingredients", include_in_schema=False)
+def put_catalog_ingredients(
+    ingredients: list[IngredientDefinition],
+    replace: bool = False,
+    x_admin_token: str | None = Header(default=None),
+) -> dict:
+    _require_admin(x_admin_token)
+    if replace and not ingredients:
+        raise HTTPException(status_code=422, detail="Refusing to replace the catalog with nothing.")
+    return upsert_ingredients(
+        [ingredient.model_dump() for ingredient in ingredients], replace=replace
+    )
+
+
+@app.delete("/admin/ingredients/{name}", include_in_schema=False)
+@app.delete("/api/admin/ingredients/{name}", include_in_schema=False)
+def remove_catalog_ingredient(
+    name: str,
+    x_admin_token: str | None = Header(default=None),
+) -> dict:
+    _require_admin(x_admin_token)
+    result = delete_ingredient(name)
+    if result is None:
+        raise HTTPException(
+            status_code=404, detail=f"Ingredient(s) not found: {name.strip()}"
+        )
+    return {"deleted": name.strip(), **result}
+
+
+@app.get("/admin/aliases", include_in_schema=False)
+@app.get("/api/admin/aliases", include_in_schema=False)
+def get_catalog_aliases(
+    x_admin_token: str | None = Header(default=None),
+) -> list[dict[str, str]]:
+    _require_admin(x_admin_token)
+    return list_aliases()
+
+
+@app.put("/admin/aliases", include_in_schema=False)
+@app.put("/api/admin/aliases", include_in_schema=False)
+def put_catalog_aliases(
+    aliases: dict[str, str],
+    x_admin_token: str | None = Header(default=None),
+) -> dict:
+    _require_admin(x_admin_token)
+    try:
+        return upsert_aliases(aliases)
+    except IngredientNotFoundError as exc:
+        missing = ", ".join(exc.missing_ingredients)
+        raise HTTPException(
+            status_code=404, detail=f"Ingredient(s) not found: {missing}"
+        ) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+
+@app.delete("/admin/aliases/{alias}", include_in_schema=False)
+@app.delete("/api/admin/aliases/{alias}", include_in_schema=False)
+def remove_catalog_alias(
+    alias: str,
+    x_admin_token: str | None = Header(default=None),
+) -> dict:
+    _require_admin(x_admin_token)
+    result = delete_alias(alias)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"Alias not found: {alias.strip()}")
+    return {"deleted": alias.strip(), **result}
+
+
+def _require_recipe_writer(
+    tenant_id: str | None, tenant_token: str | None, admin_token: str | None
+) -> None:
+    # Every tenant resolves composites from the global ("") recipes as well
+    # as its own, so only an admin may change those.
+    if tenant_id is None:
+        _require_admin(admin_token)
+    else:
+        _require_tenant_token(tenant_id, tenant_token, admin_token)
+
+
+@app.post("/recipes", response_model=SavedRecipe)
+@app.post("/api/recipes", response_model=SavedRecipe, include_in_schema=False)
+def create_recipe(
+    recipe: RecipeRequest,
+    x_tenant_id: str | None = Header(default=None, pattern=TENANT_ID_PATTERN),
+    x_tenant_token: str | None = Header(default=None),
+    x_admin_token: str | None = Header(default=None),
+) -> SavedRecipe:
+    _require_recipe_writer(x_tenant_id, x_tenant_token, x_admin_token)
+    try:
+        saved = save_recipe(recipe, tenant_id=x_tenant_id)
+    except IngredientNotFoundError as exc:
+        missing = ", ".join(exc.missing_ingredients)
+        raise HTTPException(
+            status_code=404, detail=f"Ingredient(s) not found: {missing}"
+        ) from exc
+    except RecipeCycleError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail="Unable to save this recipe.") from exc
+    return SavedRecipe(**saved)
+
+
+@app.get("/recipes", response_model=list[SavedRecipeSummary])
+@app.get("/api/recipes", response_model=list[SavedRecipeSummary], include_in_schema=False)
+def get_saved_recipes(
+    x_tenant_id: str | None = Header(default=None, pattern=TENANT_ID_PATTERN),
+    x_tenant_token: str | None = Header(default=None),
+    x_admin_token: str | None = Header(default=None),
+) -> list[SavedRecipeSummary]:
+    _require_tenant_scope(x_tenant_id, x_tenant_token, x_admin_token)
+    return [SavedRecipeSummary(**row) for row in list_recipes(x_tenant_id)]
+
+
+@app.get("/recipes/{recipe_name}", response_model=SavedRecipe)
+@app.get("/api/recipes/{recipe_name}", response_model=SavedRecipe, include_in_schema=False)
+def get_saved_recipe(
+    recipe_name: str,
+    x_tenant_id: str | None = Header(default=None, pattern=TENANT_ID_PATTERN),
+    x_tenant_token: str | None = Header(default=None),
+    x_admin_token: str | None = Header(default=None),
+) -> SavedRecipe:
+    _require_tenant_scope(x_tenant_id, x_tenant_token, x_admin_token)
+    saved = get_recipe(recipe_name, x_tenant_id)
+    if saved is None:
+        raise HTTPException(status_code=404, detail=f"Recipe not found: {recipe_name.strip()}")
+    return SavedRecipe(**saved)
+
+
+@app.delete("/recipes/{recipe_name}")
+@app.delete("/api/recipes/{recipe_name}", include_in_schema=False)
+def remove_recipe(
+    recipe_name: str,
+    x_tenant_id: str | None = Header(default=None, pattern=TENANT_ID_PATTERN),
+    x_tenant_token: str | None = Header(default=None),
+    x_admin_token: str | None = Header(default=None),
+) -> dict:
+    _require_recipe_writer(x_tenant_id, x_tenant_token, x_admin_token)
+    if not delete_recipe(recipe_name, x_tenant_id):
+        raise HTTPException(status_code=404, detail=f"Recipe not found: {recipe_name.strip()}")
+    return {"deleted": recipe_name.strip()}
+
+
+@app.get("/reports/compliance")
+@app.get("/api/reports/compliance", include_in_schema=False)
+def compliance_report(
+    rule_id: str | None = Query(default=None, pattern=RULE_ID_PATTERN),
+    status: str | None = Query(default=None, pattern=RULE_STATUS_PATTERN),
+    x_tenant_id: str | None = Header(default=None, pattern=TENANT_ID_PATTERN),
+    x_tenant_token: str | None = Header(default=None),
+    x_admin_token: str | None = Header(default=None),
+) -> StreamingResponse:
+    _require_tenant_scope(x_tenant_id, x_tenant_token, x_admin_token)
+    return StreamingResponse(
+        iter_compliance_csv(x_tenant_id, rule_id=rule_id, rule_status=status),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": 'attachment; filename="compliance_report.csv"'},
+    )
+
+
+@app.get("/reports/compliance/summary", response_model=ComplianceSummary)
+@app.get(
+    "/api/reports/compliance/summary",
+    response_model=ComplianceSummary,
+    include_in_schema=False,
+)
+def compliance_report_summary(
+    x_tenant_id: str | None = Header(default=None, pattern=TENANT_ID_PATTERN),
+    x_tenant_token: str | None = Header(default=None),
+    x_admin_token: str | None = Header(default=None),
+) -> ComplianceSummary:
+    _require_tenant_scope(x_tenant_id, x_tenant_token, x_admin_token)
+    return ComplianceSummary(**compliance_summary(x_tenant_id))
+
+
 def _frontend_ready() -> bool:
     return FRONTEND_DIST_DIR.exists() and (FRONTEND_DIST_DIR / "index.html").exists()
 
@@ -116,18 +1000,7 @@ def serve_frontend_root():
 
 @app.get("/{file_path:path}", include_in_schema=False)
 def serve_frontend_spa(file_path: str):
-    protected_paths = (
-        "api/",
-        "calculate",
-        "generate-label",
-        "health",
-        "docs",
-        "redoc",
-        "openapi.json",
-    )
-    if file_path in {"api", "calculate", "generate-label", "health"} or file_path.startswith(
-        protected_paths
-    ):
+    if file_path in SPA_RESERVED_PATHS or file_path.startswith(SPA_RESERVED_PREFIXES):
         raise HTTPException(status_code=404, detail="Not Found")
 
     if not _frontend_ready():
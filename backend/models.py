@@ -1,4 +1,21 @@
-from pydantic import BaseModel, Field, field_validator
+from typing import Annotated, Literal
+
+from pydantic import AfterValidator, BaseModel, Field, field_validator
+from typing_extensions import TypedDict
+
+
+def normalize_ingredient_name(value: str) -> str:
+    normalized = value.strip()
+    if not normalized:
+        raise ValueError("Ingredient name cannot be empty.")
+    return normalized
+
+
+def normalize_recipe_name(value: str) -> str:
+    normalized = value.strip()
+    if not normalized:
+        raise ValueError("Recipe name cannot be empty.")
+    return normalized
 
 
 class IngredientInput(BaseModel):
@@ -8,10 +25,7 @@ class IngredientInput(BaseModel):
     @field_validator("name")
     @classmethod
     def normalize_name(cls, value: str) -> str:
-        normalized = value.strip()
-        if not normalized:
-            raise ValueError("Ingredient name cannot be empty.")
-        return normalized
+        return normalize_ingredient_name(value)
 
 
 class RecipeRequest(BaseModel):
@@ -22,10 +36,23 @@ class RecipeRequest(BaseModel):
     @field_validator("recipe_name")
     @classmethod
     def normalize_recipe_name(cls, value: str) -> str:
-        normalized = value.strip()
-        if not normalized:
-            raise ValueError("Recipe name cannot be empty.")
-        return normalized
+        return normalize_recipe_name(value)
+
+
+class IngredientDefinition(BaseModel):
+    name: str = Field(..., min_length=1, max_length=100)
+    energy_kcal: float = Field(..., ge=0)
+    protein_g: float = Field(..., ge=0)
+    carbs_g: float = Field(..., ge=0)
+    sugar_g: float = Field(..., ge=0)
+    fat_g: float = Field(..., ge=0)
+    saturated_fat_g: float = Field(..., ge=0)
+    sodium_mg: float = Field(..., ge=0)
+
+    @field_validator("name")
+    @classmethod
+    def normalize_name(cls, value: str) -> str:
+        return normalize_ingredient_name(value)
 
 
 class NutritionInfo(BaseModel):
@@ -49,6 +76,11 @@ class HealthBarMetric(BaseModel):
     guidance: str
 
 
+class IngredientSubstitution(BaseModel):
+    ingredient: str
+    substitutes: list[str] = Field(default_factory=list)
+
+
 class RecipeAdjustment(BaseModel):
     nutrient_key: str
     nutrient_label: str
@@ -58,6 +90,7 @@ class RecipeAdjustment(BaseModel):
     percent_of_reference: float
     recommendation: str
     top_contributors: list[str] = Field(default_factory=list)
+    substitutions: list[IngredientSubstitution] = Field(default_factory=list)
 
 
 class FssaiSuggestion(BaseModel):
@@ -70,9 +103,23 @@ class AllergySuggestion(BaseModel):
     allergen: str
     detected_ingredients: list[str]
     alternatives: list[str] = Field(default_factory=list)
+    substitutions: list[IngredientSubstitution] = Field(default_factory=list)
     advice: str
 
 
+class IngredientSubstitute(BaseModel):
+    name: str
+    distance: float
+    per_100g: NutritionInfo
+
+
+class SubstitutesResponse(BaseModel):
+    ingredient: str
+    avoid_allergen: str | None = None
+    reduce: str | None = None
+    substitutes: list[IngredientSubstitute] = Field(default_factory=list)
+
+
 class FssaiRuleCheck(BaseModel):
     rule_id: str
     title: str
@@ -92,6 +139,25 @@ class FssaiComplianceReport(BaseModel):
     rulebook: list[FssaiRuleCheck] = Field(default_factory=list)
 
 
+class IngredientContribution(BaseModel):
+    name: str
+    quantity_g: float
+    per_serving: NutritionInfo
+    share_percent: NutritionInfo
+
+
+class ContributorRank(BaseModel):
+    name: str
+    value: float
+    unit: str
+    share_percent: float
+
+
+class ContributionBreakdown(BaseModel):
+    ingredients: list[IngredientContribution] = Field(default_factory=list)
+    top_contributors: dict[str, list[ContributorRank]] = Field(default_factory=dict)
+
+
 class CalculationResponse(BaseModel):
     per_100g: NutritionInfo
     per_serving: NutritionInfo
@@ -100,3 +166,135 @@ class CalculationResponse(BaseModel):
     fssai_suggestions: FssaiSuggestion
     allergy_alerts: list[AllergySuggestion] = Field(default_factory=list)
     fssai_compliance: FssaiComplianceReport
+    contributions: ContributionBreakdown | None = None
+
+
+class BatchJobRequest(BaseModel):
+    kind: Literal["labels", "calculations"]
+    recipes: list[RecipeRequest] = Field(..., min_length=1, max_length=50000)
+
+
+# Plain-dict mirrors of RecipeRequest/BatchJobRequest for trusted bulk
+# ingestion: same constraints and validators, so the same errors, but no
+# model instance is built per recipe or ingredient.
+class IngredientRow(TypedDict):
+    name: Annotated[
+        str, Field(min_length=1, max_length=100), AfterValidator(normalize_ingredient_name)
+    ]
+    quantity_g: Annotated[float, Field(gt=0)]
+
+
+class RecipeRow(TypedDict):
+    recipe_name: Annotated[
+        str, Field(min_length=1, max_length=150), AfterValidator(normalize_recipe_name)
+    ]
+    servings: Annotated[int, Field(gt=0)]
+    ingredients: Annotated[list[IngredientRow], Field(min_length=1)]
+
+
+class BulkJobRows(TypedDict):
+    kind: Literal["labels", "calculations"]
+    recipes: Annotated[list[RecipeRow], Field(min_length=1, max_length=50000)]
+
+
+class SavedRecipeSummary(BaseModel):
+    recipe_name: str
+    servings: int
+    status: Literal["ok", "missing_ingredients", "cycle"]
+    error: str | None = None
+    computed_at: str
+    updated_at: str
+
+
+class SavedRecipe(SavedRecipeSummary):
+    ingredients: list[IngredientInput]
+    nutrition: CalculationResponse | None = None
+
+
+class ComplianceRuleCounts(BaseModel):
+    rule_id: str
+    title: str
+    passed: int = Field(alias="pass")
+    warn: int
+    fail: int
+
+
+class ComplianceSummary(BaseModel):
+    tenant_id: str | None = None
+    recipes: int
+    by_recipe_status: dict[str, int] = Field(default_factory=dict)
+    by_compliance_status: dict[str, int] = Field(default_factory=dict)
+    rules: list[ComplianceRuleCounts] = Field(default_factory=list)
+
+
+class LabelSheetLayout(BaseModel):
+    page_size: Literal["A4", "letter"] = "A4"
+    columns: int = Field(default=3, ge=1, le=10)
+    rows: int = Field(default=7, ge=1, le=20)
+    label_width_mm: float = Field(default=63.5, gt=0)
+    label_height_mm: float = Field(default=38.1, gt=0)
+    column_gap_mm: float = Field(default=2.5, ge=0)
+    row_gap_mm: float = Field(default=0, ge=0)
+
+
+class LabelSheetRequest(BaseModel):
+    recipes: list[RecipeRequest] = Field(..., min_length=1, max_length=50000)
+    layout: LabelSheetLayout = Field(default_factory=LabelSheetLayout)
+
+
+class JobStatus(BaseModel):
+    id: str
+    kind: str
+    status: str
+    total: int
+    completed: int
+    failed: int
+    progress_percent: float
+    error: str | None = None
+    created_at: str
+    updated_at: str
+    result_url: str | None = None
+
+
+# Client messages on the /ws/calculate live-calculation channel. The draft a
+# session edits may be incomplete; it is validated as a RecipeRequest only
+# when it is calculated.
+class LiveIngredient(BaseModel):
+    name: str = Field(default="", max_length=100)
+    quantity_g: float = 0
+
+
+class LiveOpen(BaseModel):
+    type: Literal["open"]
+    seq: int = 0
+    recipe_name: str = Field(default="", max_length=150)
+    servings: int = 1
+    ingredients: list[LiveIngredient] = Field(default_factory=list, max_length=500)
+    include_contributions: bool = False
+
+
+class LiveRecipeEdit(BaseModel):
+    type: Literal["recipe"]
+    seq: int = 0
+    recipe_name: str | None = Field(default=None, max_length=150)
+    servings: int | None = None
+
+
+class LiveIngredientEdit(BaseModel):
+    type: Literal["ingredient"]
+    seq: int = 0
+    index: int = Field(..., ge=0)
+    name: str | None = Field(default=None, max_length=100)
+    quantity_g: float | None = None
+
+
+class LiveIngredientRemove(BaseModel):
+    type: Literal["remove"]
+    seq: int = 0
+    index: int = Field(..., ge=0)
+
+
+LiveMessage = Annotated[
+    LiveOpen | LiveRecipeEdit | LiveIngredientEdit | LiveIngredientRemove,
+    Field(discriminator="type"),
+]
@@ -0,0 +1,264 @@
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any
+
+QUERY_LOG_ENABLED = os.getenv("NUTRITRACK_QUERY_LOG", "0") == "1"
+SLOW_QUERY_MS = float(os.getenv("NUTRITRACK_SLOW_QUERY_MS", "25"))
+REQUEST_QUERY_WARN = int(os.getenv("NUTRITRACK_REQUEST_QUERY_WARN", "100"))
+RECENT_SLOW_QUERIES = 50
+RECENT_REQUESTS = 100
+MAX_STATEMENT_KEYS = 500
+
+logger = logging.getLogger("nutritrack.queries")
+
+_WHITESPACE = re.compile(r"\s+")
+# Chunked IN (...) lookups differ only in placeholder count; group them together.
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+def _statement_key(sql: str) -> str:
+    return _PLACEHOLDER_LIST.sub("(?, ...)", _WHITESPACE.sub(" ", sql).strip())
+
+
+class RequestQueries:
+    """Statements issued while serving one request.
+
+    Shared by every context copied from the request, so statements run in the
+    threadpool, ``asyncio.to_thread`` or the async reader thread all count.
+    """
+
+    __slots__ = ("statements", "total_ns", "slow")
+
+    def __init__(self) -> None:
+        self.statements = 0
+        self.total_ns = 0
+        self.slow = 0
+
+
+_request_queries: ContextVar[RequestQueries | None] = ContextVar(
+    "nutritrack_request_queries", default=None
+)
+
+
+class QueryLog:
+    """Per-statement timings, recent slow queries with plans, and per-request counts."""
+
+    def __init__(self, slow_query_ms: float) -> None:
+        self.slow_query_ms = slow_query_ms
+        self.statements = 0
+        self.slow = 0
+        self._slow_ns = int(slow_query_ms * 1_000_000)
+        self._by_statement: dict[str, list[int]] = {}
+        self._recent_slow: deque[dict[str, Any]] = deque(maxlen=RECENT_SLOW_QUERIES)
+        self._recent_requests: deque[dict[str, Any]] = deque(maxlen=RECENT_REQUESTS)
+        self._lock = threading.Lock()
+
+    def record(
+        self, connection: sqlite3.Connection, sql: str, params: Any, elapsed_ns: int
+    ) -> None:
+        key = _statement_key(sql)
+        slow = elapsed_ns >= self._slow_ns
+        request = _request_queries.get()
+        if request is not None:
+            request.statements += 1
+            request.total_ns += elapsed_ns
+            request.slow += slow
+        with self._lock:
+            self.statements += 1
+            entry = self._by_statement.get(key)
+            if entry is None and len(self._by_statement) < MAX_STATEMENT_KEYS:
+                entry = self._by_statement[key] = [0, 0, 0]
+            if entry is not None:
+                entry[0] += 1
+                entry[1] += elapsed_ns
+                entry[2] = max(entry[2], elapsed_ns)
+        if slow:
+            self._record_slow(connection, key, sql, params, elapsed_ns)
+
+    def _record_slow(
+        self,
+        connection: sqlite3.Connection,
+        key: str,
+        sql: str,
+        params: Any,
+        elapsed_ns: int,
+    ) -> None:
+        plan = _query_plan(connection, sql, params)
+        elapsed_ms = round(elapsed_ns / 1_000_000, 3)
+        with self._lock:
+            self.slow += 1
+            self._recent_slow.append(
+                {
+                    "statement": key,
+                    "elapsed_ms": elapsed_ms,
+                    "plan": plan,
+                    "at": time.time(),
+                }
+            )
+        logger.warning(
+            "Slow query (%.1f ms): %s\n  plan:\n    %s",
+            elapsed_ms,
+            key,
+            "\n    ".join(plan or ["(unavailable)" if plan is None else "(none)"]),
+        )
+
+    def finish_request(self, method: str, path: str, request: RequestQueries) -> None:
+        summary = {
+            "method": method,
+            "path": path,
+            "statements": request.statements,
+            "db_ms": round(request.total_ns / 1_000_000, 3),
+            "slow": request.slow,
+        }
+        with self._lock:
+            self._recent_requests.append(summary)
+        level = (
+            logging.WARNING
+            if request.statements >= REQUEST_QUERY_WARN or request.slow
+            else logging.DEBUG
+        )
+        if logger.isEnabledFor(level):
+            logger.log(
+                level,
+                "%s %s ran %d statements in %.1f ms (%d slow)",
+                method,
+                path,
+                request.statements,
+                summary["db_ms"],
+                request.slow,
+            )
+
+    def stats(self, top: int = 20) -> dict[str, Any]:
+        with self._lock:
+            by_statement = sorted(
+                self._by_statement.items(), key=lambda item: item[1][1], reverse=True
+            )[:top]
+            return {
+                "enabled": QUERY_LOG_ENABLED,
+                "slow_query_ms": self.slow_query_ms,
+                "request_query_warn": REQUEST_QUERY_WARN,
+                "statements": self.statements,
+                "slow_statements": self.slow,
+                "top_statements": [
+                    {
+                        "statement": key,
+                        "count": count,
+                        "total_ms": round(total_ns / 1_000_000, 3),
+                        "mean_ms": round(total_ns / count / 1_000_000, 3),
+                        "max_ms": round(max_ns / 1_000_000, 3),
+                    }
+                    for key, (count, total_ns, max_ns) in by_statement
+                ],
+                "recent_slow": list(self._recent_slow),
+                "recent_requests": list(self._recent_requests),
+            }
+
+
+def _query_plan(connection: sqlite3.Connection, sql: str, params: Any) -> list[str] | None:
+    # Rows are (id, parent, notused, detail); parents always come first, so
+    # depth can be resolved in one pass.
+    try:
+        rows = sqlite3.Connection.execute(
+            connection, f"EXPLAIN QUERY PLAN {sql}", params
+        ).fetchall()
+    except (sqlite3.Error, ValueError):
+        return None
+    depth: dict[int, int] = {0: -1}
+    plan = []
+    for node_id, parent_id, _, detail in rows:
+        depth[node_id] = depth.get(parent_id, -1) + 1
+        plan.append("  " * depth[node_id] + detail)
+    return plan
+
+
+query_log = QueryLog(slow_query_ms=SLOW_QUERY_MS)
+
+
+def _first_parameters(seq_of_parameters: list[Any]) -> Any:
+    return seq_of_parameters[0] if seq_of_parameters else ()
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    def execute(self, sql: str, parameters: Any = ()) -> sqlite3.Cursor:
+        started = time.perf_counter_ns()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            query_log.record(self.connection, sql, parameters, time.perf_counter_ns() - started)
+
+    def executemany(self, sql: str, seq_of_parameters: Any) -> sqlite3.Cursor:
+        seq_of_parameters = list(seq_of_parameters)
+        started = time.perf_counter_ns()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            query_log.record(
+                self.connection,
+                sql,
+                _first_parameters(seq_of_parameters),
+                time.perf_counter_ns() - started,
+            )
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose statements are timed and counted by ``query_log``.
+
+    Times cover ``execute`` itself: statement preparation and the first step,
+    which for the sorted, grouped and single-row lookups used here is where
+    the work happens. Row-by-row iteration afterwards is not included.
+    """
+
+    def cursor(self, factory: type = InstrumentedCursor) -> sqlite3.Cursor:
+        return super().cursor(factory)
+
+    def execute(self, sql: str, parameters: Any = ()) -> sqlite3.Cursor:
+        started = time.perf_counter_ns()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            query_log.record(self, sql, parameters, time.perf_counter_ns() - started)
+
+    def executemany(self, sql: str, seq_of_parameters: Any) -> sqlite3.Cursor:
+        # Materialized so the first row is still available for the query plan.
+        seq_of_parameters = list(seq_of_parameters)
+        started = time.perf_counter_ns()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            query_log.record(
+                self,
+                sql,
+                _first_parameters(seq_of_parameters),
+                time.perf_counter_ns() - started,
+            )
+
+
+connection_factory: type[sqlite3.Connection] = (
+    InstrumentedConnection if QUERY_LOG_ENABLED else sqlite3.Connection
+)
+
+
+class QueryCountMiddleware:
+    """Counts the statements each HTTP request runs and logs heavy requests."""
+
+    def __init__(self, app, log: QueryLog) -> None:
+        self.app = app
+        self.log = log
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request = RequestQueries()
+        token = _request_queries.set(request)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_queries.reset(token)
+            self.log.finish_request(scope["method"], scope["path"], request)
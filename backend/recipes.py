@@ -0,0 +1,486 @@
+import csv
+import io
+import json
+import sqlite3
+import threading
+from collections import defaultdict
+from collections.abc import Iterator
+from datetime import datetime, timezone
+from typing import Any
+
+from aliases import aliases_from, normalize_alias
+from calculator import (
+    IngredientNotFoundError,
+    RecipeCycleError,
+    compute_nutrition,
+    read_ingredient_map,
+)
+from database import RECIPES_SCOPE, catalog_write, get_connection
+from models import RecipeRequest
+
+
+RECIPE_ID_CHUNK = 500
+COMPLIANCE_REPORT_CHUNK = 500
+COMPLIANCE_REPORT_COLUMNS = (
+    "recipe_name",
+    "servings",
+    "recipe_status",
+    "compliance_status",
+    "rule_id",
+    "rule_title",
+    "rule_status",
+    "observation",
+    "computed_at",
+)
+
+_stats_lock = threading.Lock()
+_recompute_stats = {"runs": 0, "recipes": 0, "failed": 0}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _tenant_key(tenant_id: str | None) -> str:
+    # Recipes saved without a tenant header share the "" namespace, which keeps
+    # UNIQUE (tenant_id, name) effective (NULLs never collide in SQLite).
+    return tenant_id or ""
+
+
+def _compute(
+    recipe: RecipeRequest,
+    ingredient_map: dict[str, dict[str, Any]],
+    composite_errors: dict[str, Exception],
+) -> dict[str, Any]:
+    for item in recipe.ingredients:
+        error = composite_errors.get(item.name.lower())
+        if error is not None:
+            raise error
+    return compute_nutrition(recipe, ingredient_map)
+
+
+def _materialize(
+    recipe: RecipeRequest,
+    ingredient_map: dict[str, dict[str, Any]],
+    composite_errors: dict[str, Exception],
+) -> tuple[str | None, str, str | None]:
+    try:
+        result = _compute(recipe, ingredient_map, composite_errors)
+    except IngredientNotFoundError as exc:
+        return None, "missing_ingredients", str(exc)
+    except RecipeCycleError as exc:
+        return None, "cycle", str(exc)
+    return json.dumps(result), "ok", None
+
+
+def save_recipe(recipe: RecipeRequest, tenant_id: str | None = None) -> dict[str, Any]:
+    tenant_key = _tenant_key(tenant_id)
+    timestamp = _now()
+    # Saved recipes can be used as ingredients of other recipes, so saving one
+    # bumps the recipes version that the composite cache keys on. Caches built
+    # from the base catalog are untouched.
+    with catalog_write(RECIPES_SCOPE) as connection:
+        # Taking the write lock before reading the catalog means a concurrent
+        # catalog write either lands first (and is read here) or waits and
+        # then sees this recipe in its own recompute.
+        connection.execute("BEGIN IMMEDIATE")
+        ingredient_map, composite_errors = read_ingredient_map(
+            connection,
+            [item.name for item in recipe.ingredients],
+            tenant_id,
+            recipe_name=recipe.recipe_name,
+        )
+        result = _compute(recipe, ingredient_map, composite_errors)
+        recipe_id = connection.execute(
+            """
+            INSERT INTO recipes (
+                tenant_id, name, name_key, servings, nutrition, status, error,
+                computed_at, created_at, updated_at
+            ) VALUES (?, ?, ?, ?, ?, 'ok', NULL, ?, ?, ?)
+            ON CONFLICT(tenant_id, name_key) DO UPDATE SET
+                name = excluded.name,
+                servings = excluded.servings,
+                nutrition = excluded.nutrition,
+                status = 'ok',
+                error = NULL,
+                computed_at = excluded.computed_at,
+                updated_at = excluded.updated_at
+            RETURNING id
+            """,
+            (
+                tenant_key,
+                recipe.recipe_name,
+                normalize_alias(recipe.recipe_name),
+                recipe.servings,
+                json.dumps(result),
+                timestamp,
+                timestamp,
+                timestamp,
+            ),
+        ).fetchone()[0]
+        connection.execute("DELETE FROM recipe_ingredients WHERE recipe_id = ?", (recipe_id,))
+        connection.executemany(
+            """
+            INSERT INTO recipe_ingredients (recipe_id, position, name, name_key, quantity_g)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            [
+                (recipe_id, position, item.name, normalize_alias(item.name), item.quantity_g)
+                for position, item in enumerate(recipe.ingredients)
+            ],
+        )
+        recompute_recipes_for_ingredients(connection, [recipe.recipe_name], tenant_id)
+    return get_recipe(recipe.recipe_name, tenant_id)
+
+
+def _recipe_row(row: sqlite3.Row) -> dict[str, Any]:
+    return {
+        "recipe_name": row["name"],
+        "servings": row["servings"],
+        "status": row["status"],
+        "error": row["error"],
+        "computed_at": row["computed_at"],
+        "updated_at": row["updated_at"],
+    }
+
+
+def list_recipes(tenant_id: str | None = None) -> list[dict[str, Any]]:
+    with get_connection() as connection:
+        rows = connection.execute(
+            """
+            SELECT name, servings, status, error, computed_at, updated_at
+            FROM recipes
+            WHERE tenant_id = ?
+            ORDER BY name
+            """,
+            (_tenant_key(tenant_id),),
+        ).fetchall()
+    return [_recipe_row(row) for row in rows]
+
+
+def get_recipe(name: str, tenant_id: str | None = None) -> dict[str, Any] | None:
+    with get_connection() as connection:
+        row = connection.execute(
+            """
+            SELECT id, name, servings, nutrition, status, error, computed_at, updated_at
+            FROM recipes
+            WHERE tenant_id = ? AND name_key = ?
+            """,
+            (_tenant_key(tenant_id), normalize_alias(name)),
+        ).fetchone()
+        if row is None:
+            return None
+        ingredients = connection.execute(
+            """
+            SELECT name, quantity_g
+            FROM recipe_ingredients
+            WHERE recipe_id = ?
+            ORDER BY position
+            """,
+            (row["id"],),
+        ).fetchall()
+    return {
+        **_recipe_row(row),
+        "ingredients": [dict(item) for item in ingredients],
+        "nutrition": json.loads(row["nutrition"]) if row["nutrition"] else None,
+    }
+
+
+def delete_recipe(name: str, tenant_id: str | None = None) -> bool:
+    params = (_tenant_key(tenant_id), normalize_alias(name))
+    with catalog_write(RECIPES_SCOPE) as connection:
+        connection.execute(
+            """
+            DELETE FROM recipe_ingredients
+            WHERE recipe_id IN (SELECT id FROM recipes WHERE tenant_id = ? AND name_key = ?)
+            """,
+            params,
+        )
+        cursor = connection.execute(
+            "DELETE FROM recipes WHERE tenant_id = ? AND name_key = ?", params
+        )
+        if cursor.rowcount:
+            recompute_recipes_for_ingredients(connection, [name], tenant_id)
+    return cursor.rowcount > 0
+
+
+def _affected_recipe_ids(
+    connection: sqlite3.Connection, name_keys: list[str], tenant_id: str | None
+) -> list[int]:
+    # Walks the reverse index transitively: a recipe that uses a changed
+    # ingredient changes too, and so does every recipe using it as a
+    # composite. A tenant's recipes can use global ones, so a tenant-scoped
+    # walk passes through global recipes but only returns the tenant's own.
+    recipe_ids: set[int] = set()
+    visited = set(name_keys)
+    frontier = list(name_keys)
+    while frontier:
+        next_frontier: list[str] = []
+        for start in range(0, len(frontier), RECIPE_ID_CHUNK):
+            chunk = frontier[start : start + RECIPE_ID_CHUNK]
+            placeholders = ",".join(["?"] * len(chunk))
+            query = f"""
+                SELECT DISTINCT recipes.id, recipes.tenant_id, recipes.name_key
+                FROM recipe_ingredients
+                JOIN recipes ON recipes.id = recipe_ingredients.recipe_id
+                WHERE recipe_ingredients.name_key IN ({placeholders})
+            """
+            params: list[Any] = list(chunk)
+            if tenant_id is not None:
+                query += " AND recipes.tenant_id IN (?, '')"
+                params.append(tenant_id)
+            for recipe_id, recipe_tenant, name_key in connection.execute(query, params):
+                if tenant_id is None or recipe_tenant == tenant_id:
+                    recipe_ids.add(recipe_id)
+                if name_key not in visited:
+                    visited.add(name_key)
+                    next_frontier.append(name_key)
+        frontier = next_frontier
+    return sorted(recipe_ids)
+
+
+def _load_recipes(
+    connection: sqlite3.Connection, recipe_ids: list[int]
+) -> dict[str, list[tuple[int, RecipeRequest]]]:
+    rows_by_recipe: dict[int, dict[str, Any]] = {}
+    placeholders = ",".join(["?"] * len(recipe_ids))
+    rows = connection.execute(
+        f"""
+        SELECT recipes.id, recipes.tenant_id, recipes.name, recipes.servings,
+               recipe_ingredients.name AS ingredient_name, recipe_ingredients.quantity_g
+        FROM recipes
+        JOIN recipe_ingredients ON recipe_ingredients.recipe_id = recipes.id
+        WHERE recipes.id IN ({placeholders})
+        ORDER BY recipes.id, recipe_ingredients.position
+        """,
+        recipe_ids,
+    )
+    for row in rows:
+        entry = rows_by_recipe.setdefault(
+            row["id"],
+            {
+                "tenant_id": row["tenant_id"],
+                "recipe_name": row["name"],
+                "servings": row["servings"],
+                "ingredients": [],
+            },
+        )
+        entry["ingredients"].append(
+            {"name": row["ingredient_name"], "quantity_g": row["quantity_g"]}
+        )
+
+    by_tenant: dict[str, list[tuple[int, RecipeRequest]]] = defaultdict(list)
+    for recipe_id, entry in rows_by_recipe.items():
+        tenant_key = entry.pop("tenant_id")
+        by_tenant[tenant_key].append((recipe_id, RecipeRequest(**entry)))
+    return by_tenant
+
+
+def recompute_recipes_for_ingredients(
+    connection: sqlite3.Connection, names: list[str], tenant_id: str | None = None
+) -> int:
+    """Rematerializes saved recipes that use any of ``names``.
+
+    Runs on the caller's connection, inside its open catalog write, so the
+    ingredient change and the refreshed recipe rows commit (or roll back)
+    together. ``tenant_id=None`` means a base-catalog change, which can
+    affect recipes in every tenant.
+    """
+    name_keys = list(dict.fromkeys(normalize_alias(name) for name in names))
+    # Recipes may name a changed ingredient by any of its aliases.
+    changed = set(name_keys)
+    name_keys += [
+        alias
+        for alias, target in aliases_from(connection).items()
+        if normalize_alias(target) in changed and alias not in changed
+    ]
+    recipe_ids = _affected_recipe_ids(connection, name_keys, tenant_id)
+    timestamp = _now()
+    failed = 0
+    # Shared by every recipe in this pass, so each composite is evaluated once.
+    memo: dict[tuple[str, str], Any] = {}
+    for start in range(0, len(recipe_ids), RECIPE_ID_CHUNK):
+        chunk = recipe_ids[start : start + RECIPE_ID_CHUNK]
+        updates = []
+        for tenant_key, recipes in _load_recipes(connection, chunk).items():
+            ingredient_map, composite_errors = read_ingredient_map(
+                connection,
+                [item.name for _, recipe in recipes for item in recipe.ingredients],
+                tenant_key or None,
+                memo=memo,
+            )
+            for recipe_id, recipe in recipes:
+                nutrition, status, error = _materialize(
+                    recipe, ingredient_map, composite_errors
+                )
+                failed += status != "ok"
+                updates.append((nutrition, status, error, timestamp, recipe_id))
+        connection.executemany(
+            """
+            UPDATE recipes
+            SET nutrition = ?, status = ?, error = ?, computed_at = ?
+            WHERE id = ?
+            """,
+            updates,
+        )
+
+    with _stats_lock:
+        _recompute_stats["runs"] += 1
+        _recompute_stats["recipes"] += len(recipe_ids)
+        _recompute_stats["failed"] += failed
+    return len(recipe_ids)
+
+
+def _compliance_page_query(rule_filters: list[str]) -> str:
+    # The stored rulebook is expanded by SQLite's json_each, so no recipe's
+    # nutrition JSON is parsed in Python. Filters sit in the join condition:
+    # every recipe on the page still yields a row (with NULL rule columns if
+    # nothing matched), which keeps the keyset moving past it.
+    join_condition = " AND ".join(rule_filters) or "1"
+    return f"""
+        WITH page AS (
+            SELECT name, servings, status, nutrition, computed_at
+            FROM recipes
+            WHERE tenant_id = ? AND name > ?
+            ORDER BY name
+            LIMIT ?
+        )
+        SELECT
+            page.name,
+            page.servings,
+            page.status,
+            json_extract(page.nutrition, '$.fssai_compliance.status') AS compliance_status,
+            json_extract(rule.value, '$.rule_id') AS rule_id,
+            json_extract(rule.value, '$.title') AS rule_title,
+            json_extract(rule.value, '$.status') AS rule_status,
+            json_extract(rule.value, '$.observation') AS observation,
+            page.computed_at
+        FROM page
+        LEFT JOIN json_each(page.nutrition, '$.fssai_compliance.rulebook') AS rule
+            ON {join_condition}
+        ORDER BY page.name, rule.key
+    """
+
+
+def iter_compliance_rows(
+    tenant_id: str | None = None,
+    rule_id: str | None = None,
+    rule_status: str | None = None,
+) -> Iterator[tuple[Any, ...]]:
+    """Yields one row per saved recipe and rulebook check, in recipe name order.
+
+    Reads ``COMPLIANCE_REPORT_CHUNK`` recipes per statement on a fresh
+    connection, so memory stays flat and no read transaction is held open
+    while a slow client downloads the export. Recipes without stored
+    nutrition (missing ingredients, cycles) appear once with empty rule
+    columns, unless a rule filter is given.
+    """
+    rule_filters: list[str] = []
+    filter_params: list[Any] = []
+    if rule_id is not None:
+        rule_filters.append("json_extract(rule.value, '$.rule_id') = ?")
+        filter_params.append(rule_id)
+    if rule_status is not None:
+        rule_filters.append("json_extract(rule.value, '$.status') = ?")
+        filter_params.append(rule_status)
+    query = _compliance_page_query(rule_filters)
+    tenant_key = _tenant_key(tenant_id)
+    last_name = ""
+    while True:
+        with get_connection() as connection:
+            rows = connection.execute(
+                query, [tenant_key, last_name, COMPLIANCE_REPORT_CHUNK, *filter_params]
+            ).fetchall()
+        if not rows:
+            return
+        for row in rows:
+            if rule_filters and row["rule_id"] is None:
+                continue
+            yield tuple(row)
+        last_name = rows[-1]["name"]
+
+
+def iter_compliance_csv(
+    tenant_id: str | None = None,
+    rule_id: str | None = None,
+    rule_status: str | None = None,
+) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(COMPLIANCE_REPORT_COLUMNS)
+    pending = 1
+    for row in iter_compliance_rows(tenant_id, rule_id, rule_status):
+        writer.writerow(row)
+        pending += 1
+        if pending >= COMPLIANCE_REPORT_CHUNK:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue()
+
+
+def compliance_summary(tenant_id: str | None = None) -> dict[str, Any]:
+    tenant_key = _tenant_key(tenant_id)
+    with get_connection() as connection:
+        recipe_rows = connection.execute(
+            """
+            SELECT
+                status,
+                json_extract(nutrition, '$.fssai_compliance.status') AS compliance_status,
+                COUNT(*) AS count
+            FROM recipes
+            WHERE tenant_id = ?
+            GROUP BY 1, 2
+            """,
+            (tenant_key,),
+        ).fetchall()
+        rule_rows = connection.execute(
+            """
+            SELECT
+                json_extract(rule.value, '$.rule_id') AS rule_id,
+                json_extract(rule.value, '$.title') AS title,
+                json_extract(rule.value, '$.status') AS status,
+                COUNT(*) AS count
+            FROM recipes, json_each(recipes.nutrition, '$.fssai_compliance.rulebook') AS rule
+            WHERE recipes.tenant_id = ?
+            GROUP BY 1, 2, 3
+            ORDER BY 1
+            """,
+            (tenant_key,),
+        ).fetchall()
+
+    by_status: dict[str, int] = defaultdict(int)
+    by_compliance: dict[str, int] = defaultdict(int)
+    for row in recipe_rows:
+        by_status[row["status"]] += row["count"]
+        if row["compliance_status"] is not None:
+            by_compliance[row["compliance_status"]] += row["count"]
+    rules: dict[str, dict[str, Any]] = {}
+    for row in rule_rows:
+        rule = rules.setdefault(
+            row["rule_id"],
+            {"rule_id": row["rule_id"], "title": row["title"], "pass": 0, "warn": 0, "fail": 0},
+        )
+        rule[row["status"]] = rule.get(row["status"], 0) + row["count"]
+    return {
+        "tenant_id": tenant_id,
+        "recipes": sum(by_status.values()),
+        "by_recipe_status": dict(by_status),
+        "by_compliance_status": dict(by_compliance),
+        "rules": list(rules.values()),
+    }
+
+
+def recipe_stats() -> dict[str, Any]:
+    with get_connection() as connection:
+        rows = connection.execute(
+            "SELECT status, COUNT(*) AS count FROM recipes GROUP BY status"
+        ).fetchall()
+    with _stats_lock:
+        return {
+            "saved": {row["status"]: row["count"] for row in rows},
+            "recompute_runs": _recompute_stats["runs"],
+            "recomputed_recipes": _recompute_stats["recipes"],
+            "recomputed_failed": _recompute_stats["failed"],
+        }
@@ -1,4 +1,6 @@
-from database import init_db, get_connection
+from aliases import normalize_alias
+from catalog import write_aliases, write_ingredients
+from database import catalog_write, init_db
 
 
 SEED_INGREDIENTS = [
@@ -384,47 +386,81 @@ SEED_INGREDIENTS = [
     },
 ]
 
+# Regional, transliterated and everyday names for seeded ingredients.
+SEED_ALIASES = {
+    "atta": "Whole wheat flour",
+    "gehun atta": "Whole wheat flour",
+    "refined flour": "Maida",
+    "all purpose flour": "Maida",
+    "chini": "Sugar",
+    "shakkar": "Sugar",
+    "namak": "Salt",
+    "makhan": "Butter",
+    "doodh": "Milk",
+    "chawal": "Rice",
+    "anda": "Egg",
+    "eggs": "Egg",
+    "aloo": "Potato",
+    "pyaz": "Onion",
+    "kanda": "Onion",
+    "tamatar": "Tomato",
+    "gajar": "Carrot",
+    "patta gobhi": "Cabbage",
+    "matar": "Green peas",
+    "chana": "Chickpeas",
+    "kabuli chana": "Chickpeas",
+    "masoor dal": "Lentils",
+    "rajma": "Kidney beans",
+    "curd": "Yogurt",
+    "dahi": "Yogurt",
+    "kela": "Banana",
+    "seb": "Apple",
+    "badam": "Almonds",
+    "kaju": "Cashews",
+    "gur": "Jaggery",
+    "dhania": "Coriander leaves",
+    "cilantro": "Coriander leaves",
+    "palak": "Spinach",
+    "lehsun": "Garlic",
+    "adrak": "Ginger",
+    "shahad": "Honey",
+}
+
 
 def seed_ingredients() -> int:
-    with get_connection() as connection:
-        cursor = connection.cursor()
-        cursor.executemany(
-            """
-            INSERT INTO ingredients (
-                name,
-                energy_kcal,
-                protein_g,
-                carbs_g,
-                sugar_g,
-                fat_g,
-                saturated_fat_g,
-                sodium_mg
-            ) VALUES (
-                :name,
-                :energy_kcal,
-                :protein_g,
-                :carbs_g,
-                :sugar_g,
-                :fat_g,
-                :saturated_fat_g,
-                :sodium_mg
+    """Seeds an empty catalog and returns the number of ingredients written.
+
+    Once the catalog has rows it belongs to the admin routes: restarts never
+    overwrite edited values or bring back deleted ingredients. Aliases are
+    seeded the same way, only into an empty alias table.
+    """
+    with catalog_write() as connection:
+        seeded = 0
+        if connection.execute("SELECT 1 FROM ingredients LIMIT 1").fetchone() is None:
+            write_ingredients(connection, SEED_INGREDIENTS)
+            seeded = len(SEED_INGREDIENTS)
+        if connection.execute("SELECT 1 FROM ingredient_aliases LIMIT 1").fetchone() is None:
+            # Skip seeded aliases that are real ingredients or whose target is gone.
+            names = {
+                normalize_alias(row[0])
+                for row in connection.execute("SELECT name FROM ingredients")
+            }
+            write_aliases(
+                connection,
+                {
+                    alias: ingredient
+                    for alias, ingredient in SEED_ALIASES.items()
+                    if normalize_alias(alias) not in names
+                    and normalize_alias(ingredient) in names
+                },
             )
-            ON CONFLICT(name) DO UPDATE SET
-                energy_kcal = excluded.energy_kcal,
-                protein_g = excluded.protein_g,
-                carbs_g = excluded.carbs_g,
-                sugar_g = excluded.sugar_g,
-                fat_g = excluded.fat_g,
-                saturated_fat_g = excluded.saturated_fat_g,
-                sodium_mg = excluded.sodium_mg
-            """,
-            SEED_INGREDIENTS,
-        )
-        connection.commit()
-    return len(SEED_INGREDIENTS)
+    return seeded
 
 
 if __name__ == "__main__":
     init_db()
     count = seed_ingredients()
-    print(f"Seeded {count} ingredients into nutrition.db")
+    if count:
+        print(f"Seeded {count} ingredients into nutrition.db")
+    else:
+        print("Catalog already populated; nothing seeded")
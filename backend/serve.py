@@ -0,0 +1,145 @@
+import argparse
+import gc
+import logging
+import os
+import signal
+import sys
+import time
+
+import uvicorn
+
+logger = logging.getLogger("nutritrack.serve")
+
+# A worker that dies this soon after starting is treated as a crash, and the
+# master waits before replacing it instead of fork-looping.
+CRASH_WINDOW_SECONDS = 1.0
+CRASH_BACKOFF_SECONDS = 1.0
+STARTUP_FAILURE = 3
+
+
+def preload():
+    """Imports the app and does all shared, read-only setup in the master.
+
+    Everything built here (modules, the FSSAI rulebook, Pydantic validators,
+    ReportLab styles, label fonts and templates) is inherited by the workers
+    copy-on-write instead of being rebuilt in each of them.
+    """
+    from database import catalog_snapshot, init_db
+    from main import app
+    from seed_data import seed_ingredients
+    from warmup import warmup
+
+    init_db()
+    seed_ingredients()
+    warmup.run()
+    if warmup.status != "ready":
+        raise RuntimeError(f"Warm-up failed in the master process: {warmup.error}")
+    # SQLite handles must not cross fork(); each worker builds its own snapshot.
+    catalog_snapshot.reset()
+    return app
+
+
+class Master:
+    def __init__(self, config: uvicorn.Config, workers: int) -> None:
+        self.config = config
+        self.workers = workers
+        self.children: dict[int, float] = {}
+        self.stopping = False
+
+    def spawn(self, sockets) -> None:
+        pid = os.fork()
+        if pid:
+            self.children[pid] = time.monotonic()
+            return
+        # Worker: drop the master's handlers (uvicorn installs its own) and
+        # collect garbage again, now only for objects created after the fork.
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        gc.enable()
+        server = uvicorn.Server(self.config)
+        server.run(sockets=sockets)
+        sys.exit(0 if server.started else STARTUP_FAILURE)
+
+    def _stop(self, signum, _frame) -> None:
+        self.stopping = True
+        for pid in self.children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> None:
+        sockets = [self.config.bind_socket()]
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        # Freeze everything preloaded so the workers' collectors never touch
+        # (and so never copy) the shared pages.
+        gc.collect()
+        gc.freeze()
+        for _ in range(self.workers):
+            self.spawn(sockets)
+        logger.info("Master %d serving with %d workers", os.getpid(), self.workers)
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            started = self.children.pop(pid, None)
+            if started is None or self.stopping:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if code != 0 and time.monotonic() - started < CRASH_WINDOW_SECONDS:
+                logger.error("Worker %d exited with %d right after start", pid, code)
+                time.sleep(CRASH_BACKOFF_SECONDS)
+            else:
+                # A clean exit is a worker recycled after --max-requests.
+                logger.info("Worker %d exited with %d; starting a replacement", pid, code)
+            if not self.stopping:
+                self.spawn(sockets)
+
+        for sock in sockets:
+            sock.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Run the API with the app preloaded in a master that forks workers."
+    )
+    parser.add_argument("--host", default=os.getenv("NUTRITRACK_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("NUTRITRACK_PORT", "8000")))
+    parser.add_argument(
+        "--workers", type=int, default=int(os.getenv("NUTRITRACK_WORKERS", str(os.cpu_count() or 1)))
+    )
+    parser.add_argument(
+        "--max-requests",
+        type=int,
+        default=int(os.getenv("NUTRITRACK_MAX_REQUESTS", "10000")),
+        help="recycle a worker after this many requests (0 disables recycling)",
+    )
+    parser.add_argument(
+        "--max-requests-jitter",
+        type=int,
+        default=int(os.getenv("NUTRITRACK_MAX_REQUESTS_JITTER", "1000")),
+        help="random extra requests per worker, so workers do not recycle together",
+    )
+    parser.add_argument("--log-level", default=os.getenv("NUTRITRACK_LOG_LEVEL", "info"))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level.upper(), format="%(levelname)s:     %(message)s")
+    # Objects created while preloading go straight to the frozen generation.
+    gc.disable()
+    app = preload()
+    config = uvicorn.Config(
+        app,
+        host=args.host,
+        port=args.port,
+        log_level=args.log_level,
+        limit_max_requests=args.max_requests or None,
+        limit_max_requests_jitter=args.max_requests_jitter if args.max_requests else 0,
+    )
+    Master(config, max(1, args.workers)).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+import heapq
+import math
+import operator
+import os
+import statistics
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+from typing import Any
+
+from database import get_connection, on_catalog_write, read_catalog_version
+from tenants import INGREDIENT_COLUMNS
+from tracing import traced
+
+SUBSTITUTE_CACHE_SIZE = int(os.getenv("NUTRITRACK_SUBSTITUTE_CACHE_SIZE", "4096"))
+SUBSTITUTE_CHECK_SECONDS = float(os.getenv("NUTRITRACK_SUBSTITUTE_CHECK_SECONDS", "1"))
+KD_LEAF_SIZE = 8
+
+NUTRIENT_COLUMNS = INGREDIENT_COLUMNS[1:]
+_nutrient_values = operator.itemgetter(*NUTRIENT_COLUMNS)
+
+
+class KDTree:
+    """Static k-d tree over equal-length points, split at the median.
+
+    Internal nodes are ``(axis, split, left, right)`` tuples and leaves are
+    lists of point indices, so a query is plain tuple/list walking.
+    """
+
+    def __init__(self, points: list[tuple[float, ...]], leaf_size: int = KD_LEAF_SIZE) -> None:
+        self.points = points
+        self.leaf_size = max(1, leaf_size)
+        self.dimensions = len(points[0]) if points else 0
+        self._root = self._build(list(range(len(points))), 0) if points else None
+
+    def _build(self, indices: list[int], depth: int) -> Any:
+        if len(indices) <= self.leaf_size:
+            return indices
+        points = self.points
+        axis = depth % self.dimensions
+        indices.sort(key=lambda index: points[index][axis])
+        middle = len(indices) // 2
+        return (
+            axis,
+            points[indices[middle]][axis],
+            self._build(indices[:middle], depth + 1),
+            self._build(indices[middle:], depth + 1),
+        )
+
+    def nearest(
+        self,
+        target: Sequence[float],
+        k: int,
+        accept: Callable[[int], bool] | None = None,
+        below: tuple[int, float] | None = None,
+    ) -> list[tuple[float, int]]:
+        """The ``k`` closest accepted points as ``(distance, index)``, nearest first.
+
+        Rejected points are skipped during the search itself, so a filter
+        never leaves the result short while closer-than-worst candidates
+        remain unexplored. ``below=(axis, bound)`` additionally skips whole
+        subtrees whose points all lie at or above ``bound`` on that axis;
+        ``accept`` must reject those points too.
+        """
+        if self._root is None or k <= 0:
+            return []
+        bound_axis, bound = below if below is not None else (-1, 0.0)
+        points = self.points
+        # Max-heap of the best k so far, as (-distance, -index) so ties keep
+        # the lower catalog index.
+        best: list[tuple[float, int]] = []
+
+        def visit(node: Any) -> None:
+            if isinstance(node, list):
+                for index in node:
+                    if accept is not None and not accept(index):
+                        continue
+                    distance = math.dist(target, points[index])
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance, -index))
+                    elif (-distance, -index) > best[0]:
+                        heapq.heapreplace(best, (-distance, -index))
+                return
+            axis, split, left, right = node
+            offset = target[axis] - split
+            if axis == bound_axis and split > bound:
+                visit(left)
+                return
+            near, far = (left, right) if offset < 0 else (right, left)
+            visit(near)
+            if len(best) < k or abs(offset) <= -best[0][0]:
+                visit(far)
+
+        visit(self._root)
+        return sorted((-distance, -index) for distance, index in best)
+
+
+class _IndexState:
+    __slots__ = ("version", "names", "values", "scales", "by_name", "tree")
+
+    def __init__(
+        self,
+        version: int,
+        names: list[str],
+        values: list[tuple[float, ...]],
+    ) -> None:
+        self.version = version
+        self.names = names
+        self.values = values
+        # Nutrients live on very different scales (kcal vs grams vs mg), so
+        # each axis is divided by its spread across the catalog.
+        self.scales = tuple(
+            (statistics.pstdev(column) or 1.0) if len(values) > 1 else 1.0
+            for column in zip(*values)
+        ) or (1.0,) * len(NUTRIENT_COLUMNS)
+        self.by_name = {name.strip().lower(): index for index, name in enumerate(names)}
+        self.tree = KDTree([self.scale(row) for row in values])
+
+    def scale(self, values: Sequence[float]) -> tuple[float, ...]:
+        return tuple(value / scale for value, scale in zip(values, self.scales))
+
+
+class SubstitutionIndex:
+    """Nearest-neighbour index of the base ingredient catalog by nutrient profile.
+
+    Substitutes are the catalog ingredients closest to a profile in scaled
+    nutrient space, optionally excluding names (an allergen group, the recipe
+    itself) and keeping only those lower in one nutrient. The tree is rebuilt
+    when the catalog version changes, checked at most every
+    ``check_seconds`` and right after a catalog write in this process; while
+    one thread rebuilds, the others keep answering
+    from the previous tree. Results are cached per catalog version.
+    """
+
+    def __init__(self, check_seconds: float, cache_size: int) -> None:
+        self.check_seconds = check_seconds
+        self.cache_size = max(1, cache_size)
+        self.rebuilds = 0
+        self.build_ms: float | None = None
+        self.hits = 0
+        self.misses = 0
+        self._state: _IndexState | None = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._results: OrderedDict[tuple, list[dict[str, Any]]] = OrderedDict()
+        self._results_lock = threading.Lock()
+
+    def _current(self) -> _IndexState:
+        state = self._state
+        if state is not None and time.monotonic() - self._checked_at < self.check_seconds:
+            return state
+        # Only the first build blocks; later refreshes are done by whichever
+        # thread gets the lock while the rest keep using the current tree.
+        if not self._lock.acquire(blocking=state is None):
+            return state
+        try:
+            state = self._state
+            if state is None or time.monotonic() - self._checked_at >= self.check_seconds:
+                with get_connection() as connection:
+                    version = read_catalog_version(connection)
+                if state is None or state.version != version:
+                    state = self._build()
+                self._checked_at = time.monotonic()
+            return state
+        finally:
+            self._lock.release()
+
+    @traced("build_substitution_index")
+    def _build(self) -> _IndexState:
+        started = time.perf_counter()
+        with get_connection() as connection:
+            # One read transaction, so the version and the rows it covers agree.
+            connection.execute("BEGIN")
+            version = read_catalog_version(connection)
+            rows = connection.execute(
+                f"SELECT {', '.join(INGREDIENT_COLUMNS)} FROM ingredients ORDER BY id"
+            ).fetchall()
+        state = _IndexState(
+            version,
+            [row["name"] for row in rows],
+            [tuple(float(row[column]) for column in NUTRIENT_COLUMNS) for row in rows],
+        )
+        with self._results_lock:
+            self._state = state
+            self._results.clear()
+        self.rebuilds += 1
+        self.build_ms = round((time.perf_counter() - started) * 1000, 3)
+        return state
+
+    def expire(self) -> None:
+        self._checked_at = 0.0
+
+    def warm(self) -> int:
+        return len(self._current().names)
+
+    def profile(self, name: str) -> dict[str, float] | None:
+        state = self._current()
+        index = state.by_name.get(name.strip().lower())
+        if index is None:
+            return None
+        return dict(zip(NUTRIENT_COLUMNS, state.values[index]))
+
+    def substitutes(
+        self,
+        per_100g: dict[str, Any],
+        k: int,
+        exclude: frozenset[str] = frozenset(),
+        reduce: str | None = None,
+    ) -> list[dict[str, Any]]:
+        """Closest catalog ingredients to a per-100 g profile.
+
+        ``exclude`` holds lower-cased names that are never suggested; with
+        ``reduce``, only ingredients strictly lower in that nutrient qualify.
+        """
+        state = self._current()
+        target = _nutrient_values(per_100g)
+        key = (state.version, target, k, exclude, reduce)
+        with self._results_lock:
+            cached = self._results.get(key)
+            if cached is not None:
+                self._results.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        excluded = {state.by_name[name] for name in exclude if name in state.by_name}
+        scaled = state.scale(target)
+        below = None
+        if reduce is None:
+            accept = (lambda index: index not in excluded) if excluded else None
+        else:
+            axis = NUTRIENT_COLUMNS.index(reduce)
+            ceiling = target[axis]
+            values = state.values
+            below = (axis, scaled[axis])
+
+            def accept(index: int) -> bool:
+                return index not in excluded and values[index][axis] < ceiling
+
+        result = [
+            {
+                "name": state.names[index],
+                "distance": round(distance, 4),
+                "per_100g": dict(zip(NUTRIENT_COLUMNS, state.values[index])),
+            }
+            for distance, index in state.tree.nearest(scaled, k, accept, below)
+        ]
+        with self._results_lock:
+            if state is self._state:
+                self._results[key] = result
+                while len(self._results) > self.cache_size:
+                    self._results.popitem(last=False)
+        return result
+
+    def stats(self) -> dict[str, Any]:
+        state = self._state
+        return {
+            "version": None if state is None else state.version,
+            "ingredients": 0 if state is None else len(state.names),
+            "rebuilds": self.rebuilds,
+            "build_ms": self.build_ms,
+            "check_seconds": self.check_seconds,
+            "cached_results": len(self._results),
+            "cache_size": self.cache_size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+substitution_index = SubstitutionIndex(
+    check_seconds=SUBSTITUTE_CHECK_SECONDS, cache_size=SUBSTITUTE_CACHE_SIZE
+)
+on_catalog_write(substitution_index.expire)
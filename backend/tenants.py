@@ -0,0 +1,234 @@
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from async_database import async_reader
+from database import (
+    TENANTS_SCOPE,
+    catalog_cache_version,
+    catalog_write,
+    get_catalog_connection,
+    get_connection,
+)
+
+
+TENANT_CACHE_SIZE = int(os.getenv("NUTRITRACK_TENANT_CACHE_SIZE", "256"))
+TENANT_CACHE_TTL_SECONDS = float(os.getenv("NUTRITRACK_TENANT_CACHE_TTL_SECONDS", "30"))
+TENANT_ID_PATTERN = r"^[A-Za-z0-9_.-]{1,64}$"
+# "tenant=token,tenant=token": the write token of each tenant's library.
+TENANT_TOKENS = dict(
+    entry.strip().split("=", 1)
+    for entry in os.getenv("NUTRITRACK_TENANT_TOKENS", "").split(",")
+    if "=" in entry
+)
+
+INGREDIENT_COLUMNS = (
+    "name",
+    "energy_kcal",
+    "protein_g",
+    "carbs_g",
+    "sugar_g",
+    "fat_g",
+    "saturated_fat_g",
+    "sodium_mg",
+)
+
+
+def is_tenant_token(tenant_id: str, token: str | None) -> bool:
+    expected = TENANT_TOKENS.get(tenant_id)
+    return (
+        token is not None
+        and bool(expected)
+        and secrets.compare_digest(token.encode(), expected.encode())
+    )
+
+
+class TenantCatalogCache:
+    """Bounded LRU of per-tenant ingredient overrides, keyed by tenant id.
+
+    Only the tenant's own rows are cached; the shared base catalog is not
+    duplicated per tenant. Entries are dropped as soon as the tenant library
+    version they were read at changes, which every worker notices within a
+    second of a write, and in any case expire after ``ttl_seconds``.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float) -> None:
+        self.max_size = max(1, max_size)
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[
+            str, tuple[float, int | None, dict[str, dict[str, Any]]]
+        ] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(
+        self, tenant_id: str, version: int | None
+    ) -> dict[str, dict[str, Any]] | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(tenant_id)
+            if (
+                entry is not None
+                and now - entry[0] < self.ttl_seconds
+                and entry[1] == version
+            ):
+                self._entries.move_to_end(tenant_id)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+        return None
+
+    def store(
+        self,
+        tenant_id: str,
+        version: int | None,
+        overrides: dict[str, dict[str, Any]],
+    ) -> None:
+        with self._lock:
+            self._entries[tenant_id] = (time.monotonic(), version, overrides)
+            self._entries.move_to_end(tenant_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get(self, tenant_id: str) -> dict[str, dict[str, Any]]:
+        version = catalog_cache_version(TENANTS_SCOPE)
+        overrides = self.lookup(tenant_id, version)
+        if overrides is None:
+            overrides = _load_tenant_overrides(tenant_id)
+            self.store(tenant_id, version, overrides)
+        return overrides
+
+    def invalidate(self, tenant_id: str) -> None:
+        with self._lock:
+            self._entries.pop(tenant_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+TENANT_OVERRIDES_QUERY = f"""
+    SELECT {", ".join(INGREDIENT_COLUMNS)}
+    FROM tenant_ingredients
+    WHERE tenant_id = ?
+"""
+
+
+def overrides_by_name(rows: list[dict[str, Any]]) -> dict[str, dict[str, Any]]:
+    return {row["name"].strip().lower(): row for row in rows}
+
+
+def _load_tenant_overrides(tenant_id: str) -> dict[str, dict[str, Any]]:
+    with get_catalog_connection() as connection:
+        rows = connection.execute(TENANT_OVERRIDES_QUERY, (tenant_id,)).fetchall()
+    return overrides_by_name([dict(row) for row in rows])
+
+
+tenant_catalog_cache = TenantCatalogCache(
+    max_size=TENANT_CACHE_SIZE, ttl_seconds=TENANT_CACHE_TTL_SECONDS
+)
+
+
+def get_tenant_overrides(tenant_id: str) -> dict[str, dict[str, Any]]:
+    return tenant_catalog_cache.get(tenant_id)
+
+
+async def get_tenant_overrides_async(tenant_id: str) -> dict[str, dict[str, Any]]:
+    # Checking the version may read SQLite, so it runs on the reader thread.
+    version = await async_reader.call(catalog_cache_version, TENANTS_SCOPE)
+    overrides = tenant_catalog_cache.lookup(tenant_id, version)
+    if overrides is None:
+        rows = await async_reader.fetchall(TENANT_OVERRIDES_QUERY, (tenant_id,))
+        overrides = overrides_by_name(rows)
+        tenant_catalog_cache.store(tenant_id, version, overrides)
+    return overrides
+
+
+def list_tenant_ingredients(tenant_id: str) -> list[dict[str, Any]]:
+    query = f"""
+        SELECT {", ".join(INGREDIENT_COLUMNS)}
+        FROM tenant_ingredients
+        WHERE tenant_id = ?
+        ORDER BY name
+    """
+    with get_connection() as connection:
+        rows = connection.execute(query, (tenant_id,)).fetchall()
+    return [dict(row) for row in rows]
+
+
+def upsert_tenant_ingredients(tenant_id: str, ingredients: list[dict[str, Any]]) -> int:
+    # Imported here because recipes -> calculator -> tenants.
+    from recipes import recompute_recipes_for_ingredients
+
+    rows = [{"tenant_id": tenant_id, **ingredient} for ingredient in ingredients]
+    with catalog_write(TENANTS_SCOPE) as connection:
+        connection.executemany(
+            """
+            INSERT INTO tenant_ingredients (
+                tenant_id,
+                name,
+                energy_kcal,
+                protein_g,
+                carbs_g,
+                sugar_g,
+                fat_g,
+                saturated_fat_g,
+                sodium_mg
+            ) VALUES (
+                :tenant_id,
+                :name,
+                :energy_kcal,
+                :protein_g,
+                :carbs_g,
+                :sugar_g,
+                :fat_g,
+                :saturated_fat_g,
+                :sodium_mg
+            )
+            ON CONFLICT(tenant_id, name) DO UPDATE SET
+                energy_kcal = excluded.energy_kcal,
+                protein_g = excluded.protein_g,
+                carbs_g = excluded.carbs_g,
+                sugar_g = excluded.sugar_g,
+                fat_g = excluded.fat_g,
+                saturated_fat_g = excluded.saturated_fat_g,
+                sodium_mg = excluded.sodium_mg
+            """,
+            rows,
+        )
+        recompute_recipes_for_ingredients(
+            connection, [row["name"] for row in rows], tenant_id
+        )
+    tenant_catalog_cache.invalidate(tenant_id)
+    return len(rows)
+
+
+def delete_tenant_ingredient(tenant_id: str, name: str) -> bool:
+    from recipes import recompute_recipes_for_ingredients
+
+    with catalog_write(TENANTS_SCOPE) as connection:
+        cursor = connection.execute(
+            "DELETE FROM tenant_ingredients WHERE tenant_id = ? AND name = ?",
+            (tenant_id, name.strip()),
+        )
+        if cursor.rowcount:
+            recompute_recipes_for_ingredients(connection, [name], tenant_id)
+    tenant_catalog_cache.invalidate(tenant_id)
+    return cursor.rowcount > 0
@@ -0,0 +1,116 @@
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import anyio
+import pytest
+
+# The backend modules read their settings at import time, so the test database
+# and credentials are chosen before any of them is imported.
+TEST_DIR = Path(tempfile.mkdtemp())
+os.environ["NUTRITRACK_DB_PATH"] = str(TEST_DIR / "nutrition.db")
+os.environ["NUTRITRACK_JOB_ARTIFACT_DIR"] = str(TEST_DIR / "job_artifacts")
+os.environ["NUTRITRACK_ADMIN_TOKEN"] = "admin-secret"
+os.environ["NUTRITRACK_TENANT_TOKENS"] = "acme=acme-secret,globex=globex-secret"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture(scope="session", autouse=True)
+def seeded_catalog() -> None:
+    from database import init_db
+    from seed_data import seed_ingredients
+
+    init_db()
+    seed_ingredients()
+
+
+class Response:
+    def __init__(
+        self, status: int, headers: list[tuple[bytes, bytes]], chunks: list[bytes]
+    ) -> None:
+        self.status = status
+        self.headers = {name.decode().lower(): value.decode() for name, value in headers}
+        # Body messages as the app sent them, for checking streaming.
+        self.chunks = chunks
+        self.body = b"".join(chunks)
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class AppClient:
+    """Drives the ASGI app in-process (httpx, and so TestClient, is not installed)."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def arequest(
+        self, method: str, url: str, json_body=None, headers: dict[str, str] | None = None
+    ) -> Response:
+        parts = urlsplit(url)
+        body = b"" if json_body is None else json.dumps(json_body).encode()
+        raw_headers = [(b"host", b"testserver")]
+        if json_body is not None:
+            raw_headers.append((b"content-type", b"application/json"))
+        raw_headers += [
+            (name.lower().encode(), value.encode()) for name, value in (headers or {}).items()
+        ]
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": parts.path,
+            "raw_path": parts.path.encode(),
+            "query_string": parts.query.encode(),
+            "root_path": "",
+            "headers": raw_headers,
+            "client": ("127.0.0.1", 50000),
+            "server": ("testserver", 80),
+        }
+        messages = [{"type": "http.request", "body": body, "more_body": False}]
+        status = 0
+        response_headers: list[tuple[bytes, bytes]] = []
+        chunks: list[bytes] = []
+
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            await anyio.sleep_forever()
+
+        async def send(message) -> None:
+            nonlocal status, response_headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, send)
+        return Response(status, response_headers, chunks)
+
+    def request(self, method: str, url: str, json_body=None, headers=None) -> Response:
+        return anyio.run(self.arequest, method, url, json_body, headers)
+
+    def get(self, url: str, headers=None) -> Response:
+        return self.request("GET", url, headers=headers)
+
+    def post(self, url: str, json_body=None, headers=None) -> Response:
+        return self.request("POST", url, json_body, headers)
+
+    def put(self, url: str, json_body=None, headers=None) -> Response:
+        return self.request("PUT", url, json_body, headers)
+
+    def delete(self, url: str, headers=None) -> Response:
+        return self.request("DELETE", url, headers=headers)
+
+
+@pytest.fixture(scope="session")
+def client() -> AppClient:
+    from main import app
+
+    return AppClient(app)
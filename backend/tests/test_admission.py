@@ -0,0 +1,135 @@
+import asyncio
+
+from admission import AdmissionControlMiddleware, AdmissionGate, route_class_for
+
+
+class BlockingApp:
+    """ASGI app that holds each request until ``release`` is set."""
+
+    def __init__(self) -> None:
+        self.release = asyncio.Event()
+        self.started = 0
+
+    async def __call__(self, scope, receive, send) -> None:
+        self.started += 1
+        await self.release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def request(app, path: str = "/calculate") -> tuple[int, dict[bytes, bytes]]:
+    messages = []
+
+    async def send(message) -> None:
+        messages.append(message)
+
+    await app({"type": "http", "path": path}, None, send)
+    start = messages[0]
+    return start["status"], dict(start["headers"])
+
+
+def gate(limit: int = 1, queue: int = 1, timeout_seconds: float = 5.0) -> AdmissionGate:
+    return AdmissionGate("cheap", limit, queue, timeout_seconds, retry_after_seconds=3)
+
+
+def test_full_queue_is_rejected_with_429():
+    async def scenario():
+        inner = BlockingApp()
+        cheap = gate(limit=1, queue=1)
+        app = AdmissionControlMiddleware(inner, {"cheap": cheap})
+        running = asyncio.create_task(request(app))
+        queued = asyncio.create_task(request(app))
+        await asyncio.sleep(0.01)
+
+        status, headers = await request(app)
+        assert status == 429
+        assert headers[b"retry-after"] == b"3"
+        assert cheap.stats()["rejected_queue_full"] == 1
+
+        inner.release.set()
+        assert [status for status, _ in await asyncio.gather(running, queued)] == [200, 200]
+        assert cheap.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_queued_request_times_out_with_503():
+    async def scenario():
+        inner = BlockingApp()
+        cheap = gate(limit=1, queue=4, timeout_seconds=0.05)
+        app = AdmissionControlMiddleware(inner, {"cheap": cheap})
+        running = asyncio.create_task(request(app))
+        await asyncio.sleep(0.01)
+
+        status, headers = await request(app)
+        assert status == 503
+        assert headers[b"retry-after"] == b"3"
+        stats = cheap.stats()
+        assert stats["rejected_timeout"] == 1
+        assert stats["waiting"] == 0
+
+        inner.release.set()
+        assert (await running)[0] == 200
+        assert cheap.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_released_slots_go_to_waiters_in_arrival_order():
+    async def scenario():
+        cheap = gate(limit=1, queue=3)
+        assert await cheap.acquire() is None
+        order = []
+
+        async def waiter(name: str) -> None:
+            assert await cheap.acquire() is None
+            order.append(name)
+
+        tasks = []
+        for name in ("first", "second", "third"):
+            tasks.append(asyncio.create_task(waiter(name)))
+            await asyncio.sleep(0)
+        for _ in tasks:
+            cheap.release()
+            await asyncio.sleep(0)
+        cheap.release()
+        await asyncio.gather(*tasks)
+        assert order == ["first", "second", "third"]
+        assert cheap.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        cheap = gate(limit=1, queue=2)
+        assert await cheap.acquire() is None
+        waiter = asyncio.create_task(cheap.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert cheap.stats()["waiting"] == 0
+        cheap.release()
+        assert cheap.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_unlisted_paths_are_not_limited():
+    async def scenario():
+        inner = BlockingApp()
+        inner.release.set()
+        cheap = gate(limit=1, queue=0)
+        app = AdmissionControlMiddleware(inner, {"cheap": cheap})
+        assert await cheap.acquire() is None
+        assert (await request(app, "/metrics"))[0] == 200
+        assert (await request(app, "/api/calculate"))[0] == 429
+
+    asyncio.run(scenario())
+
+
+def test_route_classes_strip_api_and_async_prefixes():
+    assert route_class_for("/api/async/calculate") == "cheap"
+    assert route_class_for("/async/calculate") == "cheap"
+    assert route_class_for("/api/generate-label/") == "expensive"
+    assert route_class_for("/") is None
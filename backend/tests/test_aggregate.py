@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+from calculator import NUTRIENT_FIELDS, _RecipeAggregate
+from models import RecipeRequest
+
+
+def ingredient_map(rng: random.Random, count: int) -> dict[str, dict]:
+    return {
+        f"item {index}": {field: rng.uniform(0, 400) for field in NUTRIENT_FIELDS}
+        for index in range(count)
+    }
+
+
+def recipe(lines: list[tuple[str, float]], servings: int = 1) -> RecipeRequest:
+    return RecipeRequest(
+        recipe_name="Aggregate check",
+        servings=servings,
+        ingredients=[{"name": name, "quantity_g": grams} for name, grams in lines],
+    )
+
+
+def naive_totals(lines: list[tuple[str, float]], rows: dict[str, dict]) -> dict[str, float]:
+    totals = dict.fromkeys(NUTRIENT_FIELDS, 0.0)
+    for name, grams in lines:
+        for field in NUTRIENT_FIELDS:
+            totals[field] += rows[name.lower()][field] * grams / 100.0
+    return totals
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_tuple_totals_match_a_per_field_sum(seed):
+    rng = random.Random(seed)
+    rows = ingredient_map(rng, 20)
+    lines = [(f"Item {rng.randrange(20)}", rng.uniform(0.5, 500)) for _ in range(40)]
+    aggregate = _RecipeAggregate(recipe(lines), rows)
+
+    assert aggregate.total_weight == pytest.approx(sum(grams for _, grams in lines))
+    expected = naive_totals(lines, rows)
+    assert dict(zip(NUTRIENT_FIELDS, aggregate.totals)) == pytest.approx(expected)
+    assert len(aggregate.contributions) == len(lines)
+    for (name, grams), contribution in zip(lines, aggregate.contributions):
+        assert contribution == pytest.approx(
+            tuple(rows[name.lower()][field] * grams / 100.0 for field in NUTRIENT_FIELDS)
+        )
+
+
+def test_rankings_match_a_sorted_scan():
+    rng = random.Random(7)
+    rows = ingredient_map(rng, 12)
+    rows["item 3"]["sodium_mg"] = 0
+    lines = [(f"Item {index}", rng.uniform(1, 300)) for index in range(12)]
+    aggregate = _RecipeAggregate(recipe(lines, servings=4), rows)
+
+    rankings = aggregate.rankings(limit=5, servings=4)
+    assert set(rankings) == set(NUTRIENT_FIELDS)
+    for index, field in enumerate(NUTRIENT_FIELDS):
+        ordered = sorted(
+            (
+                (name, contribution[index] / 4)
+                for (name, _), contribution in zip(lines, aggregate.contributions)
+                if contribution[index] > 0
+            ),
+            key=lambda item: -item[1],
+        )[:5]
+        assert [name for name, _ in rankings[field]] == [name for name, _ in ordered]
+        assert [value for _, value in rankings[field]] == pytest.approx(
+            [value for _, value in ordered]
+        )
+    assert "Item 3" not in [name for name, _ in rankings["sodium_mg"]]
+
+
+def test_rankings_drop_zero_contributors_and_keep_line_order_on_ties():
+    rows = {
+        "salt": dict.fromkeys(NUTRIENT_FIELDS, 0.0) | {"sodium_mg": 100.0},
+        "water": dict.fromkeys(NUTRIENT_FIELDS, 0.0),
+    }
+    lines = [("Water", 50), ("Salt", 10), ("salt", 10), ("Water", 5)]
+    rankings = _RecipeAggregate(recipe(lines), rows).rankings(limit=3, servings=2)
+    # Repeated lines stay separate entries, the earlier one first.
+    assert rankings["sodium_mg"] == [("Salt", 5.0), ("salt", 5.0)]
+    assert rankings["energy_kcal"] == []
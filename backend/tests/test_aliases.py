@@ -0,0 +1,123 @@
+import pytest
+
+from aliases import alias_index, catalog_targets, normalize_alias
+from calculator import IngredientNotFoundError, calculate_nutrition
+from catalog import delete_alias, list_aliases, upsert_aliases, upsert_ingredients
+from database import catalog_cache_version
+from models import RecipeRequest
+from recipes import get_recipe, save_recipe
+from tenants import upsert_tenant_ingredients
+
+ADMIN = {"X-Admin-Token": "admin-secret"}
+
+
+def recipe(*lines: tuple[str, float], name: str = "Alias check") -> RecipeRequest:
+    return RecipeRequest(
+        recipe_name=name,
+        servings=1,
+        ingredients=[{"name": item, "quantity_g": grams} for item, grams in lines],
+    )
+
+
+def ingredient(name: str, energy_kcal: float) -> dict:
+    return {
+        "name": name,
+        "energy_kcal": energy_kcal,
+        "protein_g": 1,
+        "carbs_g": 1,
+        "sugar_g": 0,
+        "fat_g": 0,
+        "saturated_fat_g": 0,
+        "sodium_mg": 0,
+    }
+
+
+def test_normalization_folds_width_case_and_spacing():
+    assert normalize_alias("ＤＡＨＩ") == "dahi"
+    assert normalize_alias("  patta \t gobhi ") == "patta gobhi"
+    assert normalize_alias("STRAßE") == normalize_alias("strasse")
+    assert normalize_alias("ﬁsh") == "fish"
+
+
+def test_targets_map_aliases_and_keep_other_names():
+    aliases = {"chini": "sugar"}
+    assert catalog_targets(["chini", "rice", "ｃｈｉｎｉ"], aliases) == {
+        "chini": "sugar",
+        "rice": "rice",
+        "ｃｈｉｎｉ": "sugar",
+    }
+
+
+@pytest.mark.parametrize("spelling", ["dahi", "ＤＡＨＩ", "  Dahi ", "curd"])
+def test_aliases_count_as_their_catalog_ingredient(spelling):
+    # Identical results include the rule checks, which match catalog names.
+    assert calculate_nutrition(recipe((spelling, 120))) == calculate_nutrition(
+        recipe(("Yogurt", 120))
+    )
+
+
+def test_alias_index_is_rebuilt_once_per_version():
+    alias_index.current()
+    rebuilds = alias_index.rebuilds
+    for _ in range(3):
+        alias_index.current()
+    assert alias_index.rebuilds == rebuilds
+
+    upsert_aliases({"Ｍｉｔｈａｉ  sugar": "Sugar"})
+    assert alias_index.current()["mithai sugar"] == "sugar"
+    assert alias_index.rebuilds == rebuilds + 1
+    assert {"alias": "mithai sugar", "ingredient": "Sugar"} in list_aliases()
+
+
+def test_repeated_alias_writes_keep_the_version():
+    upsert_aliases({"gud": "Jaggery"})
+    version = catalog_cache_version()
+    result = upsert_aliases({"GUD": "jaggery"})
+    assert result["changed"] == 0
+    assert result["version"] == version
+
+
+def test_re_pointed_aliases_recompute_saved_recipes():
+    upsert_aliases({"house sweetener": "Sugar"})
+    save_recipe(recipe(("house sweetener", 100), name="Sweetened"))
+    sugar = get_recipe("Sweetened")["nutrition"]["per_100g"]["energy_kcal"]
+
+    result = upsert_aliases({"House Sweetener": "Honey"})
+    assert result["recomputed_recipes"] >= 1
+    honey = calculate_nutrition(recipe(("Honey", 100)))["per_100g"]["energy_kcal"]
+    assert get_recipe("Sweetened")["nutrition"]["per_100g"]["energy_kcal"] == honey != sugar
+
+    assert delete_alias("house sweetener") is not None
+    assert get_recipe("Sweetened")["status"] == "missing_ingredients"
+
+
+def test_catalog_names_win_over_aliases():
+    upsert_aliases({"kodo": "Rice"})
+    upsert_ingredients([ingredient("Kodo", 330)])
+    assert "kodo" not in alias_index.current()
+    assert calculate_nutrition(recipe(("KODO", 100)))["per_100g"]["energy_kcal"] == 330
+
+
+def test_tenant_rows_match_the_alias_then_the_catalog_name():
+    upsert_tenant_ingredients("alias-tenant", [ingredient("Yogurt", 40)])
+    result = calculate_nutrition(recipe(("dahi", 100)), tenant_id="alias-tenant")
+    assert result["per_100g"]["energy_kcal"] == 40
+
+    upsert_tenant_ingredients("alias-tenant", [ingredient("Dahi", 55)])
+    result = calculate_nutrition(recipe(("dahi", 100)), tenant_id="alias-tenant")
+    assert result["per_100g"]["energy_kcal"] == 55
+
+
+def test_alias_routes_validate_their_targets(client):
+    assert client.put("/admin/aliases", {"kanda": "Onion"}).status == 403
+    assert client.put("/admin/aliases", {"kanda": "Onion"}, headers=ADMIN).status == 200
+    missing = client.put("/admin/aliases", {"kanda": "Unobtainium"}, headers=ADMIN)
+    assert missing.status == 404
+    assert missing.json()["detail"] == "Ingredient(s) not found: Unobtainium"
+    assert client.put("/admin/aliases", {"RICE": "Sugar"}, headers=ADMIN).status == 422
+    assert client.put("/admin/aliases", {"  ": "Sugar"}, headers=ADMIN).status == 422
+
+    assert client.delete("/api/admin/aliases/KANDA", headers=ADMIN).status == 200
+    assert client.delete("/admin/aliases/kanda", headers=ADMIN).status == 404
+    with pytest.raises(IngredientNotFoundError):
+        calculate_nutrition(recipe(("kanda", 10)))
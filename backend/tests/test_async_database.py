@@ -0,0 +1,66 @@
+import asyncio
+import contextvars
+
+import pytest
+
+from async_database import AsyncReader
+
+
+class Interrupted(BaseException):
+    pass
+
+
+def raise_base_exception():
+    raise Interrupted()
+
+
+def raise_stop_iteration():
+    return next(iter(()))
+
+
+def test_results_and_errors_reach_the_caller():
+    reader = AsyncReader()
+    assert asyncio.run(reader.call(lambda left, right: left + right, 2, 3)) == 5
+    with pytest.raises(LookupError):
+        asyncio.run(reader.call({}.__getitem__, "missing"))
+
+
+def test_base_exceptions_are_delivered_and_the_thread_survives():
+    reader = AsyncReader()
+    with pytest.raises(Interrupted):
+        asyncio.run(asyncio.wait_for(reader.call(raise_base_exception), 5))
+    with pytest.raises(RuntimeError, match="StopIteration"):
+        asyncio.run(asyncio.wait_for(reader.call(raise_stop_iteration), 5))
+    thread = reader._thread
+    assert asyncio.run(reader.call(lambda: "still serving")) == "still serving"
+    assert reader._thread is thread and thread.is_alive()
+
+
+def test_a_closed_caller_loop_does_not_stop_the_reader():
+    reader = AsyncReader()
+    assert asyncio.run(reader.call(lambda: 1)) == 1
+    closed = asyncio.new_event_loop()
+    orphan = closed.create_future()
+    closed.close()
+    reader._queue.put((lambda: 2, (), contextvars.copy_context(), closed, orphan))
+    assert asyncio.run(asyncio.wait_for(reader.call(lambda: 3), 5)) == 3
+    assert not orphan.done()
+
+
+def test_calls_run_in_the_callers_context():
+    reader = AsyncReader()
+    request_id = contextvars.ContextVar("request_id", default=None)
+
+    async def scenario():
+        request_id.set("req-1")
+        return await reader.call(request_id.get)
+
+    assert asyncio.run(scenario()) == "req-1"
+
+
+def test_fetchall_returns_rows_as_dicts():
+    reader = AsyncReader()
+    rows = asyncio.run(
+        reader.fetchall("SELECT name FROM ingredients WHERE name = ?", ("Rice",))
+    )
+    assert rows == [{"name": "Rice"}]
@@ -0,0 +1,116 @@
+import catalog
+import database
+from catalog import write_ingredients
+from database import CATALOG_SCOPE, TENANTS_SCOPE, catalog_cache_version, get_connection
+from tenants import upsert_tenant_ingredients
+
+ADMIN = {"X-Admin-Token": "admin-secret"}
+
+
+def ingredient(name: str, energy_kcal: float) -> dict:
+    return {
+        "name": name,
+        "energy_kcal": energy_kcal,
+        "protein_g": 2,
+        "carbs_g": 20,
+        "sugar_g": 1,
+        "fat_g": 1,
+        "saturated_fat_g": 0,
+        "sodium_mg": 5,
+    }
+
+
+def calculated_energy(client, name: str) -> float:
+    response = client.post(
+        "/calculate",
+        {
+            "recipe_name": "Admin check",
+            "servings": 1,
+            "ingredients": [{"name": name, "quantity_g": 100}],
+        },
+    )
+    assert response.status == 200
+    return response.json()["per_serving"]["energy_kcal"]
+
+
+def test_catalog_writes_need_the_admin_token(client, monkeypatch):
+    body = [ingredient("Admin grain", 100)]
+    assert client.put("/admin/ingredients", body).status == 403
+    assert client.put("/admin/ingredients", body, headers={"X-Admin-Token": "wrong"}).status == 403
+    assert client.get("/api/admin/ingredients").status == 403
+    assert client.delete("/admin/ingredients/Admin grain").status == 403
+
+    monkeypatch.setattr(catalog, "ADMIN_TOKEN", "")
+    assert client.put("/admin/ingredients", body, headers=ADMIN).status == 404
+
+
+def test_edits_are_served_without_a_restart(client):
+    before = catalog_cache_version()
+    first = client.put("/admin/ingredients", [ingredient("Hot grain", 100)], headers=ADMIN)
+    assert first.status == 200
+    assert first.json()["changed"] == 1
+    assert first.json()["version"] > before
+    assert calculated_energy(client, "Hot grain") == 100
+
+    second = client.put("/api/admin/ingredients", [ingredient("Hot grain", 150)], headers=ADMIN)
+    assert second.json()["version"] > first.json()["version"]
+    assert calculated_energy(client, "hot grain") == 150
+
+    listed = client.get("/admin/ingredients", headers=ADMIN).json()
+    assert {"name": "Hot grain", **ingredient("Hot grain", 150)} in listed
+
+    deleted = client.delete("/admin/ingredients/Hot grain", headers=ADMIN)
+    assert deleted.status == 200
+    assert deleted.json()["version"] > second.json()["version"]
+    gone = {
+        "recipe_name": "Gone",
+        "servings": 1,
+        "ingredients": [{"name": "Hot grain", "quantity_g": 1}],
+    }
+    assert client.post("/calculate", gone).status == 404
+    assert client.delete("/admin/ingredients/Hot grain", headers=ADMIN).status == 404
+
+
+def test_unchanged_writes_keep_the_version(client, monkeypatch):
+    notified = []
+    monkeypatch.setattr(database, "_catalog_write_listeners", [lambda: notified.append(1)])
+    body = [ingredient("Steady grain", 80)]
+    first = client.put("/admin/ingredients", body, headers=ADMIN).json()
+    assert notified == [1]
+
+    again = client.put("/admin/ingredients", body, headers=ADMIN).json()
+    assert again["changed"] == 0
+    assert again["recomputed_recipes"] == 0
+    assert again["version"] == first["version"]
+    # Caches are only told about writes that changed something.
+    assert notified == [1]
+
+
+def test_versions_are_kept_per_scope():
+    catalog_before = catalog_cache_version(CATALOG_SCOPE)
+    tenants_before = catalog_cache_version(TENANTS_SCOPE)
+    upsert_tenant_ingredients("scope-check", [ingredient("Scoped grain", 90)])
+    assert catalog_cache_version(CATALOG_SCOPE) == catalog_before
+    assert catalog_cache_version(TENANTS_SCOPE) > tenants_before
+
+    tenants_after = catalog_cache_version(TENANTS_SCOPE)
+    catalog.upsert_ingredients([ingredient("Scoped grain", 90)])
+    assert catalog_cache_version(CATALOG_SCOPE) > catalog_before
+    assert catalog_cache_version(TENANTS_SCOPE) == tenants_after
+
+
+def test_replace_removes_ingredients_left_out():
+    with get_connection() as connection:
+        names = [row[0] for row in connection.execute("SELECT name FROM ingredients")]
+        kept = [ingredient(name, 1) for name in names if name != "Honey"]
+        result = write_ingredients(connection, kept, replace=True)
+        remaining = {row[0] for row in connection.execute("SELECT name FROM ingredients")}
+        connection.rollback()
+    assert result["deleted"] == 1
+    assert "Honey" not in remaining
+    assert remaining == set(names) - {"Honey"}
+
+
+def test_replacing_with_nothing_is_refused(client):
+    response = client.put("/admin/ingredients?replace=true", [], headers=ADMIN)
+    assert response.status == 422
@@ -0,0 +1,135 @@
+import threading
+import time
+
+import pytest
+
+import coalescing
+from coalescing import SingleFlight, coalesced_calculation
+from models import RecipeRequest
+
+
+def run_concurrently(flight: SingleFlight, key, compute, callers: int) -> list:
+    """Starts ``callers`` threads on one key while the leader is held."""
+    outcomes: list = [None] * callers
+    leader_started = threading.Event()
+    release = threading.Event()
+
+    def held_compute():
+        leader_started.set()
+        release.wait(5)
+        return compute()
+
+    def call(slot: int) -> None:
+        try:
+            outcomes[slot] = flight.do(key, held_compute)
+        except Exception as exc:
+            outcomes[slot] = exc
+
+    threads = [threading.Thread(target=call, args=(0,))]
+    threads[0].start()
+    assert leader_started.wait(5)
+    threads += [threading.Thread(target=call, args=(slot,)) for slot in range(1, callers)]
+    for thread in threads[1:]:
+        thread.start()
+    # Followers are counted under the lock before they wait.
+    deadline = time.monotonic() + 5
+    while flight.coalesced < callers - 1 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    return outcomes
+
+
+def test_concurrent_callers_share_one_result():
+    flight = SingleFlight("test")
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"value": 42}
+
+    outcomes = run_concurrently(flight, "key", compute, callers=6)
+    assert len(calls) == 1
+    assert all(outcome is outcomes[0] for outcome in outcomes)
+    stats = flight.stats()
+    assert (stats["executed"], stats["coalesced"], stats["in_flight"]) == (1, 5, 0)
+
+
+def test_concurrent_callers_share_one_exception():
+    flight = SingleFlight("test")
+    calls = []
+
+    def compute():
+        calls.append(1)
+        raise LookupError("catalog unavailable")
+
+    outcomes = run_concurrently(flight, "key", compute, callers=4)
+    assert len(calls) == 1
+    assert all(isinstance(outcome, LookupError) for outcome in outcomes)
+    assert all(outcome is outcomes[0] for outcome in outcomes)
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_nothing_is_cached_after_the_leader_finishes():
+    flight = SingleFlight("test")
+    assert flight.do("key", lambda: 1) == 1
+    assert flight.do("key", lambda: 2) == 2
+    assert flight.stats()["coalesced"] == 0
+
+
+def test_different_keys_do_not_share():
+    flight = SingleFlight("test")
+    assert flight.do("a", lambda: "a") == "a"
+    assert flight.do("b", lambda: "b") == "b"
+    assert flight.stats()["executed"] == 2
+
+
+@pytest.fixture
+def captured_keys(monkeypatch) -> list:
+    keys = []
+    monkeypatch.setattr(
+        coalescing.calculation_flight,
+        "do",
+        lambda key, compute: keys.append(key),
+    )
+    return keys
+
+
+def recipe(*lines: tuple[str, float], name: str = "Dal") -> RecipeRequest:
+    return RecipeRequest(
+        recipe_name=name,
+        servings=2,
+        ingredients=[{"name": item, "quantity_g": grams} for item, grams in lines],
+    )
+
+
+def test_calculation_key_matches_stripped_lines_only(captured_keys):
+    coalesced_calculation(recipe(("Rice", 100), ("Salt", 2)))
+    coalesced_calculation(recipe(("  Rice ", 100), ("Salt", 2), name="Other"))
+    assert captured_keys[0] == captured_keys[1]
+
+
+def test_calculation_key_keeps_spelling_and_line_order(captured_keys):
+    # Responses echo names as sent and break ties by line order.
+    coalesced_calculation(recipe(("Butter", 100), ("Salt", 10)))
+    coalesced_calculation(recipe(("butter", 100), ("Salt", 10)))
+    coalesced_calculation(recipe(("Salt", 10), ("Butter", 100)))
+    assert len(set(captured_keys)) == 3
+
+
+def test_calculation_key_keeps_tenant_servings_and_quantities(captured_keys):
+    coalesced_calculation(recipe(("Rice", 100)))
+    coalesced_calculation(recipe(("Rice", 100)), tenant_id="acme")
+    coalesced_calculation(recipe(("Rice", 90)))
+    coalesced_calculation(RecipeRequest(**{**recipe(("Rice", 100)).model_dump(), "servings": 3}))
+    assert len(set(captured_keys)) == 4
+
+
+def test_contribution_key_keeps_options(captured_keys):
+    coalesced_calculation(recipe(("Rice", 100), ("Salt", 2)), include_contributions=True)
+    coalesced_calculation(
+        recipe(("Rice", 100), ("Salt", 2)), include_contributions=True, contribution_limit=1
+    )
+    coalesced_calculation(recipe(("Rice", 100), ("Salt", 2)))
+    assert len(set(captured_keys)) == 3
@@ -0,0 +1,157 @@
+import csv
+import io
+from collections import Counter
+
+import pytest
+
+import recipes as recipes_module
+from models import RecipeRequest
+from recipes import (
+    COMPLIANCE_REPORT_COLUMNS,
+    compliance_summary,
+    get_recipe,
+    iter_compliance_csv,
+    save_recipe,
+)
+from tenants import delete_tenant_ingredient, upsert_tenant_ingredients
+
+TENANT = "compliance-report"
+SAVED = {
+    "Kheer": [("Milk", 200), ("Rice", 40), ("Sugar", 30)],
+    "Salted butter rice": [("Rice", 100), ("Butter", 20), ("Salt", 3)],
+    "Jaggery rice": [("Rice", 100), ("Jaggery", 25)],
+    "Ghee rice": [("Rice", 100), ("Ghee", 15)],
+    "Plain rice": [("Rice", 100)],
+}
+
+
+@pytest.fixture(scope="module")
+def portfolio() -> list[str]:
+    for name, lines in SAVED.items():
+        save_recipe(recipe(name, *lines), TENANT)
+    # A recipe whose ingredient has since been removed is kept without nutrition.
+    upsert_tenant_ingredients(TENANT, [house_ingredient("House masala")])
+    save_recipe(recipe("Masala rice", ("Rice", 100), ("House masala", 5)), TENANT)
+    delete_tenant_ingredient(TENANT, "House masala")
+    return sorted([*SAVED, "Masala rice"])
+
+
+def recipe(name: str, *lines: tuple[str, float]) -> RecipeRequest:
+    return RecipeRequest(
+        recipe_name=name,
+        servings=2,
+        ingredients=[{"name": item, "quantity_g": grams} for item, grams in lines],
+    )
+
+
+def house_ingredient(name: str) -> dict:
+    return {
+        "name": name,
+        "energy_kcal": 250,
+        "protein_g": 10,
+        "carbs_g": 40,
+        "sugar_g": 2,
+        "fat_g": 5,
+        "saturated_fat_g": 1,
+        "sodium_mg": 800,
+    }
+
+
+def report(**filters) -> list[dict[str, str]]:
+    text = "".join(iter_compliance_csv(TENANT, **filters))
+    reader = csv.DictReader(io.StringIO(text))
+    assert tuple(reader.fieldnames) == COMPLIANCE_REPORT_COLUMNS
+    return list(reader)
+
+
+def expected_rows(names: list[str]) -> list[dict[str, str]]:
+    rows = []
+    for name in names:
+        saved = get_recipe(name, TENANT)
+        base = {
+            "recipe_name": saved["recipe_name"],
+            "servings": str(saved["servings"]),
+            "recipe_status": saved["status"],
+            "computed_at": saved["computed_at"],
+        }
+        if saved["nutrition"] is None:
+            empty = dict.fromkeys(COMPLIANCE_REPORT_COLUMNS, "")
+            rows.append({**empty, **base})
+            continue
+        compliance = saved["nutrition"]["fssai_compliance"]
+        for rule in compliance["rulebook"]:
+            rows.append(
+                {
+                    **base,
+                    "compliance_status": compliance["status"],
+                    "rule_id": rule["rule_id"],
+                    "rule_title": rule["title"],
+                    "rule_status": rule["status"],
+                    "observation": rule["observation"],
+                }
+            )
+    return rows
+
+
+def test_report_lists_every_stored_rule_check(portfolio):
+    assert get_recipe("Masala rice", TENANT)["status"] == "missing_ingredients"
+    assert report() == expected_rows(portfolio)
+
+
+def test_pages_do_not_change_the_report(portfolio, monkeypatch):
+    whole = report()
+    monkeypatch.setattr(recipes_module, "COMPLIANCE_REPORT_CHUNK", 2)
+    chunks = list(iter_compliance_csv(TENANT))
+    assert len(chunks) > 2
+    assert report() == whole
+
+
+def test_filters_keep_only_matching_checks(portfolio):
+    rows = report()
+    rule_id = rows[0]["rule_id"]
+    assert report(rule_id=rule_id) == [row for row in rows if row["rule_id"] == rule_id]
+    for status in ("pass", "warn", "fail"):
+        filtered = report(rule_id=rule_id, rule_status=status)
+        assert filtered == [
+            row for row in rows if row["rule_id"] == rule_id and row["rule_status"] == status
+        ]
+    assert report(rule_id="FSSAI-R999") == []
+
+
+def test_summary_counts_match_the_report(portfolio):
+    rows = report()
+    summary = compliance_summary(TENANT)
+    assert summary["tenant_id"] == TENANT
+    assert summary["recipes"] == len(portfolio)
+    assert summary["by_recipe_status"] == {"ok": len(SAVED), "missing_ingredients": 1}
+    assert summary["by_compliance_status"] == dict(
+        Counter(row["compliance_status"] for row in rows if row["rule_id"] == rows[0]["rule_id"])
+    )
+    checks = Counter((row["rule_id"], row["rule_status"]) for row in rows if row["rule_id"])
+    for rule in summary["rules"]:
+        for status in ("pass", "warn", "fail"):
+            assert rule[status] == checks[(rule["rule_id"], status)]
+    counted = sum(rule[status] for rule in summary["rules"] for status in ("pass", "warn", "fail"))
+    assert counted == sum(checks.values())
+
+
+def test_report_routes(client):
+    response = client.get("/reports/compliance?status=fail")
+    assert response.status == 200
+    assert response.headers["content-type"] == "text/csv; charset=utf-8"
+    assert response.headers["content-disposition"] == (
+        'attachment; filename="compliance_report.csv"'
+    )
+    assert response.body.decode().splitlines()[0] == ",".join(COMPLIANCE_REPORT_COLUMNS)
+    assert client.get("/reports/compliance?rule_id=R1").status == 422
+    assert client.get("/reports/compliance?status=unknown").status == 422
+
+    summary = client.get("/api/reports/compliance/summary")
+    assert summary.status == 200
+    assert set(summary.json()) == {
+        "tenant_id",
+        "recipes",
+        "by_recipe_status",
+        "by_compliance_status",
+        "rules",
+    }
@@ -0,0 +1,116 @@
+import gzip
+
+import anyio
+import pytest
+
+import compression
+from compression import (
+    COMPRESSION_BUFFER_BYTES,
+    CompressedBodyCache,
+    CompressionMiddleware,
+    negotiate_encoding,
+)
+
+
+def test_negotiation_follows_q_values_then_server_preference(monkeypatch):
+    monkeypatch.setattr(compression, "ENCODINGS", ("zstd", "br", "gzip"))
+    assert negotiate_encoding("gzip, br, zstd") == "zstd"
+    assert negotiate_encoding("gzip;q=1, zstd;q=0.5") == "gzip"
+    assert negotiate_encoding("br;q=0, *;q=0.1") == "zstd"
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("gzip;q=0") is None
+
+
+def asset_app(body: bytes, content_type: bytes = b"application/javascript", chunks: int = 1):
+    async def app(scope, receive, send) -> None:
+        headers = [(b"content-type", content_type), (b"etag", b'"v1"')]
+        if chunks == 1:
+            headers.append((b"content-length", str(len(body)).encode()))
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        step = -(-len(body) // chunks)
+        for start in range(0, len(body), step):
+            more_body = start + step < len(body)
+            chunk = body[start : start + step]
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    return app
+
+
+def fetch(app, path: str, accept_encoding: str | None = "gzip", **headers):
+    raw_headers = [(name.encode(), value.encode()) for name, value in headers.items()]
+    if accept_encoding is not None:
+        raw_headers.append((b"accept-encoding", accept_encoding.encode()))
+    scope = {"type": "http", "method": "GET", "path": path, "headers": raw_headers}
+    messages = []
+
+    async def send(message) -> None:
+        messages.append(message)
+
+    anyio.run(app, scope, None, send)
+    start = dict(messages[0]["headers"])
+    body = b"".join(message.get("body", b"") for message in messages[1:])
+    return start, body, messages[1:]
+
+
+def middleware(app, cache: CompressedBodyCache | None = None) -> CompressionMiddleware:
+    return CompressionMiddleware(app, cache=cache or CompressedBodyCache(1 << 24), min_bytes=1024)
+
+
+@pytest.fixture
+def stream_levels(monkeypatch) -> list[int]:
+    levels = []
+    stream_compressor = compression.StreamCompressor
+
+    def recording(encoding: str, level: int):
+        levels.append(level)
+        return stream_compressor(encoding, level)
+
+    monkeypatch.setattr(compression, "StreamCompressor", recording)
+    return levels
+
+
+def test_sized_body_is_compressed_whole_and_cached():
+    body = b"console.log('nutrition');\n" * 200
+    cache = CompressedBodyCache(1 << 24)
+    app = middleware(asset_app(body), cache)
+    for _ in range(2):
+        headers, compressed, _ = fetch(app, "/assets/app.js")
+        assert headers[b"content-encoding"] == b"gzip"
+        assert headers[b"content-length"] == str(len(compressed)).encode()
+        assert headers[b"etag"] == b'W/"v1"'
+        assert b"accept-encoding" in headers[b"vary"].lower()
+        assert gzip.decompress(compressed) == body
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_small_range_and_unaccepted_responses_pass_through():
+    body = b"x" * 4096
+    headers, sent, _ = fetch(middleware(asset_app(b"tiny")), "/calculate")
+    assert b"content-encoding" not in headers and sent == b"tiny"
+    headers, sent, _ = fetch(middleware(asset_app(body)), "/app.js", range="bytes=0-9")
+    assert b"content-encoding" not in headers and sent == body
+    headers, sent, _ = fetch(middleware(asset_app(body)), "/app.js", accept_encoding="identity")
+    assert b"content-encoding" not in headers and sent == body
+    headers, sent, _ = fetch(middleware(asset_app(body, b"application/pdf")), "/label")
+    assert b"content-encoding" not in headers and sent == body
+
+
+def test_unsized_body_is_streamed_chunk_by_chunk(stream_levels):
+    body = b"recipe,rule,status\n" * 2000
+    app = middleware(asset_app(body, b"text/csv", chunks=4))
+    headers, compressed, messages = fetch(app, "/reports/compliance")
+    assert headers[b"content-encoding"] == b"gzip"
+    assert b"content-length" not in headers
+    # Every chunk is flushed as it arrives.
+    assert len(messages) == 4 and all(message["body"] for message in messages)
+    assert gzip.decompress(compressed) == body
+    assert stream_levels == [compression.COMPRESSION_LEVELS["dynamic"]["gzip"]]
+
+
+def test_large_static_assets_stream_with_the_fast_level(stream_levels):
+    body = b"//# sourceMappingURL=app.js.map\n" * (COMPRESSION_BUFFER_BYTES // 32 + 1)
+    app = middleware(asset_app(body, b"application/json"))
+    headers, compressed, _ = fetch(app, "/assets/app.js.map")
+    assert headers[b"content-encoding"] == b"gzip"
+    assert gzip.decompress(compressed) == body
+    assert stream_levels == [compression.COMPRESSION_LEVELS["dynamic"]["gzip"]]
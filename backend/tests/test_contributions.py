@@ -0,0 +1,61 @@
+import pytest
+
+from calculator import NUTRIENT_FIELDS, calculate_nutrition
+from models import RecipeRequest
+
+
+def recipe(*lines: tuple[str, float], servings: int = 2) -> RecipeRequest:
+    return RecipeRequest(
+        recipe_name="Kheer",
+        servings=servings,
+        ingredients=[{"name": item, "quantity_g": grams} for item, grams in lines],
+    )
+
+
+def breakdown(*lines: tuple[str, float], limit: int = 3) -> dict:
+    return calculate_nutrition(
+        recipe(*lines), include_contributions=True, contribution_limit=limit
+    )
+
+
+def test_ingredient_rows_add_up_to_the_recipe_totals():
+    result = breakdown(("Rice", 100), ("Milk", 300), ("Sugar", 40), ("Salt", 1))
+    rows = result["contributions"]["ingredients"]
+    assert [row["name"] for row in rows] == ["Rice", "Milk", "Sugar", "Salt"]
+    for field in NUTRIENT_FIELDS:
+        assert sum(row["per_serving"][field] for row in rows) == pytest.approx(
+            result["per_serving"][field], abs=0.05
+        )
+        if result["per_serving"][field] > 0:
+            assert sum(row["share_percent"][field] for row in rows) == pytest.approx(100, abs=0.05)
+
+
+def test_top_contributors_are_ranked_limited_and_positive():
+    result = breakdown(("Rice", 100), ("Milk", 300), ("Sugar", 40), ("Salt", 1), limit=2)
+    top = result["contributions"]["top_contributors"]
+    assert set(top) == set(NUTRIENT_FIELDS)
+    for field, entries in top.items():
+        assert len(entries) <= 2
+        values = [entry["value"] for entry in entries]
+        assert values == sorted(values, reverse=True)
+        assert all(value > 0 for value in values)
+    assert top["sugar_g"][0]["name"] == "Sugar"
+    # Salt has no energy, so it never ranks for it.
+    energy = breakdown(("Salt", 5), ("Rice", 5))["contributions"]["top_contributors"]["energy_kcal"]
+    assert [entry["name"] for entry in energy] == ["Rice"]
+
+
+def test_ties_go_to_the_earlier_line():
+    result = breakdown(("Sugar", 10), ("Rice", 50), ("Jaggery", 1), ("rice", 50))
+    energy = result["contributions"]["top_contributors"]["energy_kcal"]
+    assert [entry["name"] for entry in energy[:2]] == ["Rice", "rice"]
+
+
+def test_contributions_route_uses_the_limit(client):
+    body = recipe(("Rice", 100), ("Milk", 300), ("Sugar", 40)).model_dump()
+    response = client.post("/contributions?limit=1", body)
+    assert response.status == 200
+    payload = response.json()
+    assert len(payload["ingredients"]) == 3
+    assert all(len(entries) <= 1 for entries in payload["top_contributors"].values())
+    assert client.post("/contributions?limit=0", body).status == 422
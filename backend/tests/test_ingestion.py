@@ -0,0 +1,91 @@
+import json
+
+import pytest
+from fastapi.exceptions import RequestValidationError
+
+import ingestion
+from database import get_connection
+from ingestion import job_payload, validate_bulk_job
+from models import RecipeRequest
+
+INTERNAL = {"X-Internal-Token": "internal-secret"}
+
+
+@pytest.fixture
+def internal_token(monkeypatch) -> None:
+    monkeypatch.setattr(ingestion, "INTERNAL_TOKEN", "internal-secret")
+
+
+def bulk_body(**overrides) -> dict:
+    body = {
+        "kind": "calculations",
+        "recipes": [
+            {
+                "recipe_name": "  Sweet   rice ",
+                "servings": 2,
+                "ingredients": [
+                    {"name": " rice ", "quantity_g": 100},
+                    {"name": "Sugar", "quantity_g": 10},
+                ],
+            }
+        ],
+    }
+    body.update(overrides)
+    return body
+
+
+def stored_payload(job_id: str) -> list:
+    with get_connection() as connection:
+        row = connection.execute("SELECT payload FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return json.loads(row["payload"])
+
+
+def test_rows_match_the_validated_models():
+    body = bulk_body()
+    rows = validate_bulk_job(json.dumps(body).encode())
+    models = [RecipeRequest.model_validate(item) for item in body["recipes"]]
+    assert rows["kind"] == "calculations"
+    assert json.loads(job_payload(rows["recipes"])) == [model.model_dump() for model in models]
+
+
+def test_invalid_rows_raise_request_validation_errors():
+    body = bulk_body(recipes=[{"recipe_name": "", "servings": 0, "ingredients": []}])
+    with pytest.raises(RequestValidationError) as caught:
+        validate_bulk_job(json.dumps(body).encode())
+    locations = {error["loc"] for error in caught.value.errors()}
+    assert ("body", "recipes", 0, "servings") in locations
+    assert ("body", "recipes", 0, "ingredients") in locations
+
+
+def test_internal_jobs_are_hidden_without_a_configured_token(client, monkeypatch):
+    monkeypatch.setattr(ingestion, "INTERNAL_TOKEN", "")
+    assert client.post("/internal/jobs", bulk_body(), headers=INTERNAL).status == 404
+
+
+def test_internal_jobs_need_the_internal_token(client, internal_token):
+    assert client.post("/internal/jobs", bulk_body()).status == 403
+    response = client.post("/internal/jobs", bulk_body(), headers={"X-Internal-Token": "wrong"})
+    assert response.status == 403
+    assert response.json() == {"detail": "Invalid internal token."}
+
+
+def test_internal_jobs_queue_the_same_payload_as_public_jobs(client, internal_token):
+    internal = client.post("/api/internal/jobs", bulk_body(), headers=INTERNAL)
+    public = client.post("/jobs", bulk_body())
+    assert internal.status == public.status == 202
+    assert internal.json()["status"] == "queued"
+    assert internal.json()["total"] == 1
+    assert stored_payload(internal.json()["id"]) == stored_payload(public.json()["id"])
+
+
+def test_internal_jobs_reject_bodies_like_public_jobs(client, internal_token):
+    invalid = bulk_body(
+        kind="videos",
+        recipes=[{"recipe_name": "Bad", "servings": 1, "ingredients": [{"name": "Rice"}]}],
+    )
+    internal = client.post("/internal/jobs", invalid, headers=INTERNAL)
+    public = client.post("/jobs", invalid)
+    assert internal.status == public.status == 422
+    assert [error["loc"] for error in internal.json()["detail"]] == [
+        error["loc"] for error in public.json()["detail"]
+    ]
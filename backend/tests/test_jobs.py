@@ -0,0 +1,97 @@
+import json
+import zipfile
+
+from database import get_connection
+from jobs import _claim_next_job, _run_job, _update_job, get_job, submit_job
+from models import RecipeRequest
+
+
+def recipe(name: str, *lines: tuple[str, float]) -> RecipeRequest:
+    return RecipeRequest(
+        recipe_name=name,
+        servings=1,
+        ingredients=[{"name": item, "quantity_g": grams} for item, grams in lines],
+    )
+
+
+def run_queued_jobs(owner: str = "test-worker") -> None:
+    """Does what a JobRunner worker does, on this thread, until the queue is empty."""
+    while (job := _claim_next_job(owner)) is not None:
+        _run_job(job, owner)
+
+
+def test_calculation_job_writes_results_and_item_errors():
+    job_id = submit_job(
+        "calculations",
+        [recipe("Plain rice", ("Rice", 100)), recipe("Mystery", ("Unobtainium", 5))],
+        tenant_id=None,
+    )
+    assert get_job(job_id)["status"] == "queued"
+
+    run_queued_jobs()
+    job = get_job(job_id)
+    assert (job["status"], job["total"], job["completed"], job["failed"]) == (
+        "succeeded",
+        2,
+        2,
+        1,
+    )
+    with open(job["artifact_path"], encoding="utf-8") as handle:
+        entries = json.load(handle)
+    assert [entry["recipe_name"] for entry in entries] == ["Plain rice", "Mystery"]
+    assert entries[0]["result"]["total_weight"] == 100
+    assert entries[1]["error"] == "Ingredient(s) not found: Unobtainium"
+
+
+def test_label_job_archives_one_pdf_per_recipe():
+    job_id = submit_job(
+        "labels",
+        [recipe("Sweet rice", ("Rice", 100), ("Sugar", 10)), recipe("Bad", ("Unobtainium", 1))],
+        tenant_id=None,
+    )
+    run_queued_jobs()
+    job = get_job(job_id)
+    assert job["status"] == "succeeded"
+    with zipfile.ZipFile(job["artifact_path"]) as archive:
+        names = archive.namelist()
+        assert names[0].startswith("00001_") and names[0].endswith(".pdf")
+        assert archive.read(names[0]).startswith(b"%PDF")
+        errors = json.loads(archive.read("errors.json"))
+    assert [error["index"] for error in errors] == [1]
+
+
+def test_expired_lease_is_reclaimed_and_the_old_owner_is_fenced_off():
+    job_id = submit_job("calculations", [recipe("Lease", ("Rice", 10))], tenant_id=None)
+    claimed = _claim_next_job("crashed-worker")
+    assert claimed["id"] == job_id
+    # Nobody else may take a job while its lease is live.
+    assert _claim_next_job("other-worker") is None
+
+    # The crashed worker stops renewing its lease.
+    with get_connection() as connection:
+        connection.execute("UPDATE jobs SET lease_expires_at = 0 WHERE id = ?", (job_id,))
+        connection.commit()
+    reclaimed = _claim_next_job("other-worker")
+    assert reclaimed["id"] == job_id
+
+    _update_job(job_id, "crashed-worker", status="failed")
+    assert get_job(job_id)["status"] == "running"
+    _run_job(reclaimed, "other-worker")
+    assert get_job(job_id)["status"] == "succeeded"
+
+
+def test_job_routes_report_status_and_serve_the_result(client):
+    body = {"kind": "calculations", "recipes": [recipe("Routed", ("Rice", 50)).model_dump()]}
+    created = client.post("/jobs", body)
+    assert created.status == 202
+    job_id = created.json()["id"]
+    assert client.get(f"/jobs/{job_id}").json()["status"] == "queued"
+    assert client.get(f"/jobs/{job_id}/result").status == 409
+
+    run_queued_jobs()
+    status = client.get(f"/api/jobs/{job_id}").json()
+    assert (status["status"], status["progress_percent"]) == ("succeeded", 100)
+    result = client.get(f"/jobs/{job_id}/result")
+    assert result.status == 200
+    assert json.loads(result.body)[0]["recipe_name"] == "Routed"
+    assert client.get("/jobs/unknown").status == 404
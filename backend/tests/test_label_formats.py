@@ -0,0 +1,104 @@
+import io
+import xml.etree.ElementTree as ElementTree
+
+import pytest
+from PIL import Image
+
+from label_generator import LABEL_ROWS, render_label
+from main import _negotiate_label_format
+
+PER_100G = {
+    "energy_kcal": 356.0,
+    "protein_g": 7.1,
+    "carbs_g": 80.0,
+    "sugar_g": 0.1,
+    "fat_g": 0.66,
+    "saturated_fat_g": 0.18,
+    "sodium_mg": 1.0,
+}
+PER_SERVING = {field: value / 2 for field, value in PER_100G.items()}
+
+
+def render(label_format: str, recipe_name: str = "Rice & <Dal>") -> bytes:
+    return render_label(
+        label_format,
+        recipe_name=recipe_name,
+        servings=2,
+        total_weight=100.0,
+        per_100g=PER_100G,
+        per_serving=PER_SERVING,
+    )
+
+
+def test_svg_is_well_formed_and_escapes_the_recipe_name():
+    root = ElementTree.fromstring(render("svg"))
+    texts = [element.text for element in root.iter() if element.text]
+    assert "Recipe: Rice & <Dal>" in texts
+    assert "Energy (kcal)" in texts and "356.00" in texts and "178.00" in texts
+
+
+def test_html_escapes_the_recipe_name_and_lists_every_row():
+    html = render("html").decode("utf-8")
+    assert "Rice &amp; &lt;Dal&gt;" in html and "<Dal>" not in html
+    assert html.count("<tr") == len(LABEL_ROWS) + 1
+
+
+def test_png_is_a_grayscale_palette_image():
+    image = Image.open(io.BytesIO(render("png")))
+    assert image.format == "PNG"
+    assert image.mode == "P"
+    assert image.width > image.height > 0
+
+
+def test_rendered_labels_are_cached_by_their_data():
+    first = render("svg", recipe_name="Cached label")
+    assert render("svg", recipe_name="Cached label") is first
+    assert render("svg", recipe_name="Other label") != first
+
+
+@pytest.mark.parametrize(
+    ("accept", "expected"),
+    [
+        (None, "pdf"),
+        ("*/*", "pdf"),
+        ("image/svg+xml", "svg"),
+        ("text/html;q=0.5, image/png", "png"),
+        ("image/png, image/svg+xml", "png"),
+        ("image/png;q=0.2, text/html;q=0.9", "html"),
+        ("image/webp", "pdf"),
+    ],
+)
+def test_accept_header_picks_the_format(accept, expected):
+    assert _negotiate_label_format(accept) == expected
+
+
+def label_recipe() -> dict:
+    return {
+        "recipe_name": "Format check",
+        "servings": 2,
+        "ingredients": [{"name": "Rice", "quantity_g": 100}],
+    }
+
+
+def test_route_negotiates_formats_and_revalidates(client):
+    svg = client.post("/generate-label", label_recipe(), headers={"Accept": "image/svg+xml"})
+    assert svg.status == 200
+    assert svg.headers["content-type"] == "image/svg+xml"
+    assert "Accept" in svg.headers["vary"]
+    etag = svg.headers["etag"]
+
+    again = client.post(
+        "/generate-label",
+        label_recipe(),
+        headers={"Accept": "image/svg+xml", "If-None-Match": etag},
+    )
+    assert (again.status, again.body) == (304, b"")
+
+    html = client.post(
+        "/generate-label?format=html", label_recipe(), headers={"Accept": "image/svg+xml"}
+    )
+    assert html.headers["content-type"].startswith("text/html")
+
+    pdf = client.post("/generate-label", label_recipe())
+    assert pdf.headers["content-type"] == "application/pdf"
+    assert pdf.body.startswith(b"%PDF")
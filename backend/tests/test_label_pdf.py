@@ -0,0 +1,61 @@
+import label_generator
+from label_generator import _PdfSink, generate_nutrition_label_pdf
+
+NUTRIENTS = {
+    "energy_kcal": 120.0,
+    "protein_g": 3.0,
+    "carbs_g": 20.0,
+    "sugar_g": 4.0,
+    "fat_g": 2.5,
+    "saturated_fat_g": 1.0,
+    "sodium_mg": 90.0,
+}
+
+
+def test_sink_hands_back_the_written_bytes_object():
+    sink = _PdfSink()
+    data = b"%PDF-1.4 whole document"
+    assert sink.write(data) == len(data)
+    assert sink.getvalue() is data
+    sink.write(b" tail")
+    assert sink.getvalue() == b"%PDF-1.4 whole document tail"
+
+
+def test_reportlab_output_is_returned_without_a_copy(monkeypatch):
+    sinks = []
+
+    class RecordingSink(_PdfSink):
+        def __init__(self) -> None:
+            super().__init__()
+            sinks.append(self)
+
+    monkeypatch.setattr(label_generator, "_PdfSink", RecordingSink)
+    pdf = generate_nutrition_label_pdf(
+        recipe_name="Sink check",
+        servings=2,
+        total_weight=250.0,
+        per_100g=NUTRIENTS,
+        per_serving=NUTRIENTS,
+    )
+    # ReportLab writes the finished document once, and that object is returned.
+    assert len(sinks[0]._chunks) == 1
+    assert pdf is sinks[0]._chunks[0]
+    assert pdf.startswith(b"%PDF") and pdf.rstrip().endswith(b"%%EOF")
+
+
+def pdf_recipe() -> dict:
+    return {
+        "recipe_name": "Copy free",
+        "servings": 1,
+        "ingredients": [{"name": "Rice", "quantity_g": 80}],
+    }
+
+
+def test_label_routes_send_one_sized_body(client):
+    for path in ("/generate-label", "/async/generate-label"):
+        response = client.post(path, pdf_recipe())
+        assert response.status == 200
+        assert response.headers["content-type"] == "application/pdf"
+        assert response.headers["content-disposition"] == 'attachment; filename="Copy_free.pdf"'
+        assert int(response.headers["content-length"]) == len(response.body)
+        assert len([chunk for chunk in response.chunks if chunk]) == 1
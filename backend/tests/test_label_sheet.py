@@ -0,0 +1,137 @@
+import re
+import zlib
+
+import pytest
+
+from label_generator import (
+    LABEL_SHEET_PAGE_SIZES,
+    MM_TO_POINTS,
+    _SHEET_DESIGN_HEIGHT,
+    _SHEET_DESIGN_WIDTH,
+    generate_label_sheet_pdf,
+    label_sheet_geometry,
+)
+from models import LabelSheetLayout
+
+OBJECT = re.compile(rb"(\d+) 0 obj\n(.*?)\nendobj\n", re.S)
+
+
+def label(index: int) -> dict:
+    values = {
+        "energy_kcal": 100.0 + index,
+        "protein_g": 1.0,
+        "carbs_g": 2.0,
+        "sugar_g": 0.5,
+        "fat_g": 0.25,
+        "saturated_fat_g": 0.1,
+        "sodium_mg": 10.0,
+    }
+    return {
+        "recipe_name": f"Recipe {index}",
+        "servings": 2,
+        "total_weight": 200.0,
+        "per_100g": values,
+        "per_serving": values,
+    }
+
+
+def render(count: int, **layout) -> tuple[bytes, dict]:
+    geometry = label_sheet_geometry(**LabelSheetLayout(**layout).model_dump())
+    pdf = b"".join(generate_label_sheet_pdf((label(index) for index in range(count)), geometry))
+    return pdf, geometry
+
+
+def objects(pdf: bytes) -> dict[int, bytes]:
+    return {int(number): body for number, body in OBJECT.findall(pdf)}
+
+
+def pages(pdf: bytes) -> list[tuple[bytes, str]]:
+    """Each page's dictionary and its decompressed content stream, in order."""
+    found = objects(pdf)
+    kids = re.search(rb"/Type /Pages /Kids \[([^\]]*)\]", pdf).group(1)
+    result = []
+    for number in map(int, re.findall(rb"(\d+) 0 R", kids)):
+        page = found[number]
+        content = found[int(re.search(rb"/Contents (\d+) 0 R", page).group(1))]
+        data = content[content.index(b"stream\n") + 7 : content.rindex(b"\nendstream")]
+        result.append((page, zlib.decompress(data).decode("latin-1")))
+    return result
+
+
+@pytest.mark.parametrize(
+    ("count", "expected_pages"), [(1, 1), (21, 1), (22, 2), (63, 3), (64, 4)]
+)
+def test_page_count_follows_slots_per_page(count, expected_pages):
+    pdf, _ = render(count)
+    assert int(re.search(rb"/Count (\d+)", pdf).group(1)) == expected_pages
+    rendered = pages(pdf)
+    assert len(rendered) == expected_pages
+    placed = [content.count("/Label Do") for _, content in rendered]
+    assert placed == [21] * (expected_pages - 1) + [count - 21 * (expected_pages - 1)]
+
+
+def test_xref_offsets_point_at_their_objects():
+    pdf, _ = render(30)
+    assert pdf.startswith(b"%PDF-1.4\n") and pdf.endswith(b"%%EOF\n")
+    xref_at = int(re.search(rb"startxref\n(\d+)\n", pdf).group(1))
+    assert pdf[xref_at:].startswith(b"xref\n")
+    entries = re.findall(rb"(\d{10}) 00000 n \n", pdf[xref_at:])
+    for number, offset in enumerate(map(int, entries), start=1):
+        assert pdf[offset:].startswith(f"{number} 0 obj\n".encode())
+    size = int(re.search(rb"/Size (\d+)", pdf).group(1))
+    assert len(entries) == size - 1 == len(objects(pdf))
+
+
+@pytest.mark.parametrize("page_size", ["A4", "letter"])
+def test_labels_are_placed_at_the_geometry_slots(page_size):
+    pdf, geometry = render(5, page_size=page_size, columns=2, rows=2)
+    width, height = LABEL_SHEET_PAGE_SIZES[page_size]
+    placements = []
+    for page, content in pages(pdf):
+        media_box = re.search(rb"/MediaBox \[0 0 ([\d.]+) ([\d.]+)\]", page).groups()
+        assert tuple(map(float, media_box)) == pytest.approx((width, height), abs=1e-3)
+        for match in re.findall(r"q ([\d.]+) 0 0 [\d.]+ ([\d.]+) ([\d.]+) cm", content):
+            placements += map(float, match)
+    # Four slots on the first page, then the first slot again on the second.
+    expected = []
+    for x, y in geometry["slots"][:4] + geometry["slots"][:1]:
+        expected += [geometry["scale"], x, y]
+    assert placements == pytest.approx(expected, abs=1e-3)
+
+
+def test_geometry_centres_the_grid_on_the_page():
+    layout = LabelSheetLayout(columns=3, rows=7, column_gap_mm=2.5, row_gap_mm=1)
+    geometry = label_sheet_geometry(**layout.model_dump())
+    page_width, page_height = LABEL_SHEET_PAGE_SIZES["A4"]
+    slots = geometry["slots"]
+    assert len(slots) == 21
+
+    # Slots run left to right, then top to bottom.
+    step_x = (layout.label_width_mm + layout.column_gap_mm) * MM_TO_POINTS
+    step_y = (layout.label_height_mm + layout.row_gap_mm) * MM_TO_POINTS
+    assert slots[1][0] - slots[0][0] == pytest.approx(step_x)
+    assert slots[0][1] - slots[3][1] == pytest.approx(step_y)
+    assert slots[1][1] == slots[0][1]
+
+    # The design is scaled to fit the label and centred in it, and the grid
+    # is centred on the page.
+    label_width = layout.label_width_mm * MM_TO_POINTS
+    label_height = layout.label_height_mm * MM_TO_POINTS
+    scale = geometry["scale"]
+    assert scale == pytest.approx(
+        min(label_width / _SHEET_DESIGN_WIDTH, label_height / _SHEET_DESIGN_HEIGHT)
+    )
+    inset_x = (label_width - _SHEET_DESIGN_WIDTH * scale) / 2
+    inset_y = (label_height - _SHEET_DESIGN_HEIGHT * scale) / 2
+    left = slots[0][0] - inset_x
+    right = slots[2][0] - inset_x + label_width
+    top = slots[0][1] - inset_y + label_height
+    bottom = slots[-1][1] - inset_y
+    assert left == pytest.approx(page_width - right)
+    assert bottom == pytest.approx(page_height - top)
+    assert left >= 0 and bottom >= 0
+
+
+def test_grid_that_does_not_fit_is_rejected():
+    with pytest.raises(ValueError, match="does not fit on one A4 page"):
+        label_sheet_geometry(**LabelSheetLayout(columns=4, label_width_mm=60).model_dump())
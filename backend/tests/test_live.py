@@ -0,0 +1,234 @@
+import asyncio
+import json
+
+import anyio
+from fastapi import WebSocketDisconnect
+
+from live import LiveSession, live_stats
+from main import app
+
+DEBOUNCE = 0.05
+MAX_DELAY = 0.2
+
+
+class FakeWebSocket:
+    """Feeds text frames to a session and collects what it sends back."""
+
+    def __init__(self) -> None:
+        self.incoming: asyncio.Queue[str | None] = asyncio.Queue()
+        self.sent: asyncio.Queue[dict] = asyncio.Queue()
+
+    async def receive_text(self) -> str:
+        text = await self.incoming.get()
+        if text is None:
+            raise WebSocketDisconnect(code=1000)
+        return text
+
+    async def send_json(self, message: dict) -> None:
+        await self.sent.put(message)
+
+    def send(self, **message) -> None:
+        self.incoming.put_nowait(json.dumps(message))
+
+    async def next_message(self, timeout: float = 5.0) -> dict:
+        return await asyncio.wait_for(self.sent.get(), timeout)
+
+
+def live_test(scenario) -> None:
+    """Runs ``scenario(websocket)`` against a session with short timers."""
+
+    async def main() -> None:
+        websocket = FakeWebSocket()
+        session = LiveSession(websocket, None, debounce=DEBOUNCE, max_delay=MAX_DELAY)
+        task = asyncio.create_task(session.run())
+        try:
+            await scenario(websocket)
+        finally:
+            websocket.incoming.put_nowait(None)
+            await asyncio.wait_for(task, 5)
+
+    asyncio.run(main())
+
+
+def open_message(**overrides) -> dict:
+    message = {
+        "type": "open",
+        "seq": 1,
+        "recipe_name": "Live kheer",
+        "servings": 2,
+        "ingredients": [{"name": "Milk", "quantity_g": 200}, {"name": "Rice", "quantity_g": 40}],
+    }
+    message.update(overrides)
+    return message
+
+
+def test_open_is_answered_with_every_section():
+    async def scenario(websocket: FakeWebSocket) -> None:
+        websocket.send(**open_message())
+        result = await websocket.next_message()
+        assert result["type"] == "result"
+        assert result["seq"] == 1
+        assert {"per_100g", "per_serving", "total_weight"} <= set(result["changed"])
+        assert result["changed"]["total_weight"] == 240
+
+    live_test(scenario)
+
+
+def test_a_burst_of_edits_is_calculated_once_with_the_last_seq():
+    async def scenario(websocket: FakeWebSocket) -> None:
+        websocket.send(**open_message())
+        await websocket.next_message()
+        calculations = live_stats.calculations
+
+        for seq, grams in enumerate((210, 220, 230, 240), start=2):
+            websocket.send(type="ingredient", seq=seq, index=0, quantity_g=grams)
+        websocket.send(type="ingredient", seq=6, index=2, name="Sugar", quantity_g=20)
+        result = await websocket.next_message()
+        assert result["seq"] == 6
+        assert result["changed"]["total_weight"] == 300
+        assert live_stats.calculations == calculations + 1
+        # Nothing else was queued behind the burst.
+        await asyncio.sleep(DEBOUNCE * 3)
+        assert websocket.sent.empty()
+
+    live_test(scenario)
+
+
+def test_results_carry_only_the_sections_that_changed():
+    async def scenario(websocket: FakeWebSocket) -> None:
+        websocket.send(**open_message())
+        await websocket.next_message()
+        # Servings change the per-serving values, not the recipe's totals.
+        websocket.send(type="recipe", seq=2, servings=4)
+        result = await websocket.next_message()
+        assert "per_serving" in result["changed"]
+        assert "per_100g" not in result["changed"]
+        assert "total_weight" not in result["changed"]
+
+    live_test(scenario)
+
+
+def test_continuous_typing_is_calculated_by_the_max_delay():
+    async def scenario(websocket: FakeWebSocket) -> None:
+        websocket.send(**open_message())
+        await websocket.next_message()
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        seq = 1
+        while loop.time() - started < MAX_DELAY * 2 and websocket.sent.empty():
+            seq += 1
+            websocket.send(type="ingredient", seq=seq, index=0, quantity_g=100 + seq)
+            await asyncio.sleep(DEBOUNCE / 3)
+        result = await websocket.next_message()
+        # A result arrived mid-burst, covering the edits seen so far.
+        assert result["type"] == "result"
+        assert 2 <= result["seq"] <= seq
+        assert loop.time() - started < MAX_DELAY * 2
+
+    live_test(scenario)
+
+
+def test_late_lower_seqs_do_not_move_the_seq_back():
+    async def scenario(websocket: FakeWebSocket) -> None:
+        websocket.send(**open_message(seq=10))
+        assert (await websocket.next_message())["seq"] == 10
+        websocket.send(type="recipe", seq=4, servings=3)
+        result = await websocket.next_message()
+        assert result["seq"] == 10
+
+    live_test(scenario)
+
+
+def test_bad_messages_are_answered_with_errors():
+    async def scenario(websocket: FakeWebSocket) -> None:
+        websocket.send(type="ingredient", seq=1, index=0, quantity_g=5)
+        error = await websocket.next_message()
+        assert error == {
+            "type": "error",
+            "seq": 1,
+            "status": 422,
+            "detail": "Send an 'open' message before editing.",
+        }
+
+        websocket.incoming.put_nowait("not json")
+        error = await websocket.next_message()
+        assert error["type"] == "error"
+        assert error["status"] == 422
+        assert "seq" not in error
+
+        websocket.send(**open_message(seq=2))
+        await websocket.next_message()
+        websocket.send(type="remove", seq=3, index=7)
+        error = await websocket.next_message()
+        assert (error["seq"], error["detail"]) == (3, "No ingredient at index 7.")
+
+        websocket.send(type="ingredient", seq=4, index=2, name="Unobtainium", quantity_g=5)
+        error = await websocket.next_message()
+        assert (error["seq"], error["status"]) == (4, 404)
+        assert error["detail"] == "Ingredient(s) not found: Unobtainium"
+
+        # A draft the calculator cannot accept yet (an empty new row) is a 422.
+        websocket.send(type="ingredient", seq=5, index=3)
+        error = await websocket.next_message()
+        assert (error["seq"], error["status"]) == (5, 422)
+
+    live_test(scenario)
+
+
+async def websocket_exchange(path: str, frames: list[str], replies: int) -> list[dict]:
+    """Connects to ``path``, sends ``frames`` and waits for ``replies`` messages."""
+    received: list[dict] = []
+    done = anyio.Event()
+    incoming = [{"type": "websocket.connect"}] + [
+        {"type": "websocket.receive", "text": frame} for frame in frames
+    ]
+    scope = {
+        "type": "websocket",
+        "asgi": {"version": "3.0"},
+        "scheme": "ws",
+        "path": path.split("?")[0],
+        "raw_path": path.split("?")[0].encode(),
+        "query_string": path.partition("?")[2].encode(),
+        "root_path": "",
+        "headers": [(b"host", b"testserver")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+        "subprotocols": [],
+    }
+
+    async def receive() -> dict:
+        if incoming:
+            return incoming.pop(0)
+        await done.wait()
+        return {"type": "websocket.disconnect", "code": 1000}
+
+    async def send(message: dict) -> None:
+        received.append(message)
+        if message["type"] == "websocket.close" or (
+            len([item for item in received if item["type"] == "websocket.send"]) >= replies
+        ):
+            done.set()
+
+    with anyio.fail_after(5):
+        await app(scope, receive, send)
+    return received
+
+
+def test_route_streams_results_over_the_socket():
+    messages = anyio.run(websocket_exchange, "/ws/calculate", [json.dumps(open_message())], 1)
+    assert messages[0]["type"] == "websocket.accept"
+    result = json.loads(messages[1]["text"])
+    assert (result["type"], result["seq"]) == ("result", 1)
+
+
+def test_route_refuses_a_tenant_without_its_token():
+    for path in ("/ws/calculate?tenant_id=acme", "/ws/calculate?tenant_id=acme&tenant_token=no"):
+        messages = anyio.run(websocket_exchange, path, [], 0)
+        assert [(item["type"], item.get("code")) for item in messages] == [
+            ("websocket.close", 1008)
+        ]
+
+    path = "/api/ws/calculate?tenant_id=acme&tenant_token=acme-secret"
+    messages = anyio.run(websocket_exchange, path, [json.dumps(open_message())], 1)
+    assert messages[0]["type"] == "websocket.accept"
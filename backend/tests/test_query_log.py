@@ -0,0 +1,105 @@
+import sqlite3
+
+import pytest
+from fastapi import FastAPI
+
+import query_log as query_log_module
+from conftest import AppClient
+from query_log import InstrumentedConnection, QueryCountMiddleware, QueryLog, _statement_key
+
+
+@pytest.fixture
+def connection():
+    connection = sqlite3.connect(":memory:", factory=InstrumentedConnection)
+    connection.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+    connection.execute("CREATE INDEX idx_items_name ON items (name)")
+    yield connection
+    connection.close()
+
+
+@pytest.fixture
+def log(monkeypatch, connection) -> QueryLog:
+    # Swapped in after the schema exists; every statement counts as slow, so
+    # plans are captured too.
+    fresh = QueryLog(slow_query_ms=0)
+    monkeypatch.setattr(query_log_module, "query_log", fresh)
+    return fresh
+
+
+def test_statement_keys_collapse_whitespace_and_in_lists():
+    assert _statement_key("SELECT *\n  FROM items   WHERE id = ?") == (
+        "SELECT * FROM items WHERE id = ?"
+    )
+    assert _statement_key("SELECT * FROM items WHERE id IN (?, ?, ?)") == _statement_key(
+        "SELECT * FROM items WHERE id IN (?,?)"
+    )
+
+
+def test_statements_are_timed_per_key(log, connection):
+    connection.executemany("INSERT INTO items (name) VALUES (?)", [("a",), ("b",), ("c",)])
+    for ids in ((1, 2), (1, 2, 3)):
+        placeholders = ", ".join("?" for _ in ids)
+        connection.execute(f"SELECT name FROM items WHERE id IN ({placeholders})", ids)
+    connection.cursor().execute("SELECT name FROM items WHERE name = ?", ("a",))
+
+    stats = log.stats()
+    assert stats["statements"] == 4
+    counts = {entry["statement"]: entry["count"] for entry in stats["top_statements"]}
+    assert counts == {
+        "INSERT INTO items (name) VALUES (?)": 1,
+        "SELECT name FROM items WHERE id IN (?, ...)": 2,
+        "SELECT name FROM items WHERE name = ?": 1,
+    }
+    assert len(log.stats(top=1)["top_statements"]) == 1
+
+
+def test_slow_queries_keep_their_plan(log, connection):
+    connection.execute("SELECT id FROM items WHERE name = ?", ("a",))
+    [slow] = log.stats()["recent_slow"]
+    assert slow["statement"] == "SELECT id FROM items WHERE name = ?"
+    assert any("idx_items_name" in line for line in slow["plan"])
+
+
+def test_statement_keys_are_capped(log, connection, monkeypatch):
+    monkeypatch.setattr(query_log_module, "MAX_STATEMENT_KEYS", 2)
+    for column in ("id", "name", "id, name"):
+        connection.execute(f"SELECT {column} FROM items")
+    stats = log.stats()
+    assert stats["statements"] == 3
+    assert len(stats["top_statements"]) == 2
+
+
+def test_requests_count_statements_from_the_threadpool(log):
+    app = FastAPI()
+
+    @app.get("/lookup")
+    def lookup():
+        connection = sqlite3.connect(":memory:", factory=InstrumentedConnection)
+        try:
+            for value in range(3):
+                connection.execute("SELECT ?", (value,)).fetchone()
+        finally:
+            connection.close()
+        return {}
+
+    app.add_middleware(QueryCountMiddleware, log=log)
+    AppClient(app).get("/lookup")
+
+    [request] = log.stats()["recent_requests"]
+    assert request["method"] == "GET"
+    assert request["path"] == "/lookup"
+    assert request["statements"] == 3
+    assert request["slow"] == 3
+
+
+def test_statements_outside_a_request_are_not_attributed(log, connection):
+    connection.execute("SELECT 1")
+    assert log.stats()["recent_requests"] == []
+
+
+def test_debug_route_reports_the_log(client):
+    response = client.get("/debug/queries?top=5")
+    assert response.status == 200
+    stats = response.json()
+    assert set(stats) >= {"enabled", "statements", "top_statements", "recent_requests"}
+    assert client.get("/debug/queries?top=0").status == 422
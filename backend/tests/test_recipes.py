@@ -0,0 +1,159 @@
+import pytest
+
+from calculator import RecipeCycleError, calculate_nutrition
+from catalog import delete_ingredient, upsert_aliases, upsert_ingredients
+from models import RecipeRequest
+from recipes import get_recipe, save_recipe
+from tenants import upsert_tenant_ingredients
+
+
+def recipe(name: str, *lines: tuple[str, float], servings: int = 1) -> RecipeRequest:
+    return RecipeRequest(
+        recipe_name=name,
+        servings=servings,
+        ingredients=[{"name": item, "quantity_g": grams} for item, grams in lines],
+    )
+
+
+def ingredient(name: str, energy_kcal: float) -> dict:
+    return {
+        "name": name,
+        "energy_kcal": energy_kcal,
+        "protein_g": 1,
+        "carbs_g": 1,
+        "sugar_g": 0,
+        "fat_g": 0,
+        "saturated_fat_g": 0,
+        "sodium_mg": 0,
+    }
+
+
+def saved_energy(name: str, tenant_id: str | None = None) -> float:
+    return get_recipe(name, tenant_id)["nutrition"]["per_100g"]["energy_kcal"]
+
+
+def test_saved_recipe_is_usable_as_an_ingredient():
+    save_recipe(recipe("Plain dough", ("Rice", 80), ("Salt", 20)))
+    rice_only = calculate_nutrition(recipe("Rice only", ("Rice", 80)))
+
+    # Salt has no energy, so 100 g of the dough has the energy of 80 g of rice.
+    result = calculate_nutrition(recipe("Flatbread", ("plain dough", 100)))
+    assert result["total_weight"] == 100
+    assert result["per_serving"]["energy_kcal"] == rice_only["per_serving"]["energy_kcal"]
+
+
+def test_sub_recipe_names_match_however_they_are_spelled():
+    upsert_ingredients([ingredient("Proso Millet", 300)])
+    save_recipe(recipe("Ｐｒｏｓｏ  Dough", ("Proso Millet", 100)))
+    save_recipe(recipe("Proso roti", ("proso dough", 100)))
+    assert saved_energy("Proso roti") == 300
+
+    # The recompute that finds the roti through the reverse index must also
+    # resolve its dough line.
+    upsert_ingredients([ingredient("Proso Millet", 360)])
+    assert get_recipe("Proso roti")["status"] == "ok"
+    assert saved_energy("Proso roti") == 360
+
+    # Saving under another spelling replaces the same recipe.
+    save_recipe(recipe("PROSO DOUGH", ("Proso Millet", 50), ("Salt", 50)))
+    assert get_recipe("proso   dough")["recipe_name"] == "PROSO DOUGH"
+    assert saved_energy("Proso roti") == 180
+
+
+def test_saving_a_cycle_is_rejected_and_rolled_back():
+    save_recipe(recipe("Cycle base", ("Rice", 100)))
+    save_recipe(recipe("Cycle sweet", ("Cycle base", 100), ("Sugar", 10)))
+
+    with pytest.raises(RecipeCycleError) as raised:
+        save_recipe(recipe("Cycle base", ("Cycle sweet", 50)))
+    assert raised.value.path == ["cycle base", "cycle sweet", "cycle base"]
+    assert get_recipe("Cycle base")["ingredients"] == [{"name": "Rice", "quantity_g": 100.0}]
+
+
+def test_recipe_that_uses_itself_is_rejected():
+    with pytest.raises(RecipeCycleError, match="self loop -> self loop"):
+        save_recipe(recipe("Self loop", ("Self loop", 10), ("Rice", 50)))
+    assert get_recipe("Self loop") is None
+
+
+def test_catalog_edit_recomputes_lines_spelled_differently():
+    upsert_ingredients([ingredient("Kodo Millet", 300)])
+    save_recipe(recipe("Millet bowl", ("  ＫＯＤＯ   millet ", 100)))
+    save_recipe(recipe("Millet mix", ("KODO MILLET", 50), ("Salt", 50)))
+    assert saved_energy("Millet bowl") == 300
+
+    upsert_ingredients([ingredient("Kodo Millet", 340)])
+    assert saved_energy("Millet bowl") == 340
+    assert saved_energy("Millet mix") == 170
+
+
+def test_catalog_edit_recomputes_recipes_through_sub_recipes():
+    upsert_ingredients([ingredient("Foxtail Millet", 200)])
+    save_recipe(recipe("Foxtail dough", ("Foxtail Millet", 100)))
+    save_recipe(recipe("Foxtail roti", ("foxtail dough", 100)))
+    save_recipe(recipe("Roti plate", ("Foxtail roti", 100)))
+
+    upsert_ingredients([ingredient("Foxtail Millet", 250)])
+    assert saved_energy("Foxtail dough") == 250
+    assert saved_energy("Roti plate") == 250
+
+
+def test_catalog_edit_recomputes_recipes_that_use_an_alias():
+    upsert_ingredients([ingredient("Barnyard Millet", 310)])
+    upsert_aliases({"sanwa": "Barnyard Millet"})
+    save_recipe(recipe("Sanwa khichdi", ("Sanwa", 100)))
+
+    upsert_ingredients([ingredient("Barnyard Millet", 320)])
+    assert saved_energy("Sanwa khichdi") == 320
+
+
+def test_deleting_an_ingredient_marks_its_recipes_failed():
+    upsert_ingredients([ingredient("Little Millet", 330)])
+    save_recipe(recipe("Little millet upma", ("Little Millet", 100)))
+
+    delete_ingredient("Little Millet")
+    saved = get_recipe("Little millet upma")
+    assert saved["status"] == "missing_ingredients"
+    assert saved["error"] == "Ingredient(s) not found: Little Millet"
+    assert saved["nutrition"] is None
+
+
+def test_tenant_edit_recomputes_only_that_tenants_recipes():
+    upsert_tenant_ingredients("kitchen-a", [ingredient("House Masala", 100)])
+    upsert_tenant_ingredients("kitchen-b", [ingredient("House Masala", 500)])
+    save_recipe(recipe("Masala rice", ("house masala", 100)), tenant_id="kitchen-a")
+    save_recipe(recipe("Masala rice", ("house masala", 100)), tenant_id="kitchen-b")
+
+    upsert_tenant_ingredients("kitchen-a", [ingredient("House Masala", 150)])
+    assert saved_energy("Masala rice", "kitchen-a") == 150
+    assert saved_energy("Masala rice", "kitchen-b") == 500
+
+
+def route_recipe(name: str) -> dict:
+    return {"recipe_name": name, "servings": 1, "ingredients": [{"name": "Rice", "quantity_g": 50}]}
+
+
+def test_global_recipe_writes_need_the_admin_token(client):
+    assert client.post("/recipes", route_recipe("House masala")).status == 403
+    assert client.get("/recipes/House masala").status == 404
+    admin = {"X-Admin-Token": "admin-secret"}
+    assert client.post("/recipes", route_recipe("House masala"), headers=admin).status == 200
+    # Global recipes stay readable without a token.
+    assert client.get("/recipes/House masala").status == 200
+    assert client.delete("/recipes/House masala").status == 403
+    assert client.delete("/recipes/House masala", headers=admin).status == 200
+
+
+def test_tenant_recipes_need_the_tenant_token(client):
+    acme = {"X-Tenant-Id": "acme", "X-Tenant-Token": "acme-secret"}
+    assert client.post("/recipes", route_recipe("Acme gravy"), headers=acme).status == 200
+    for token in ({}, {"X-Tenant-Token": "globex-secret"}):
+        headers = {"X-Tenant-Id": "acme", **token}
+        expected = 403 if token else 401
+        assert client.get("/recipes", headers=headers).status == expected
+        assert client.get("/recipes/Acme gravy", headers=headers).status == expected
+        saved = client.post("/recipes", route_recipe("Acme gravy"), headers=headers)
+        assert saved.status == expected
+        assert client.delete("/recipes/Acme gravy", headers=headers).status == expected
+    names = [row["recipe_name"] for row in client.get("/recipes", headers=acme).json()]
+    assert "Acme gravy" in names
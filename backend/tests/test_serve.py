@@ -0,0 +1,135 @@
+import signal
+
+import pytest
+
+import main
+import serve
+import warmup as warmup_module
+from serve import Master
+from warmup import Warmup
+
+
+class StubRunner:
+    def __init__(self) -> None:
+        self.started = 0
+
+    def start(self) -> None:
+        self.started += 1
+
+
+@pytest.fixture
+def startup_calls(monkeypatch) -> list[str]:
+    calls = []
+    monkeypatch.setattr(main, "init_db", lambda: calls.append("init_db"))
+    monkeypatch.setattr(main, "seed_ingredients", lambda: calls.append("seed_ingredients"))
+    monkeypatch.setattr(main, "job_runner", StubRunner())
+    return calls
+
+
+def test_preload_warms_up_in_the_master(monkeypatch):
+    fresh = Warmup()
+    monkeypatch.setattr(warmup_module, "warmup", fresh)
+    assert serve.preload() is main.app
+    assert fresh.ready
+    # Nothing SQLite-backed is carried across fork().
+    assert main.catalog_snapshot._holder is None
+
+
+def test_preload_refuses_to_fork_after_a_failed_warm_up(monkeypatch):
+    def empty_catalog():
+        raise RuntimeError("Ingredient catalog is empty; nothing to warm up.")
+
+    monkeypatch.setattr(warmup_module, "warmup", Warmup())
+    monkeypatch.setattr(warmup_module, "_sample_recipe", empty_catalog)
+    with pytest.raises(RuntimeError, match="Warm-up failed in the master process"):
+        serve.preload()
+
+
+def test_forked_worker_startup_skips_database_setup(monkeypatch, startup_calls):
+    inherited = Warmup()
+    inherited.status = "ready"
+    monkeypatch.setattr(main, "warmup", inherited)
+    main.startup_event()
+    assert startup_calls == []
+    assert main.job_runner.started == 1
+    assert inherited._thread is None
+
+
+def test_standalone_startup_sets_up_the_database(monkeypatch, startup_calls):
+    monkeypatch.setattr(warmup_module, "WARMUP_ENABLED", False)
+    monkeypatch.setattr(main, "warmup", Warmup())
+    main.startup_event()
+    assert startup_calls == ["init_db", "seed_ingredients"]
+    assert main.warmup.ready
+
+
+class FakeSocket:
+    def close(self) -> None:
+        pass
+
+
+class FakeConfig:
+    def bind_socket(self) -> FakeSocket:
+        return FakeSocket()
+
+
+class FakeProcesses:
+    """Stands in for fork() and wait(): each worker exits with the next scripted code."""
+
+    def __init__(self, master: Master, exit_codes: list[int]) -> None:
+        self.master = master
+        self.exit_codes = exit_codes
+        self.spawned = 0
+        self.sleeps: list[float] = []
+
+    def spawn(self, sockets) -> None:
+        self.spawned += 1
+        self.master.children[self.spawned] = 0.0
+
+    def wait(self) -> tuple[int, int]:
+        code = self.exit_codes.pop(0)
+        if not self.exit_codes:
+            # The last scripted exit is the shutdown.
+            self.master.stopping = True
+        return self.spawned, code << 8
+
+
+@pytest.fixture
+def run_master(monkeypatch):
+    def run(exit_codes: list[int], worker_age: float) -> FakeProcesses:
+        master = Master(FakeConfig(), workers=1)
+        processes = FakeProcesses(master, exit_codes)
+        monkeypatch.setattr(master, "spawn", processes.spawn)
+        monkeypatch.setattr(serve.os, "wait", processes.wait)
+        monkeypatch.setattr(serve.time, "monotonic", lambda: worker_age)
+        monkeypatch.setattr(serve.time, "sleep", processes.sleeps.append)
+        monkeypatch.setattr(serve.signal, "signal", lambda *args: None)
+        monkeypatch.setattr(serve.gc, "freeze", lambda: None)
+        master.run()
+        return processes
+
+    return run
+
+
+def test_crashing_workers_are_replaced_after_a_back_off(run_master):
+    processes = run_master([1, 1, 0], worker_age=0.5)
+    # Both crashes inside the window back off before the replacement; the exit
+    # during shutdown is not replaced.
+    assert processes.sleeps == [serve.CRASH_BACKOFF_SECONDS] * 2
+    assert processes.spawned == 3
+
+
+def test_recycled_workers_are_replaced_at_once(run_master):
+    processes = run_master([0, 0, 0], worker_age=5.0)
+    assert processes.sleeps == []
+    assert processes.spawned == 3
+
+
+def test_stop_signals_every_worker(monkeypatch):
+    killed = []
+    monkeypatch.setattr(serve.os, "kill", lambda pid, signum: killed.append((pid, signum)))
+    master = Master(config=None, workers=2)
+    master.children = {11: 0.0, 12: 0.0}
+    master._stop(signal.SIGTERM, None)
+    assert master.stopping
+    assert killed == [(11, signal.SIGTERM), (12, signal.SIGTERM)]
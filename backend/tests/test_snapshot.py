@@ -0,0 +1,81 @@
+import sqlite3
+import threading
+
+import pytest
+
+from database import (
+    CATALOG_SCOPE,
+    TENANTS_SCOPE,
+    CatalogSnapshot,
+    catalog_write,
+    get_connection,
+    read_catalog_version,
+)
+
+INSERT_INGREDIENT = """
+    INSERT INTO ingredients (
+        name, energy_kcal, protein_g, carbs_g, sugar_g, fat_g, saturated_fat_g, sodium_mg
+    ) VALUES (?, ?, 0, 0, 0, 0, 0, 0)
+"""
+
+
+def energy(connection: sqlite3.Connection, name: str) -> float | None:
+    row = connection.execute(
+        "SELECT energy_kcal FROM ingredients WHERE name = ?", (name,)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def test_snapshot_copies_the_catalog_tables_read_only():
+    snapshot = CatalogSnapshot(check_seconds=60)
+    connection = snapshot.connection()
+    with get_connection() as disk:
+        expected = disk.execute("SELECT count(*) FROM ingredients").fetchone()[0]
+        assert snapshot.version == read_catalog_version(disk, CATALOG_SCOPE)
+        assert snapshot.tenants_version == read_catalog_version(disk, TENANTS_SCOPE)
+    assert connection.execute("SELECT count(*) FROM ingredients").fetchone()[0] == expected
+    with pytest.raises(sqlite3.OperationalError):
+        connection.execute(INSERT_INGREDIENT, ("Snapshot write", 1))
+    # Saved recipes and jobs stay on disk.
+    with pytest.raises(sqlite3.OperationalError, match="no such table"):
+        connection.execute("SELECT 1 FROM recipes")
+
+
+def test_snapshot_keeps_serving_until_the_version_is_rechecked():
+    snapshot = CatalogSnapshot(check_seconds=60)
+    assert energy(snapshot.connection(), "Snapshot millet") is None
+    refreshes = snapshot.refreshes
+
+    with catalog_write() as connection:
+        connection.execute(INSERT_INGREDIENT, ("Snapshot millet", 350))
+    # Within check_seconds the previous copy is still served.
+    assert energy(snapshot.connection(), "Snapshot millet") is None
+
+    snapshot.refresh()
+    assert energy(snapshot.connection(), "Snapshot millet") == 350
+    assert snapshot.refreshes == refreshes + 1
+
+
+def test_unchanged_versions_do_not_rebuild():
+    snapshot = CatalogSnapshot(check_seconds=0)
+    snapshot.connection()
+    refreshes = snapshot.refreshes
+    for _ in range(3):
+        snapshot.connection()
+    assert snapshot.refreshes == refreshes
+
+
+def test_each_thread_reads_through_its_own_connection():
+    snapshot = CatalogSnapshot(check_seconds=60)
+    main_connection = snapshot.connection()
+    seen = []
+
+    def read() -> None:
+        connection = snapshot.connection()
+        seen.append((connection, energy(connection, "Rice")))
+
+    thread = threading.Thread(target=read)
+    thread.start()
+    thread.join(5)
+    assert seen[0][0] is not main_connection
+    assert seen[0][1] == energy(main_connection, "Rice")
@@ -0,0 +1,91 @@
+import math
+import random
+
+import pytest
+
+from substitutions import KDTree
+
+
+def brute_force(points, target, k, accept=lambda index: True):
+    ranked = sorted(
+        (math.dist(target, point), index)
+        for index, point in enumerate(points)
+        if accept(index)
+    )
+    return ranked[:k]
+
+
+@pytest.fixture
+def points() -> list[tuple[float, ...]]:
+    generator = random.Random(7)
+    # Rounded values, so many points tie on an axis or in distance.
+    return [tuple(round(generator.uniform(0, 10), 1) for _ in range(7)) for _ in range(600)]
+
+
+@pytest.mark.parametrize("k", [1, 5, 40])
+@pytest.mark.parametrize("leaf_size", [1, 8])
+def test_nearest_matches_brute_force(points, k, leaf_size):
+    tree = KDTree(points, leaf_size=leaf_size)
+    generator = random.Random(k)
+    for _ in range(25):
+        target = tuple(generator.uniform(-1, 11) for _ in range(7))
+        assert tree.nearest(target, k) == brute_force(points, target, k)
+
+
+def test_nearest_of_a_stored_point_is_itself(points):
+    tree = KDTree(points)
+    assert tree.nearest(points[42], 1) == [(0.0, 42)]
+
+
+def test_nearest_with_filter_matches_brute_force(points):
+    tree = KDTree(points)
+    accept = lambda index: index % 3 != 0
+    target = (5.0,) * 7
+    assert tree.nearest(target, 10, accept=accept) == brute_force(points, target, 10, accept)
+
+
+def test_nearest_below_bound_matches_brute_force(points):
+    tree = KDTree(points)
+    axis, bound = 2, 4.0
+    accept = lambda index: points[index][axis] < bound
+    target = (6.0,) * 7
+    result = tree.nearest(target, 10, accept=accept, below=(axis, bound))
+    assert result == brute_force(points, target, 10, accept)
+    assert all(points[index][axis] < bound for _, index in result)
+
+
+def test_nearest_returns_every_point_when_k_exceeds_size(points):
+    tree = KDTree(points[:5])
+    assert [index for _, index in tree.nearest((0.0,) * 7, 10)] == [
+        index for _, index in brute_force(points[:5], (0.0,) * 7, 10)
+    ]
+
+
+def test_empty_tree_and_zero_k():
+    assert KDTree([]).nearest((1.0, 2.0), 3) == []
+    assert KDTree([(1.0, 2.0)]).nearest((1.0, 2.0), 0) == []
+
+
+@pytest.mark.parametrize("reduce", [None, "energy_kcal", "sodium_mg"])
+def test_catalog_substitutes_match_brute_force(reduce):
+    from substitutions import NUTRIENT_COLUMNS, substitution_index
+
+    profile = substitution_index.profile("Rice")
+    result = substitution_index.substitutes(profile, 5, frozenset({"rice"}), reduce)
+
+    state = substitution_index._current()
+    target = state.scale([profile[column] for column in NUTRIENT_COLUMNS])
+    expected = [
+        state.names[index]
+        for _, index in brute_force(
+            [state.scale(values) for values in state.values],
+            target,
+            5,
+            lambda index: state.names[index] != "Rice"
+            and (
+                reduce is None
+                or state.values[index][NUTRIENT_COLUMNS.index(reduce)] < profile[reduce]
+            ),
+        )
+    ]
+    assert [item["name"] for item in result] == expected
@@ -0,0 +1,82 @@
+import pytest
+
+ACME = {"X-Tenant-Id": "acme", "X-Tenant-Token": "acme-secret"}
+SUPPLIER_GHEE = {
+    "name": "Acme Supplier Ghee",
+    "energy_kcal": 880,
+    "protein_g": 0,
+    "carbs_g": 0,
+    "sugar_g": 0,
+    "fat_g": 99.5,
+    "saturated_fat_g": 62,
+    "sodium_mg": 0,
+}
+
+
+@pytest.fixture(scope="module", autouse=True)
+def acme_library(client) -> None:
+    response = client.put("/tenants/acme/ingredients", [SUPPLIER_GHEE], headers=ACME)
+    assert response.status == 200
+
+
+def ghee_recipe() -> dict:
+    return {
+        "recipe_name": "Tadka",
+        "servings": 1,
+        "ingredients": [{"name": "acme supplier ghee", "quantity_g": 100}],
+    }
+
+
+def test_tenant_rows_resolve_with_its_token(client):
+    response = client.post("/calculate", ghee_recipe(), headers=ACME)
+    assert response.status == 200
+    assert response.json()["per_100g"]["energy_kcal"] == pytest.approx(880)
+
+
+def test_tenant_rows_are_not_visible_without_a_tenant(client):
+    response = client.post("/calculate", ghee_recipe())
+    assert response.status == 404
+
+
+@pytest.mark.parametrize(
+    ("method", "path"),
+    [
+        ("POST", "/calculate"),
+        ("POST", "/api/contributions"),
+        ("POST", "/generate-label"),
+        ("POST", "/async/calculate"),
+        ("POST", "/jobs"),
+        ("GET", "/reports/compliance/summary"),
+        ("GET", "/substitutes?ingredient=acme%20supplier%20ghee"),
+    ],
+)
+def test_selecting_a_tenant_needs_its_token(client, method, path):
+    body = None
+    if path == "/jobs":
+        body = {"kind": "calculations", "recipes": [ghee_recipe()]}
+    elif method == "POST":
+        body = ghee_recipe()
+    missing = client.request(method, path, body, {"X-Tenant-Id": "acme"})
+    wrong = client.request(
+        method, path, body, {"X-Tenant-Id": "acme", "X-Tenant-Token": "globex-secret"}
+    )
+    assert (missing.status, wrong.status) == (401, 403)
+
+
+def test_listing_a_library_needs_its_token(client):
+    assert client.get("/tenants/acme/ingredients").status == 401
+    other = client.get("/tenants/acme/ingredients", headers={"X-Tenant-Token": "globex-secret"})
+    assert other.status == 403
+    names = [row["name"] for row in client.get("/tenants/acme/ingredients", headers=ACME).json()]
+    assert names == ["Acme Supplier Ghee"]
+
+
+def test_admin_token_may_select_any_tenant(client):
+    headers = {"X-Tenant-Id": "acme", "X-Admin-Token": "admin-secret"}
+    assert client.post("/calculate", ghee_recipe(), headers=headers).status == 200
+
+
+def test_library_writes_need_its_token(client):
+    path = "/tenants/acme/ingredients/Acme%20Supplier%20Ghee"
+    assert client.delete(path).status == 401
+    assert client.delete(path, headers={"X-Tenant-Token": "globex-secret"}).status == 403
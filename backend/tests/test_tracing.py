@@ -0,0 +1,174 @@
+import json
+import time
+
+import anyio
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+
+import tracing
+from conftest import AppClient
+from tracing import (
+    STATUS_ERROR,
+    TRACE_ID_HEADER,
+    VALIDATION_SPAN,
+    TraceExporter,
+    TracedRoute,
+    TracingMiddleware,
+    span,
+    traced,
+)
+
+
+class RecordingExporter:
+    def __init__(self) -> None:
+        self.traces = []
+
+    def export(self, spans) -> None:
+        self.traces.append(spans)
+
+
+class Payload(BaseModel):
+    value: int
+
+
+@traced("double")
+def double(value: int) -> int:
+    return value * 2
+
+
+def traced_app() -> tuple[AppClient, RecordingExporter]:
+    app = FastAPI()
+    app.router.route_class = TracedRoute
+    exporter = RecordingExporter()
+
+    @app.post("/double")
+    def double_route(payload: Payload):
+        with span("work", input=payload.value):
+            return {"value": double(payload.value)}
+
+    @app.get("/broken")
+    async def broken_route():
+        raise HTTPException(status_code=503, detail="down")
+
+    app.add_middleware(TracingMiddleware, exporter=exporter)
+    return AppClient(app), exporter
+
+
+def by_name(spans) -> dict:
+    return {item.name: item for item in spans}
+
+
+def test_request_spans_form_one_tree():
+    client, exporter = traced_app()
+    response = client.post("/double", {"value": 4})
+    assert response.json() == {"value": 8}
+
+    [spans] = exporter.traces
+    root, named = spans[0], by_name(spans)
+    assert root.name == "POST /double"
+    assert response.headers[TRACE_ID_HEADER.lower()] == root.trace_id
+    assert root.attributes["http.response.status_code"] == 200
+    assert {item.trace_id for item in spans} == {root.trace_id}
+    # Validation and the handler's own span hang off the root; the traced helper
+    # nests under the span that was open when it ran, across the threadpool.
+    assert named[VALIDATION_SPAN].parent_span_id == root.span_id
+    assert named["work"].parent_span_id == root.span_id
+    assert named["work"].attributes == {"input": 4}
+    assert named["double"].parent_span_id == named["work"].span_id
+    for item in spans:
+        assert item.start_ns <= item.end_ns
+
+
+def test_incoming_traceparent_continues_the_trace():
+    client, exporter = traced_app()
+    trace_id, parent_id = "4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7"
+    response = client.post(
+        "/double", {"value": 1}, headers={"traceparent": f"00-{trace_id}-{parent_id}-01"}
+    )
+    root = exporter.traces[0][0]
+    assert response.headers[TRACE_ID_HEADER.lower()] == trace_id
+    assert root.trace_id == trace_id
+    assert root.parent_span_id == parent_id
+
+    client.post("/double", {"value": 1}, headers={"traceparent": "not-a-traceparent"})
+    fresh = exporter.traces[1][0]
+    assert fresh.trace_id != trace_id
+    assert fresh.parent_span_id is None
+
+
+def test_server_errors_mark_the_root_span():
+    client, exporter = traced_app()
+    assert client.get("/broken").status == 503
+    root = exporter.traces[0][0]
+    assert root.status == STATUS_ERROR
+    assert root.attributes["http.response.status_code"] == 503
+
+
+def test_spans_outside_a_request_are_no_ops():
+    with span("orphan") as orphan:
+        assert orphan is None
+    assert double(3) == 6
+
+
+def test_span_cap_counts_the_dropped_spans(monkeypatch):
+    monkeypatch.setattr(tracing, "TRACE_MAX_SPANS", 2)
+    app = FastAPI()
+    exporter = RecordingExporter()
+
+    @app.get("/many")
+    async def many():
+        for index in range(5):
+            with span("step", index=index):
+                pass
+        return {}
+
+    app.add_middleware(TracingMiddleware, exporter=exporter)
+    AppClient(app).get("/many")
+
+    root, *children = exporter.traces[0]
+    assert len(children) == 2
+    assert root.attributes["nutritrack.dropped_spans"] == 3
+
+
+def test_exporter_writes_otlp_json_lines(tmp_path):
+    exporter = TraceExporter(tmp_path / "traces" / "traces.jsonl", max_bytes=1 << 20, backups=1)
+    client, recorder = traced_app()
+    client.post("/double", {"value": 2})
+    exporter.export(recorder.traces[0])
+
+    # The listener thread writes the line after export returns.
+    path = tmp_path / "traces" / "traces.jsonl"
+    deadline = time.monotonic() + 5
+    while not (path.exists() and path.read_text().endswith("\n")):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    [line] = path.read_text().splitlines()
+    [resource] = json.loads(line)["resourceSpans"]
+    service = {item["key"]: item["value"] for item in resource["resource"]["attributes"]}
+    assert service["service.name"] == {"stringValue": tracing.SERVICE_NAME}
+    spans = resource["scopeSpans"][0]["spans"]
+    assert [item["name"] for item in spans] == [item.name for item in recorder.traces[0]]
+    work = next(item for item in spans if item["name"] == "work")
+    assert work["attributes"] == [{"key": "input", "value": {"intValue": "2"}}]
+    assert "parentSpanId" not in spans[0]
+    assert exporter.stats()["exported_traces"] == 1
+
+
+def test_traced_coroutines_open_a_span():
+    @traced("fetch")
+    async def fetch() -> str:
+        return "row"
+
+    app = FastAPI()
+    exporter = RecordingExporter()
+
+    @app.get("/fetch")
+    async def fetch_route():
+        return {"row": await fetch()}
+
+    app.add_middleware(TracingMiddleware, exporter=exporter)
+    assert AppClient(app).get("/fetch").json() == {"row": "row"}
+    root, child = exporter.traces[0]
+    assert child.name == "fetch"
+    assert child.parent_span_id == root.span_id
+    assert anyio.run(fetch) == "row"
@@ -0,0 +1,78 @@
+import pytest
+
+import main
+import warmup as warmup_module
+from label_generator import LABEL_FORMATS
+from warmup import Warmup
+
+
+@pytest.fixture
+def fresh_warmup(monkeypatch) -> Warmup:
+    fresh = Warmup()
+    monkeypatch.setattr(main, "warmup", fresh)
+    return fresh
+
+
+def test_ready_is_unavailable_until_warm_up_has_run(client, fresh_warmup):
+    response = client.get("/ready")
+    assert response.status == 503
+    assert response.headers["retry-after"] == "1"
+    assert response.json()["status"] == "pending"
+    # Liveness does not wait for warm-up.
+    assert client.get("/health").status == 200
+
+    fresh_warmup.run()
+    response = client.get("/api/ready")
+    assert response.status == 200
+    assert "retry-after" not in response.headers
+    assert response.json()["status"] == "ready"
+
+
+def test_warm_up_runs_every_step():
+    warmup = Warmup()
+    warmup.run()
+    assert warmup.ready
+    assert warmup.error is None
+    assert set(warmup.steps) == {
+        "catalog",
+        "substitution_index",
+        "calculate",
+        "response_model",
+        "label_sheet",
+        *(f"label_{label_format}" for label_format in LABEL_FORMATS),
+    }
+    assert warmup.total_ms >= 0
+
+
+def test_failed_warm_up_stays_unready(client, fresh_warmup, monkeypatch):
+    def empty_catalog():
+        raise RuntimeError("Ingredient catalog is empty; nothing to warm up.")
+
+    monkeypatch.setattr(warmup_module, "_sample_recipe", empty_catalog)
+    fresh_warmup.run()
+    response = client.get("/ready")
+    assert response.status == 503
+    assert response.json()["status"] == "failed"
+    assert response.json()["error"] == "Ingredient catalog is empty; nothing to warm up."
+
+
+def test_start_runs_in_the_background_once():
+    warmup = Warmup()
+    warmup.start()
+    assert warmup.status in {"running", "ready"}
+    warmup._thread.join(timeout=30)
+    assert warmup.ready
+
+    # A warm-up inherited as finished is not run again.
+    thread = warmup._thread
+    warmup.start()
+    assert warmup._thread is thread
+
+
+def test_disabled_warm_up_is_ready_at_once(monkeypatch):
+    monkeypatch.setattr(warmup_module, "WARMUP_ENABLED", False)
+    warmup = Warmup()
+    warmup.start()
+    assert warmup.ready
+    assert warmup._thread is None
+    assert warmup.steps == {}
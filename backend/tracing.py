@@ -0,0 +1,349 @@
+import atexit
+import inspect
+import json
+import logging
+import os
+import queue
+import re
+import secrets
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import Any
+
+from fastapi.routing import APIRoute
+
+TRACING_ENABLED = os.getenv("NUTRITRACK_TRACING", "0") == "1"
+TRACE_FILE = Path(
+    os.getenv("NUTRITRACK_TRACE_FILE", Path(__file__).resolve().parent / "traces" / "traces.jsonl")
+)
+TRACE_FILE_MAX_BYTES = int(os.getenv("NUTRITRACK_TRACE_FILE_MAX_BYTES", str(10 * 1024 * 1024)))
+TRACE_FILE_BACKUPS = int(os.getenv("NUTRITRACK_TRACE_FILE_BACKUPS", "5"))
+TRACE_MIN_DURATION_MS = float(os.getenv("NUTRITRACK_TRACE_MIN_DURATION_MS", "0"))
+TRACE_MAX_SPANS = int(os.getenv("NUTRITRACK_TRACE_MAX_SPANS", "512"))
+SERVICE_NAME = "nutritrack-api"
+TRACE_ID_HEADER = "X-Trace-Id"
+VALIDATION_SPAN = "validate_request"
+TRACEPARENT_PATTERN = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+# OTLP span kinds and status codes.
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+class Span:
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_span_id",
+        "kind",
+        "start_ns",
+        "end_ns",
+        "attributes",
+        "status",
+    )
+
+    def __init__(
+        self, name: str, trace_id: str, parent_span_id: str | None, kind: int
+    ) -> None:
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes: dict[str, Any] = {}
+        self.status = STATUS_OK
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_otlp(self) -> dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            "status": {"code": self.status},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        return span
+
+
+def _otlp_attribute(key: str, value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+class _TraceBuffer:
+    """Finished spans of one request.
+
+    Shared by every context copied from the request, threadpool and to_thread
+    included. Sheet and batch requests run the calculator thousands of times,
+    so spans past the cap are only counted.
+    """
+
+    __slots__ = ("spans", "dropped")
+
+    def __init__(self) -> None:
+        self.spans: list[Span] = []
+        self.dropped = 0
+
+
+_current_span: ContextVar[Span | None] = ContextVar("nutritrack_span", default=None)
+_trace_buffer: ContextVar[_TraceBuffer | None] = ContextVar("nutritrack_trace", default=None)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span | None]:
+    """Times a stage of the current request; a no-op outside a traced request."""
+    parent = _current_span.get()
+    buffer = _trace_buffer.get()
+    if parent is None or buffer is None:
+        yield None
+        return
+    if len(buffer.spans) >= TRACE_MAX_SPANS:
+        buffer.dropped += 1
+        yield None
+        return
+    child = Span(name, parent.trace_id, parent.span_id, SPAN_KIND_INTERNAL)
+    child.attributes.update(attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as exc:
+        child.status = STATUS_ERROR
+        child.set_attribute("exception.type", exc.__class__.__name__)
+        raise
+    finally:
+        child.end_ns = time.time_ns()
+        _current_span.reset(token)
+        buffer.spans.append(child)
+
+
+def traced(name: str) -> Callable:
+    def decorator(function: Callable) -> Callable:
+        if inspect.iscoroutinefunction(function):
+
+            @wraps(function)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                if _current_span.get() is None:
+                    return await function(*args, **kwargs)
+                with span(name):
+                    return await function(*args, **kwargs)
+
+            return async_wrapper
+
+        @wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _current_span.get() is None:
+                return function(*args, **kwargs)
+            with span(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+_validation_started: ContextVar[int | None] = ContextVar(
+    "nutritrack_validation_started", default=None
+)
+
+
+def _record_validation_span() -> None:
+    started = _validation_started.get()
+    parent = _current_span.get()
+    buffer = _trace_buffer.get()
+    if started is None or parent is None or buffer is None:
+        return
+    validation = Span(VALIDATION_SPAN, parent.trace_id, parent.span_id, SPAN_KIND_INTERNAL)
+    validation.start_ns = started
+    validation.end_ns = time.time_ns()
+    buffer.spans.append(validation)
+
+
+def _after_validation(endpoint: Callable) -> Callable:
+    if inspect.iscoroutinefunction(endpoint):
+
+        @wraps(endpoint)
+        async def async_endpoint(*args: Any, **kwargs: Any) -> Any:
+            _record_validation_span()
+            return await endpoint(*args, **kwargs)
+
+        return async_endpoint
+
+    @wraps(endpoint)
+    def sync_endpoint(*args: Any, **kwargs: Any) -> Any:
+        _record_validation_span()
+        return endpoint(*args, **kwargs)
+
+    return sync_endpoint
+
+
+class TracedRoute(APIRoute):
+    """Route that records reading and validating the request as one span.
+
+    The span runs from the route handler's entry to the moment the endpoint
+    is called: body parsing, parameter and Pydantic validation (and, for sync
+    endpoints, the wait for a threadpool thread). Measuring at the route keeps
+    the cost at one span per request, however many models a body nests.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs: Any) -> None:
+        super().__init__(path, _after_validation(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def traced_handler(request):
+            token = _validation_started.set(time.time_ns())
+            try:
+                return await handler(request)
+            finally:
+                _validation_started.reset(token)
+
+        return traced_handler
+
+
+class TraceExporter:
+    """Writes finished traces as OTLP/JSON lines to a size-rotated local file.
+
+    Records go through a queue to a background listener thread, so the event
+    loop never waits on disk I/O.
+    """
+
+    def __init__(self, path: Path, max_bytes: int, backups: int) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.exported = 0
+        self._logger: logging.Logger | None = None
+        self._listener: QueueListener | None = None
+
+    def _start(self) -> logging.Logger:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        file_handler = RotatingFileHandler(
+            self.path, maxBytes=self.max_bytes, backupCount=self.backups, encoding="utf-8"
+        )
+        file_handler.setFormatter(logging.Formatter("%(message)s"))
+        records: queue.SimpleQueue = queue.SimpleQueue()
+        self._listener = QueueListener(records, file_handler)
+        self._listener.start()
+        atexit.register(self._listener.stop)
+        logger = logging.getLogger("nutritrack.traces")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        logger.addHandler(QueueHandler(records))
+        return logger
+
+    def export(self, spans: list[Span]) -> None:
+        if self._logger is None:
+            self._logger = self._start()
+        payload = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            _otlp_attribute("service.name", SERVICE_NAME),
+                            _otlp_attribute("process.pid", os.getpid()),
+                        ]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "nutritrack.tracing"},
+                            "spans": [item.to_otlp() for item in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+        self._logger.info(json.dumps(payload, separators=(",", ":")))
+        self.exported += 1
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "enabled": TRACING_ENABLED,
+            "file": str(self.path),
+            "exported_traces": self.exported,
+            "min_duration_ms": TRACE_MIN_DURATION_MS,
+            "max_spans": TRACE_MAX_SPANS,
+        }
+
+
+trace_exporter = TraceExporter(TRACE_FILE, TRACE_FILE_MAX_BYTES, TRACE_FILE_BACKUPS)
+
+
+class TracingMiddleware:
+    """Opens the root span for every HTTP request and returns its trace id.
+
+    A valid W3C ``traceparent`` header continues the caller's trace.
+    """
+
+    def __init__(self, app, exporter: TraceExporter) -> None:
+        self.app = app
+        self.exporter = exporter
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace_id, parent_span_id = secrets.token_hex(16), None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                match = TRACEPARENT_PATTERN.match(value.decode("latin-1").strip())
+                if match:
+                    trace_id, parent_span_id = match.groups()
+                break
+
+        root = Span(f"{scope['method']} {scope['path']}", trace_id, parent_span_id, SPAN_KIND_SERVER)
+        root.set_attribute("http.request.method", scope["method"])
+        root.set_attribute("url.path", scope["path"])
+        buffer = _TraceBuffer()
+        span_token = _current_span.set(root)
+        trace_token = _trace_buffer.set(buffer)
+
+        async def send_with_trace_id(message: dict) -> None:
+            if message["type"] == "http.response.start":
+                root.set_attribute("http.response.status_code", message["status"])
+                if message["status"] >= 500:
+                    root.status = STATUS_ERROR
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (TRACE_ID_HEADER.lower().encode(), trace_id.encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_trace_id)
+        except BaseException:
+            root.status = STATUS_ERROR
+            raise
+        finally:
+            root.end_ns = time.time_ns()
+            _current_span.reset(span_token)
+            _trace_buffer.reset(trace_token)
+            if buffer.dropped:
+                root.set_attribute("nutritrack.dropped_spans", buffer.dropped)
+            if (root.end_ns - root.start_ns) / 1e6 >= TRACE_MIN_DURATION_MS:
+                self.exporter.export([root, *buffer.spans])
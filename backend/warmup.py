@@ -0,0 +1,124 @@
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+from calculator import calculate_nutrition
+from database import get_catalog_connection
+from label_generator import LABEL_FORMATS, generate_label_sheet_pdf, label_sheet_geometry
+from models import CalculationResponse, LabelSheetLayout, RecipeRequest
+from substitutions import substitution_index
+
+WARMUP_ENABLED = os.getenv("NUTRITRACK_WARMUP", "1") == "1"
+WARMUP_INGREDIENTS = 3
+
+logger = logging.getLogger("nutritrack.warmup")
+
+
+def _sample_recipe() -> RecipeRequest:
+    with get_catalog_connection() as connection:
+        names = [
+            row["name"]
+            for row in connection.execute(
+                "SELECT name FROM ingredients ORDER BY id LIMIT ?", (WARMUP_INGREDIENTS,)
+            )
+        ]
+    if not names:
+        raise RuntimeError("Ingredient catalog is empty; nothing to warm up.")
+    return RecipeRequest.model_validate(
+        {
+            "recipe_name": "Warm-up recipe",
+            "servings": 2,
+            "ingredients": [{"name": name, "quantity_g": 100} for name in names],
+        }
+    )
+
+
+class Warmup:
+    """Runs the first-request work once, off the request path.
+
+    Imports, the catalog read (or snapshot build), the substitution index,
+    validator and serializer setup, the calculation path and every label
+    renderer are exercised in a background thread; ``/ready`` reports ready only after all of them ran.
+    """
+
+    def __init__(self) -> None:
+        self.status = "pending"
+        self.steps: dict[str, float] = {}
+        self.total_ms: float | None = None
+        self.error: str | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    def start(self) -> None:
+        # Workers forked from a preloaded master inherit a finished warm-up.
+        if not WARMUP_ENABLED or self.ready:
+            self.status = "ready"
+            return
+        self.status = "running"
+        self._thread = threading.Thread(target=self.run, name="nutritrack-warmup", daemon=True)
+        self._thread.start()
+
+    def _step(self, name: str, action: Callable[[], Any]) -> Any:
+        started = time.perf_counter()
+        result = action()
+        self.steps[name] = round((time.perf_counter() - started) * 1000, 3)
+        return result
+
+    def run(self) -> None:
+        started = time.perf_counter()
+        try:
+            recipe = self._step("catalog", _sample_recipe)
+            self._step("substitution_index", substitution_index.warm)
+            result = self._step(
+                "calculate",
+                lambda: calculate_nutrition(recipe, include_contributions=True),
+            )
+            self._step(
+                "response_model",
+                lambda: CalculationResponse.model_validate(result).model_dump_json(),
+            )
+            label = {
+                "recipe_name": recipe.recipe_name,
+                "servings": recipe.servings,
+                "total_weight": result["total_weight"],
+                "per_100g": result["per_100g"],
+                "per_serving": result["per_serving"],
+            }
+            # Renderers are called directly so the warm-up label stays out of
+            # the rendered-label cache.
+            for label_format, (_, renderer) in LABEL_FORMATS.items():
+                self._step(f"label_{label_format}", lambda: renderer(**label))
+            self._step(
+                "label_sheet",
+                lambda: b"".join(
+                    generate_label_sheet_pdf(
+                        [label], label_sheet_geometry(**LabelSheetLayout().model_dump())
+                    )
+                ),
+            )
+        except Exception as exc:
+            self.status = "failed"
+            self.error = str(exc)
+            logger.exception("Warm-up failed")
+        else:
+            self.status = "ready"
+        self.total_ms = round((time.perf_counter() - started) * 1000, 3)
+        logger.info("Warm-up %s in %.1f ms: %s", self.status, self.total_ms, self.steps)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "status": self.status,
+            "enabled": WARMUP_ENABLED,
+            "total_ms": self.total_ms,
+            "steps_ms": dict(self.steps),
+            "error": self.error,
+        }
+
+
+warmup = Warmup()